@@ -1,20 +1,34 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import List, Optional
+import asyncio
 import os
+import tempfile
+import time
 
 from app.models.schemas import (
     QuestionRequest, 
     AnswerResponse, 
     DocumentUploadResponse,
+    FileUploadResponse,
+    UploadedFileResult,
     HealthResponse,
-    DocumentChunk
+    DocumentChunk,
+    SearchFilters
 )
 from app.services.document_loader import document_loader
-from app.services.embedding_service import embedding_service
+from app.services.ingestion_service import ingestion_service
 from app.services.search_service import search_service
 from app.services.llm_service import llm_service
-from app.core.database import vector_db
+from app.services.snapshot_service import snapshot_service, SUPPORTED_DTYPES
+from app.services.query_log import query_log_service
+from app.services.cache_warmer import cache_warmer
+from app.services.confluence_loader import confluence_sync_service
+from app.core.collections import collection_manager, validate_collection_name
+from app.core.database import vector_db, VectorDatabase
 from app.core.config import settings
+from app.core.executor import run_in_cpu_executor
+from app.core.responses import dumps_line
 
 
 router = APIRouter()
@@ -36,7 +50,8 @@ async def health_check():
     try:
         db_info = vector_db.get_collection_info()
         model_info = llm_service.get_model_info()
-        chunks_info = vector_db.get_chunks_info()
+        # 헬스 체크는 자주 호출되므로 전체 메타데이터를 훑는 파일 분포 대신 청크 수(count)만 포함
+        chunks_info = {"total_chunks": db_info.get("total_documents", 0)}
         
         return HealthResponse(
             status="healthy",
@@ -49,62 +64,262 @@ async def health_check():
 
 
 @router.post("/upload-documents", response_model=DocumentUploadResponse)
-async def upload_documents():
-    """문서 업로드 및 벡터화"""
+async def upload_documents(background_tasks: BackgroundTasks, collection: Optional[str] = None):
+    """문서 업로드 및 벡터화 (collection 지정 시 해당 컬렉션의 문서 디렉토리 사용)"""
+    _require_ingest_enabled()
+    documents_dir = _collection_documents_dir(collection)
     try:
         # 문서 디렉토리 확인
-        if not os.path.exists(settings.documents_dir):
-            os.makedirs(settings.documents_dir)
+        if not os.path.exists(documents_dir):
+            os.makedirs(documents_dir)
             return DocumentUploadResponse(
                 message="문서 디렉토리가 생성되었습니다. 문서를 추가해주세요.",
                 processed_files=[],
                 total_chunks=0
             )
         
-        # 문서 로드 및 청킹
-        documents = document_loader.load_documents_from_directory()
-        
-        if not documents:
+        if not document_loader.list_document_files(documents_dir):
             return DocumentUploadResponse(
                 message="처리할 문서가 없습니다.",
                 processed_files=[],
                 total_chunks=0
             )
         
-        # 문서 내용 추출
-        texts = [doc.page_content for doc in documents]
-        metadatas = [doc.metadata for doc in documents]
-        
-        # 임베딩 생성
-        embeddings = embedding_service.get_embeddings(texts)
+        # 파일 단위로 기존 청크를 교체하며 색인 (PDF는 바뀐 페이지만 다시 추출/임베딩), 이벤트 루프를 막지 않도록 스레드에서 실행
+        loop = asyncio.get_running_loop()
+        stats = await loop.run_in_executor(None, ingestion_service.ingest_directory, documents_dir, collection)
         
-        # 벡터 데이터베이스에 저장
-        vector_db.add_documents(texts, embeddings, metadatas)
-        
-        # 처리된 파일 목록
-        processed_files = list(set([meta.get('source_file', 'unknown') for meta in metadatas]))
+        # 재색인 후 자주 묻는 질문으로 캐시 예열
+        if stats['stored_chunks']:
+            background_tasks.add_task(cache_warmer.warm)
         
+        failed = stats['failed_files']
+        message = f"{len(stats['processed_files'])}개 파일에서 {stats['stored_chunks']}개 문서 청크가 처리되었습니다."
+        if failed:
+            message += f" ({len(failed)}개 파일 색인 실패: {', '.join(os.path.basename(path) for path in failed)})"
         return DocumentUploadResponse(
-            message=f"{len(documents)}개 문서 청크가 성공적으로 처리되었습니다.",
-            processed_files=processed_files,
-            total_chunks=len(documents)
+            message=message,
+            processed_files=stats['processed_files'],
+            total_chunks=stats['stored_chunks'],
+            duplicates_removed=stats['duplicates_removed'],
+            embedding_time_saved_ms=stats['embedding_time_saved_ms'],
+            failed_files=len(failed)
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"문서 업로드 실패: {str(e)}")
 
 
+@router.post("/documents/upload", response_model=FileUploadResponse)
+async def upload_files(background_tasks: BackgroundTasks, files: List[UploadFile] = File(...), subdir: str = "",
+                       collection: Optional[str] = None):
+    """업로드한 파일만 저장 및 벡터화 (디렉토리 전체 재스캔 없음)
+
+    모든 파일을 먼저 임시 파일로 받아 검사하므로 형식/크기 오류(400/413)면 아무 파일도 저장/색인하지 않습니다.
+    검사를 통과한 뒤의 색인 실패는 파일별 error로 보고합니다. (나머지 파일은 정상 처리)
+    """
+    _require_ingest_enabled()
+    documents_dir = _collection_documents_dir(collection)
+    started = time.perf_counter()
+    spooled = []  # (파일명, 임시 경로, 최종 경로, 크기, 저장 시간)
+    try:
+        if len(files) > settings.max_upload_files:
+            raise HTTPException(
+                status_code=413,
+                detail=f"한 번에 최대 {settings.max_upload_files}개 파일까지 업로드할 수 있습니다."
+            )
+        
+        target_dir = _resolve_upload_dir(subdir, documents_dir)
+        for upload in files:
+            filename = os.path.basename(upload.filename or "")
+            if not filename or not document_loader.is_supported(filename):
+                raise HTTPException(status_code=400, detail=f"지원하지 않는 파일 형식입니다: {upload.filename}")
+        
+        # 전체 파일을 임시 파일로 저장 (하나라도 크기 제한을 넘으면 요청 전체 거부)
+        for upload in files:
+            filename = os.path.basename(upload.filename)
+            save_started = time.perf_counter()
+            file_path = os.path.join(target_dir, filename)
+            temp_path = file_path + ".uploading"
+            size = await _spool_upload(upload, temp_path, settings.max_upload_size_mb * 1024 * 1024)
+            spooled.append((filename, temp_path, file_path, size, round((time.perf_counter() - save_started) * 1000, 2)))
+        
+        results = []
+        loop = asyncio.get_running_loop()
+        for filename, temp_path, file_path, size, save_time_ms in spooled:
+            os.replace(temp_path, file_path)
+            
+            # 업로드된 파일만 수집 (임베딩이 오래 걸리므로 이벤트 루프를 막지 않도록 스레드 풀에서 실행)
+            try:
+                stats = await loop.run_in_executor(
+                    None, ingestion_service.ingest_file, file_path, documents_dir, collection
+                )
+                results.append(UploadedFileResult(
+                    filename=filename,
+                    size_bytes=size,
+                    chunks=stats["stored_chunks"],
+                    duplicates_removed=stats["duplicates_removed"],
+                    save_time_ms=save_time_ms,
+                    index_time_ms=stats["load_time_ms"] + stats["index_time_ms"]
+                ))
+            except Exception as e:
+                results.append(UploadedFileResult(
+                    filename=filename,
+                    size_bytes=size,
+                    chunks=0,
+                    save_time_ms=save_time_ms,
+                    index_time_ms=0.0,
+                    error=str(e)
+                ))
+        
+        total_chunks = sum(result.chunks for result in results)
+        failed = [result.filename for result in results if result.error]
+        if total_chunks:
+            background_tasks.add_task(cache_warmer.warm)
+        message = f"{len(results)}개 파일에서 {total_chunks}개 청크가 처리되었습니다."
+        if failed:
+            message += f" ({len(failed)}개 파일 색인 실패: {', '.join(failed)})"
+        return FileUploadResponse(
+            message=message,
+            files=results,
+            total_chunks=total_chunks,
+            failed_files=len(failed),
+            total_time_ms=round((time.perf_counter() - started) * 1000, 2)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"파일 업로드 실패: {str(e)}")
+    finally:
+        for _, temp_path, _, _, _ in spooled:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        for upload in files:
+            await upload.close()
+
+
+@router.post("/confluence/sync")
+async def sync_confluence(
+    background_tasks: BackgroundTasks,
+    space_key: Optional[str] = None,
+    collection: Optional[str] = None,
+    full: bool = False
+):
+    """Confluence 스페이스 증분 동기화 (space_key 미지정 시 CONFLUENCE_SPACES 전체)"""
+    _require_ingest_enabled()
+    if collection:
+        _validate_collection(collection)
+    try:
+        space_keys = [space_key] if space_key else None
+        # 페이지 조회/임베딩이 오래 걸리므로 이벤트 루프를 막지 않도록 스레드 풀에서 실행
+        results = await asyncio.get_running_loop().run_in_executor(
+            None, confluence_sync_service.sync_spaces, space_keys, collection, full
+        )
+        if any(result["changed_pages"] or result["deleted_pages"] for result in results):
+            background_tasks.add_task(cache_warmer.warm)
+        return {"spaces": results}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Confluence 동기화 실패: {str(e)}")
+
+
+def _require_ingest_enabled():
+    """읽기 전용 복제본에서는 인덱스 쓰기 요청 거부"""
+    if not settings.ingest_enabled:
+        raise HTTPException(
+            status_code=403,
+            detail="이 인스턴스는 읽기 전용입니다. 문서 수집은 수집 전용 인스턴스에서 실행하세요."
+        )
+
+
+def _collection_documents_dir(collection: Optional[str]) -> str:
+    """컬렉션별 문서 디렉토리 (기본 컬렉션은 DOCUMENTS_DIR)"""
+    if not collection or collection == settings.default_collection:
+        return settings.documents_dir
+    return os.path.join(settings.collection_documents_dir, _validate_collection(collection))
+
+
+def _validate_collection(collection: str) -> str:
+    try:
+        return validate_collection_name(collection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _require_collection(collection: Optional[str]):
+    """검색/조회 대상 컬렉션 확인 (잘못된 이름은 400, 없는 컬렉션은 404)"""
+    if collection and not collection_manager.exists(_validate_collection(collection)):
+        raise HTTPException(status_code=404, detail=f"컬렉션이 존재하지 않습니다: {collection}")
+
+
+def _collection_db(collection: Optional[str]) -> VectorDatabase:
+    _require_collection(collection)
+    return collection_manager.get(collection)
+
+
+def _resolve_upload_dir(subdir: str, documents_dir: str) -> str:
+    """업로드 대상 디렉토리 확인 (문서 디렉토리 밖으로 벗어나는 경로 차단)"""
+    base_dir = os.path.abspath(documents_dir)
+    target_dir = os.path.abspath(os.path.join(base_dir, subdir))
+    if os.path.commonpath([base_dir, target_dir]) != base_dir:
+        raise HTTPException(status_code=400, detail=f"잘못된 업로드 경로입니다: {subdir}")
+    
+    os.makedirs(target_dir, exist_ok=True)
+    # 디렉토리 스캔 시의 file_path 메타데이터와 같은 경로 형식을 유지
+    relative_dir = os.path.relpath(target_dir, base_dir)
+    if relative_dir == ".":
+        return documents_dir
+    return os.path.join(documents_dir, relative_dir)
+
+
+async def _spool_upload(upload: UploadFile, destination: str, max_bytes: int) -> int:
+    """업로드 파일을 메모리에 모두 올리지 않고 청크 단위로 디스크에 저장 (크기 초과 시 파일 삭제 후 413)"""
+    size = 0
+    try:
+        with open(destination, "wb") as buffer:
+            while True:
+                chunk = await upload.read(settings.upload_chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"{upload.filename}: 파일 크기 제한({max_bytes // (1024 * 1024)}MB)을 초과했습니다."
+                    )
+                buffer.write(chunk)
+        return size
+        
+    except BaseException:
+        if os.path.exists(destination):
+            os.remove(destination)
+        raise
+
+
 @router.post("/ask", response_model=AnswerResponse)
 async def ask_question(request: QuestionRequest):
-    """질문에 대한 답변 생성"""
+    """질문에 대한 답변 생성 (검색은 CPU 스레드 풀, LLM 호출은 비동기 API로 처리하여 이벤트 루프를 막지 않음)"""
+    started = time.perf_counter()
+    filters = request.filters.model_dump(exclude_none=True) if request.filters else None
+    await run_in_cpu_executor(_require_collection, request.collection)
+    log_entry = {"endpoint": "ask", "latency_ms": {}, "cache": {}, "collection": request.collection}
     try:
-        # 관련 문서 검색
-        search_results = search_service.search_documents(
+        # 관련 문서 검색 (질문 임베딩 + 벡터 검색)
+        search_results, search_cached = await run_in_cpu_executor(
+            search_service.search_documents_with_status,
             request.question, 
-            request.max_results
+            request.max_results,
+            filters,
+            request.collection
         )
+        log_entry["latency_ms"]["search"] = _elapsed_ms(started)
+        log_entry["cache"]["search"] = "hit" if search_cached else "miss"
+        log_entry["result_ids"] = [result.get('id') for result in search_results]
         
         if not search_results:
+            log_entry["status"] = "ok"
             return AnswerResponse(
                 answer="죄송합니다. 질문과 관련된 문서를 찾을 수 없습니다. 다른 질문을 시도해보세요.",
                 sources=[],
@@ -115,10 +330,13 @@ async def ask_question(request: QuestionRequest):
         context_chunks = [result['content'] for result in search_results]
         
         # LLM을 사용한 답변 생성
-        llm_response = llm_service.generate_answer(
+        llm_started = time.perf_counter()
+        llm_response = await llm_service.agenerate_answer(
             request.question, 
             context_chunks
         )
+        log_entry["latency_ms"]["llm"] = _elapsed_ms(llm_started)
+        log_entry["cache"]["answer"] = "hit" if llm_response.get('cached') else "miss"
         
         # 소스 문서 정보 구성
         sources = []
@@ -126,9 +344,11 @@ async def ask_question(request: QuestionRequest):
             sources.append(DocumentChunk(
                 content=result['content'][:200] + "...",  # 미리보기
                 metadata=result['metadata'],
-                distance=result['distance']
+                distance=result['distance'],
+                sources=result.get('sources', [])
             ))
         
+        log_entry["status"] = "ok"
         return AnswerResponse(
             answer=llm_response['answer'],
             sources=sources,
@@ -136,7 +356,26 @@ async def ask_question(request: QuestionRequest):
         )
         
     except Exception as e:
+        log_entry["status"] = "error"
         raise HTTPException(status_code=500, detail=f"답변 생성 실패: {str(e)}")
+    finally:
+        log_entry["latency_ms"]["total"] = _elapsed_ms(started)
+        _log_query(log_entry, request.question, request.max_results, filters)
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _log_query(entry: dict, question: str, max_results: int, filters: Optional[dict]):
+    """질의 로그 기록 (큐에 넣기만 하므로 응답을 지연시키지 않음)"""
+    entry.update({
+        "question": query_log_service.normalize_question(question),
+        "raw_question": ' '.join(question.split()),
+        "max_results": max_results,
+        "filters": filters or None
+    })
+    query_log_service.record(entry)
 
 
 @router.get("/documents/info")
@@ -152,18 +391,53 @@ async def get_documents_info():
 async def get_search_statistics():
     """검색 통계 정보"""
     try:
-        return search_service.get_search_statistics()
+        statistics = search_service.get_search_statistics()
+        statistics["query_log"] = query_log_service.get_stats()
+        return statistics
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"검색 통계 조회 실패: {str(e)}")
 
 
 @router.post("/search/keywords")
-async def search_by_keywords(keywords: List[str], max_results: int = 5):
-    """키워드 기반 검색"""
+async def search_by_keywords(
+    keywords: List[str],
+    max_results: int = 5,
+    source_file: Optional[str] = None,
+    file_extension: Optional[str] = None,
+    path_prefix: Optional[str] = None,
+    collection: Optional[str] = None
+):
+    """키워드 기반 검색 (임베딩 + 벡터 검색은 CPU 스레드 풀에서 실행)"""
+    started = time.perf_counter()
+    await run_in_cpu_executor(_require_collection, collection)
     try:
-        results = search_service.search_by_keywords(keywords, max_results)
+        filters = SearchFilters(
+            source_file=source_file,
+            file_extension=file_extension,
+            path_prefix=path_prefix
+        ).model_dump(exclude_none=True)
+        results, cached = await run_in_cpu_executor(
+            search_service.search_by_keywords_with_status,
+            keywords,
+            max_results,
+            filters,
+            collection
+        )
+        _log_query(
+            {
+                "endpoint": "search_keywords",
+                "collection": collection,
+                "latency_ms": {"total": _elapsed_ms(started)},
+                "cache": {"search": "hit" if cached else "miss"},
+                "result_ids": [result.get('id') for result in results],
+                "status": "ok"
+            },
+            ' '.join(keywords), max_results, filters
+        )
         return {
             "keywords": keywords,
+            "collection": collection or settings.default_collection,
+            "filters": filters,
             "results": results,
             "total_found": len(results)
         }
@@ -195,22 +469,114 @@ async def optimize_search_settings():
 
 
 @router.get("/chunks/info")
-async def get_chunks_info():
-    """저장된 청크들의 상세 정보 조회"""
+async def get_chunks_info(limit: int = 100, offset: int = 0, collection: Optional[str] = None):
+    """저장된 청크들의 상세 정보 조회 (전체 목록은 /chunks/export 사용)"""
+    db = _collection_db(collection)
     try:
-        chunks_info = vector_db.get_chunks_info()
+        chunks_info = db.get_chunks_info(limit=limit, offset=offset)
         return chunks_info
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"청크 정보 조회 실패: {str(e)}")
 
 
+@router.get("/chunks/export")
+async def export_chunks(batch_size: int = 500, include_content: bool = True, collection: Optional[str] = None):
+    """전체 청크를 페이지 단위로 읽어 NDJSON으로 스트리밍 (컬렉션 크기와 무관한 메모리 사용)"""
+    include = ["documents", "metadatas"] if include_content else ["metadatas"]
+    db = _collection_db(collection)
+    
+    def generate():
+        for batch in db.iter_records(include=include, batch_size=batch_size):
+            documents = batch.get("documents") or [None] * len(batch["ids"])
+            for chunk_id, content, metadata in zip(batch["ids"], documents, batch["metadatas"]):
+                record = {"id": chunk_id, "metadata": metadata or {}}
+                if include_content:
+                    record["content"] = content
+                yield dumps_line(record)
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.get("/snapshot/export")
+async def export_snapshot(
+    background_tasks: BackgroundTasks,
+    dtype: str = "float16",
+    collection: Optional[str] = None
+):
+    """인덱스 스냅샷 파일 다운로드 (collection 지정 시 해당 컬렉션)"""
+    if dtype not in SUPPORTED_DTYPES:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 임베딩 형식입니다: {dtype}")
+    _require_collection(collection)
+    
+    try:
+        fd, path = tempfile.mkstemp(suffix=".npz")
+        os.close(fd)
+        # 전체 컬렉션 조회와 압축은 오래 걸리므로 이벤트 루프 밖에서 실행
+        stats = await asyncio.get_running_loop().run_in_executor(
+            None, snapshot_service.export_snapshot, path, dtype, collection
+        )
+        
+        # 응답 전송 후 임시 파일 삭제
+        background_tasks.add_task(os.remove, path)
+        return FileResponse(
+            path,
+            media_type="application/octet-stream",
+            filename=f"{stats['collection_name']}.npz",
+            headers={"X-Snapshot-Checksum": stats["checksum"]}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"스냅샷 내보내기 실패: {str(e)}")
+
+
+@router.post("/snapshot/import")
+async def import_snapshot(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    replace: bool = False,
+    collection: Optional[str] = None
+):
+    """업로드한 스냅샷 파일을 임베딩 재계산 없이 적재 (collection 지정 시 해당 컬렉션, 없으면 생성)"""
+    _require_ingest_enabled()
+    if collection:
+        _validate_collection(collection)
+    fd, path = tempfile.mkstemp(suffix=".npz")
+    os.close(fd)
+    try:
+        await _spool_upload(file, path, settings.max_snapshot_size_mb * 1024 * 1024)
+        stats = await asyncio.get_running_loop().run_in_executor(
+            None, snapshot_service.import_snapshot, path, replace, collection
+        )
+        background_tasks.add_task(cache_warmer.warm)
+        return stats
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"스냅샷 가져오기 실패: {str(e)}")
+    finally:
+        await file.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
 @router.delete("/documents/clear")
-async def clear_documents():
-    """벡터 데이터베이스 초기화"""
+async def clear_documents(collection: Optional[str] = None):
+    """벡터 데이터베이스 초기화 (collection 지정 시 해당 컬렉션만)"""
+    _require_ingest_enabled()
+    db = _collection_db(collection)
     try:
-        result = vector_db.clear_database()
+        result = db.clear_database()
+        collection_manager.refresh_memory(db.name)
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"데이터베이스 초기화 실패: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"데이터베이스 초기화 실패: {str(e)}") 
+
+
+@router.get("/collections")
+async def list_collections():
+    """컬렉션 목록과 컬렉션별 크기/로드 상태/적중 통계"""
+    try:
+        return collection_manager.list_collections()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"컬렉션 목록 조회 실패: {str(e)}")
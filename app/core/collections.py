@@ -0,0 +1,132 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.database import VectorDatabase, vector_db
+
+
+# Chroma 컬렉션 이름 규칙: 3~63자, 영문/숫자로 시작하고 끝남, 영문/숫자/._- 사용, 연속 마침표 불가
+_COLLECTION_NAME_PATTERN = re.compile(r"^[a-zA-Z0-9][a-zA-Z0-9._-]{1,61}[a-zA-Z0-9]$")
+
+
+def validate_collection_name(name: str) -> str:
+    """컬렉션 이름 검증"""
+    if not _COLLECTION_NAME_PATTERN.match(name) or ".." in name:
+        raise ValueError(
+            f"잘못된 컬렉션 이름입니다: {name} "
+            "(3~63자, 영문/숫자로 시작하고 끝나며 영문/숫자/._- 만 사용)"
+        )
+    return name
+
+
+class CollectionManager:
+    """팀별 컬렉션 관리 (자주 쓰는 컬렉션만 메모리 상한 안에서 LRU로 유지)
+
+    기본 컬렉션은 항상 로드된 상태로 두고, 나머지 컬렉션은 요청이 오면 로드합니다.
+    로드된 인덱스의 추정 메모리 합계가 상한을 넘으면 가장 오래 사용하지 않은 컬렉션부터 내립니다.
+    """
+
+    def __init__(self, default_db: VectorDatabase):
+        self.default_db = default_db
+        self.memory_limit_bytes = settings.collection_memory_limit_mb * 1024 * 1024
+        self._loaded: "OrderedDict[str, VectorDatabase]" = OrderedDict()
+        self._memory: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+
+        self._loaded[default_db.name] = default_db
+        self._memory[default_db.name] = default_db.estimate_memory_bytes()
+
+    def get(self, name: Optional[str] = None, create: bool = False) -> VectorDatabase:
+        """컬렉션 조회 (로드되어 있지 않으면 로드, create=True면 없을 때 생성)"""
+        name = validate_collection_name(name) if name else self.default_db.name
+        with self._lock:
+            stats = self._stats_for(name)
+            stats["requests"] += 1
+            stats["last_used"] = time.time()
+
+            db = self._loaded.get(name)
+            if db is not None:
+                self._loaded.move_to_end(name)
+                stats["hits"] += 1
+                return db
+
+            started = time.perf_counter()
+            db = VectorDatabase(name=name, client=self.default_db.client, create=create)
+            stats["loads"] += 1
+            stats["last_load_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+            self._loaded[name] = db
+            self._memory[name] = db.estimate_memory_bytes()
+            self._evict_over_limit()
+            return db
+
+    def exists(self, name: str) -> bool:
+        """컬렉션 존재 여부 (로드하지 않고 확인)"""
+        with self._lock:
+            if name in self._loaded:
+                return True
+        return name in {c.name for c in self.default_db.client.list_collections()}
+
+    def refresh_memory(self, name: Optional[str] = None):
+        """쓰기 후 메모리 추정치를 갱신하고 상한을 넘으면 제거"""
+        name = name or self.default_db.name
+        with self._lock:
+            db = self._loaded.get(name)
+            if db is None:
+                return
+            self._memory[name] = db.estimate_memory_bytes()
+            self._evict_over_limit(keep=name)
+
+    def _evict_over_limit(self, keep: Optional[str] = None):
+        """추정 메모리가 상한 이하가 될 때까지 LRU 순서로 제거 (기본 컬렉션과 방금 사용한 컬렉션 제외)"""
+        keep = keep or next(reversed(self._loaded))
+        for name in list(self._loaded):
+            if sum(self._memory.values()) <= self.memory_limit_bytes:
+                break
+            if name in (self.default_db.name, keep):
+                continue
+            self._unload(name)
+
+    def _unload(self, name: str):
+        db = self._loaded.pop(name)
+        self._memory.pop(name, None)
+        # 진행 중인 검색/쓰기가 있으면 해당 컬렉션이 마지막 사용을 마칠 때 내려감
+        db.release()
+        self._stats_for(name)["evictions"] += 1
+        print(f"🧊 컬렉션 메모리에서 제거: {name}")
+
+    def _stats_for(self, name: str) -> Dict[str, Any]:
+        return self._stats.setdefault(name, {
+            "requests": 0, "hits": 0, "loads": 0, "evictions": 0,
+            "last_used": None, "last_load_ms": None
+        })
+
+    def list_collections(self) -> Dict[str, Any]:
+        """전체 컬렉션 목록과 컬렉션별 크기/적중 통계"""
+        with self._lock:
+            collections: List[Dict[str, Any]] = []
+            for collection in self.default_db.client.list_collections():
+                stats = dict(self._stats_for(collection.name))
+                stats["hit_rate"] = round(stats["hits"] / stats["requests"], 3) if stats["requests"] else 0.0
+                collections.append({
+                    "name": collection.name,
+                    "chunks": collection.count(),
+                    "loaded": collection.name in self._loaded,
+                    "estimated_memory_bytes": self._memory.get(collection.name),
+                    "default": collection.name == self.default_db.name,
+                    **stats
+                })
+            return {
+                "collections": collections,
+                "loaded": list(self._loaded),
+                "memory_used_bytes": sum(self._memory.values()),
+                "memory_limit_bytes": self.memory_limit_bytes
+            }
+
+
+# 전역 컬렉션 관리자 인스턴스
+collection_manager = CollectionManager(vector_db)
@@ -18,7 +18,28 @@ class Settings(BaseSettings):
     google_api_key: str
     
     # 벡터 데이터베이스 설정
+    default_collection: str = "developer_docs"
+    collection_memory_limit_mb: int = 1024  # 로드된 컬렉션 인덱스의 메모리 상한 (초과 시 LRU 제거)
+    collection_documents_dir: str = "./collections"  # 기본 외 컬렉션의 문서 디렉토리 (<경로>/<컬렉션>)
+    chroma_mode: str = "local"  # local (디스크) | http (공유 Chroma 서버)
     chroma_persist_directory: str = "./chroma_db"
+    chroma_http_host: str = "localhost"
+    chroma_http_port: int = 8001
+    chroma_http_ssl: bool = False
+    chroma_http_auth_token: Optional[str] = None
+    chroma_http_pool_size: int = 20
+    chroma_http_timeout_seconds: float = 10.0
+    chroma_http_max_retries: int = 3
+    ingest_enabled: bool = True  # 읽기 전용 복제본은 false
+    embedding_quantization: str = "none"  # none | int8 | binary
+    quantization_rescore_factor: int = 4
+    snapshot_bootstrap_path: Optional[str] = None  # 컬렉션이 비어 있으면 시작 시 적재
+    
+    # HNSW 인덱스 설정 (space/M/construction_ef는 컬렉션 생성 시에만 적용)
+    hnsw_space: str = "l2"  # l2 | cosine | ip
+    hnsw_m: int = 16
+    hnsw_construction_ef: int = 100
+    hnsw_search_ef: int = 10
     
     # 서버 설정
     host: str = "0.0.0.0"
@@ -28,6 +49,66 @@ class Settings(BaseSettings):
     documents_dir: str = "./documents"
     max_chunk_size: int = 800
     chunk_overlap: int = 150
+    pdf_max_extract_seconds: float = 300.0  # PDF 파일당 추출 시간 상한 (0이면 제한 없음)
+    pdf_ingest_batch_chunks: int = 256  # PDF 스트리밍 색인 시 임베딩/저장 배치당 청크 수
+    pdf_page_state_path: str = "./logs/pdf_page_state.json"  # 텍스트가 없는 PDF 페이지의 내용 해시 (재추출 방지)
+    
+    # 임베딩 백엔드 설정 (torch | onnx, onnx는 benchmark_embeddings.py --export로 만든 모델 사용)
+    embedding_backend: str = "torch"
+    onnx_model_path: str = "./models/all-MiniLM-L6-v2-onnx"
+    onnx_model_file: str = "model.onnx"  # int8 양자화 모델은 model_int8.onnx
+    
+    # 요청 처리 스레드 풀 설정 (0이면 CPU 코어 수, 최대 8)
+    cpu_executor_workers: int = 0
+    
+    # 임베딩 워커 설정 (0이면 API 프로세스에서 직접 인코딩)
+    embedding_workers: int = 0
+    embedding_torch_threads: int = 1  # 워커당 torch 스레드 수
+    embedding_worker_batch_capacity: int = 256  # 워커 공유 메모리 버퍼 행 수
+    embedding_worker_timeout_seconds: float = 120.0  # 워커 대기/배치 인코딩 제한 시간 (0이면 무제한, 초과 시 워커 재시작)
+    
+    # Confluence 연동 설정 (사용자명이 없으면 API 토큰을 Bearer 토큰으로 사용)
+    confluence_base_url: Optional[str] = None  # 예: https://example.atlassian.net/wiki
+    confluence_username: Optional[str] = None
+    confluence_api_token: Optional[str] = None
+    confluence_spaces: str = ""  # 기본 동기화 대상 스페이스 키 (쉼표 구분)
+    confluence_max_workers: int = 8
+    confluence_rate_limit_per_second: float = 10.0
+    confluence_page_size: int = 50
+    confluence_state_path: str = "./logs/confluence_sync_state.json"
+    confluence_ingest_batch_chunks: int = 256  # 여러 페이지의 청크를 모아 한 번에 임베딩/저장할 청크 수
+    
+    # 업로드 설정
+    max_upload_size_mb: int = 50
+    max_upload_files: int = 20
+    max_upload_request_mb: int = 200  # 업로드 요청 본문 전체 (수신 중 초과하면 즉시 413)
+    upload_chunk_size: int = 1024 * 1024
+    max_snapshot_size_mb: int = 2048
+    
+    # 캐시 설정
+    embedding_cache_size: int = 1024
+    search_cache_size: int = 512
+    search_cache_ttl_seconds: float = 300.0
+    answer_cache_size: int = 256
+    answer_cache_ttl_seconds: float = 3600.0
+    
+    # 질의 로그 및 캐시 예열 설정
+    query_log_enabled: bool = True
+    query_log_path: str = "./logs/query_log.jsonl"
+    query_log_batch_size: int = 100
+    query_log_flush_interval_seconds: float = 1.0
+    query_log_queue_size: int = 10000
+    query_log_max_bytes: int = 50 * 1024 * 1024
+    cache_warm_file: str = "./logs/warm_queries.json"
+    cache_warm_limit: int = 50
+    cache_warm_on_startup: bool = True
+    cache_warm_answers: bool = False  # LLM 호출 비용 발생
+    
+    # 중복 제거 설정 (MinHash)
+    dedup_enabled: bool = True
+    dedup_similarity_threshold: float = 0.9
+    dedup_num_perm: int = 64
+    dedup_shingle_size: int = 5
     
     class Config:
         env_file = ".env"
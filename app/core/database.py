@@ -1,41 +1,339 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
 import chromadb
+import numpy as np
 from chromadb.config import Settings as ChromaSettings
+from chromadb.types import SegmentScope
 from app.core.config import settings
-from typing import List, Dict, Any, Optional
+from app.core.http_pool import CHROMA_IDEMPOTENT_POST_PATHS, configure_pooled_session
+from app.core.quantization import QuantizedVectorIndex
+from typing import List, Dict, Any, Optional, Iterator
+
+
+# Chroma 기본 HNSW 파라미터 (메타데이터 없이 만든 기존 컬렉션에 적용된 값)
+# 컬렉션 생성 후에는 값을 바꿔도 기존 인덱스에 반영되지 않음
+CHROMA_HNSW_DEFAULTS = {"hnsw:space": "l2", "hnsw:M": 16, "hnsw:construction_ef": 100, "hnsw:search_ef": 10}
+
+
+# 유사 중복 병합 청크의 출처 기록 (dedup_service 참고)
+# sources: 출처별 메타데이터 목록(JSON), src_<파일 경로 해시>: 출처 파일별 조회 키,
+# flt_<필드=값 해시>: 출처별 검색 필터 키 (대표 출처가 아닌 출처로도 필터가 일치하도록)
+SOURCES_KEY = "sources"
+SOURCE_KEY_PREFIX = "src_"
+FILTER_KEY_PREFIX = "flt_"
+# 출처 메타데이터가 아닌 병합/중복 탐지용 키
+MERGE_KEYS = (SOURCES_KEY, "duplicate_count", "minhash")
+MERGE_KEY_PREFIXES = (SOURCE_KEY_PREFIX, FILTER_KEY_PREFIX, "lsh_")
+# 검색 필터 대상 메타데이터 (dir_<깊이> 키 포함)
+FILTER_FIELDS = ("source_file", "file_extension")
+
+
+def source_key(file_path: str) -> str:
+    """출처 파일별 조회용 메타데이터 키"""
+    return SOURCE_KEY_PREFIX + hashlib.sha1(file_path.encode("utf-8")).hexdigest()[:16]
+
+
+def filter_key(field: str, value: Any) -> str:
+    """출처별 검색 필터용 메타데이터 키"""
+    return FILTER_KEY_PREFIX + hashlib.sha1(f"{field}={value}".encode("utf-8")).hexdigest()[:16]
+
+
+def filter_condition(field: str, value: Any) -> Dict[str, Any]:
+    """병합 청크의 모든 출처와 일치하는 where 조건 (대표 출처 값 또는 출처별 필터 키)"""
+    return {"$or": [{field: value}, {filter_key(field, value): True}]}
+
+
+def source_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """병합/중복 탐지용 키를 뺀 출처 메타데이터"""
+    return {
+        key: value for key, value in (metadata or {}).items()
+        if key not in MERGE_KEYS and not key.startswith(MERGE_KEY_PREFIXES)
+    }
+
+
+def chunk_sources(metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """청크가 대표하는 출처별 메타데이터 목록 (병합되지 않은 청크는 자기 자신 하나)"""
+    raw = (metadata or {}).get(SOURCES_KEY)
+    if raw:
+        try:
+            entries = json.loads(raw)
+            if entries and all(isinstance(e, dict) and "file_path" in e for e in entries):
+                return entries
+        except ValueError:
+            pass
+    return [source_metadata(metadata)]
+
+
+def merged_metadata(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """출처 목록으로 대표 청크 메타데이터 구성 (첫 출처가 대표)"""
+    metadata = dict(entries[0])
+    if len(entries) > 1:
+        metadata[SOURCES_KEY] = json.dumps(entries, ensure_ascii=False)
+        metadata["duplicate_count"] = len(entries) - 1
+        for entry in entries:
+            metadata[source_key(entry.get("file_path", ""))] = True
+            for field, value in entry.items():
+                if field in FILTER_FIELDS or field.startswith("dir_"):
+                    metadata[filter_key(field, value)] = True
+    return metadata
+
+
+# release()가 직접 고치는 Chroma 로컬 세그먼트 관리자의 내부 속성
+# Chroma 0.4.x는 한 번 로드한 세그먼트(HNSW 인덱스 등)를 내리는 공개 API가 없어 내부 상태를 수정하므로
+# requirements.txt에서 chromadb==0.4.18로 고정하고, 클라이언트마다 처음 한 번 형태를 확인해 다르면 release를 끔
+# (컬렉션 메모리 상한이 동작하지 않을 뿐 검색/쓰기에는 영향 없음)
+SEGMENT_MANAGER_ATTRIBUTES = ("_segment_cache", "_instances", "_lock", "_vector_instances_file_handle_cache")
+SEGMENT_MANAGER_CHROMA_VERSION = "0.4.18"
+
+# 컬렉션(id)별 세그먼트 사용 수와 미뤄진 release (같은 컬렉션을 연 모든 VectorDatabase가 공유)
+_segment_usage_lock = threading.Lock()
+_segment_usage: Dict[Any, Dict[str, Any]] = {}
+
+
+@functools.lru_cache(maxsize=None)
+def segment_manager(client: chromadb.ClientAPI) -> Optional[Any]:
+    """release()에 사용할 로컬 Chroma 세그먼트 관리자 (내부 형태가 예상과 다르면 None)"""
+    manager = getattr(getattr(client, "_server", None), "_manager", None)
+    missing = [name for name in SEGMENT_MANAGER_ATTRIBUTES if not hasattr(manager, name)]
+    if manager is None or missing:
+        print(f"⚠️ Chroma {chromadb.__version__}의 세그먼트 관리자 형태가 달라 컬렉션을 메모리에서 내리지 않습니다. "
+              f"(chromadb=={SEGMENT_MANAGER_CHROMA_VERSION} 필요, 누락: {', '.join(missing) or '_manager'})")
+        return None
+    if chromadb.__version__ != SEGMENT_MANAGER_CHROMA_VERSION:
+        print(f"⚠️ 검증되지 않은 Chroma 버전입니다: {chromadb.__version__} "
+              f"(세그먼트 해제는 {SEGMENT_MANAGER_CHROMA_VERSION} 기준)")
+    return manager
+
+
+class CollectionNotFoundError(ValueError):
+    """존재하지 않는 컬렉션 요청"""
+
+
+def hnsw_metadata() -> Dict[str, Any]:
+    """설정의 HNSW 파라미터를 Chroma 컬렉션 메타데이터 형식으로 변환"""
+    return {
+        "hnsw:space": settings.hnsw_space,
+        "hnsw:M": settings.hnsw_m,
+        "hnsw:construction_ef": settings.hnsw_construction_ef,
+        "hnsw:search_ef": settings.hnsw_search_ef
+    }
 
 
 class VectorDatabase:
-    """벡터 데이터베이스 관리 클래스"""
+    """벡터 데이터베이스 관리 클래스 (컬렉션 하나 단위)"""
     
-    def __init__(self):
-        self.client: Optional[chromadb.PersistentClient] = None
+    def __init__(self, name: Optional[str] = None, client: Optional[chromadb.ClientAPI] = None, create: bool = True):
+        self.name = name or settings.default_collection
+        self.client: Optional[chromadb.ClientAPI] = client
         self.collection: Optional[chromadb.Collection] = None
-        self._initialize_database()
+        self.space = "l2"  # 컬렉션의 실제 거리 공간
+        self.quantized_index: Optional[QuantizedVectorIndex] = None
+        # 쓰기마다 증가 (검색 캐시 무효화용), 컬렉션을 다시 로드해도 이전 값과 겹치지 않도록 시각으로 시작
+        self.generation = time.time_ns()
+        self._dimension: Optional[int] = None
+        self._initialize_database(create)
     
-    def _initialize_database(self):
+    def _initialize_database(self, create: bool = True):
         """데이터베이스 초기화"""
         try:
-            # ChromaDB 클라이언트 생성
-            self.client = chromadb.PersistentClient(
+            # ChromaDB 클라이언트 생성 (다른 컬렉션과 공유하는 클라이언트가 없을 때만)
+            if self.client is None:
+                self.client = self._create_client()
+                if settings.chroma_mode == "local":
+                    # release()가 쓰는 Chroma 내부 속성을 시작 시 한 번 확인
+                    segment_manager(self.client)
+            
+            # 컬렉션 생성 또는 가져오기
+            self.collection = self._open_collection(create)
+            
+            print(f"✅ 벡터 데이터베이스 초기화 완료: {self._location()} ({self.name})")
+            
+            self._initialize_quantized_index()
+            
+        except CollectionNotFoundError:
+            raise
+        except Exception as e:
+            print(f"❌ 벡터 데이터베이스 초기화 실패: {e}")
+            raise
+    
+    def _create_client(self):
+        """설정에 따라 로컬(PersistentClient) 또는 원격(HttpClient) 클라이언트 생성"""
+        if settings.chroma_mode == "local":
+            return chromadb.PersistentClient(
                 path=settings.chroma_persist_directory,
                 settings=ChromaSettings(
                     anonymized_telemetry=False
                 )
             )
-            
-            # 컬렉션 생성 또는 가져오기
-            self.collection = self.client.get_or_create_collection(
-                name="developer_docs",
-                metadata={"description": "개발자 문서 벡터 저장소"}
+        
+        if settings.chroma_mode != "http":
+            raise ValueError(f"지원하지 않는 ChromaDB 모드입니다: {settings.chroma_mode}")
+        
+        headers = None
+        if settings.chroma_http_auth_token:
+            headers = {"Authorization": f"Bearer {settings.chroma_http_auth_token}"}
+        
+        # 클라이언트 생성 시점에 서버에 접속하므로 연결 실패는 직접 재시도
+        for attempt in range(settings.chroma_http_max_retries + 1):
+            try:
+                client = chromadb.HttpClient(
+                    host=settings.chroma_http_host,
+                    port=str(settings.chroma_http_port),
+                    ssl=settings.chroma_http_ssl,
+                    headers=headers,
+                    settings=ChromaSettings(anonymized_telemetry=False)
+                )
+                break
+            except Exception as e:
+                if attempt >= settings.chroma_http_max_retries:
+                    raise
+                delay = 0.5 * (2 ** attempt)
+                print(f"⚠️ ChromaDB 서버 연결 실패, {delay}초 후 재시도: {e}")
+                time.sleep(delay)
+        
+        # Chroma 내부 requests 세션에 연결 풀/재시도/타임아웃 적용
+        server = getattr(client, "_server", None)
+        session = getattr(server, "_session", None)
+        if session is not None:
+            configure_pooled_session(
+                session,
+                pool_size=settings.chroma_http_pool_size,
+                max_retries=settings.chroma_http_max_retries,
+                timeout_seconds=settings.chroma_http_timeout_seconds,
+                retry_post_paths=CHROMA_IDEMPOTENT_POST_PATHS
             )
-            
-            print(f"✅ 벡터 데이터베이스 초기화 완료: {settings.chroma_persist_directory}")
-            
+        else:
+            print("⚠️ ChromaDB HTTP 세션을 찾을 수 없어 기본 연결 설정을 사용합니다.")
+        
+        client.heartbeat()
+        return client
+    
+    def _open_collection(self, create: bool = True) -> chromadb.Collection:
+        """컬렉션을 열고, 없으면 설정된 HNSW 파라미터로 생성"""
+        existing = {c.name for c in self.client.list_collections()}
+        if self.name in existing:
+            collection = self.client.get_collection(name=self.name)
+        elif not create:
+            raise CollectionNotFoundError(f"컬렉션이 존재하지 않습니다: {self.name}")
+        else:
+            description = "개발자 문서 벡터 저장소" if self.name == settings.default_collection else f"{self.name} 문서 벡터 저장소"
+            collection = self.client.create_collection(
+                name=self.name,
+                metadata={"description": description, **hnsw_metadata()}
+            )
+            print(f"🧭 HNSW 인덱스 생성: {hnsw_metadata()}")
+        
+        # 기존 컬렉션은 생성 당시 파라미터를 유지하므로 설정과 다르면 알림만 출력
+        current = self._effective_hnsw(collection)
+        changed = {
+            key: (current[key], value)
+            for key, value in hnsw_metadata().items()
+            if current[key] != value
+        }
+        if changed:
+            print(f"⚠️ HNSW 설정이 기존 컬렉션과 다릅니다 (기존, 설정): {changed}")
+            print("   적용하려면 스냅샷을 내보낸 뒤 --replace로 다시 가져오세요.")
+        
+        self.space = current["hnsw:space"]
+        return collection
+    
+    @staticmethod
+    def _effective_hnsw(collection: chromadb.Collection) -> Dict[str, Any]:
+        """컬렉션에 실제로 적용된 HNSW 파라미터"""
+        metadata = collection.metadata or {}
+        return {key: metadata.get(key, default) for key, default in CHROMA_HNSW_DEFAULTS.items()}
+    
+    def recreate_collection(self):
+        """컬렉션을 삭제하고 현재 HNSW 설정으로 다시 생성 (모든 청크 삭제)"""
+        try:
+            self.client.delete_collection(name=self.name)
+            self.collection = self._open_collection()
+            if self.quantized_index is not None:
+                self.quantized_index.clear()
+            self.generation += 1
+            print(f"✅ 컬렉션을 현재 HNSW 설정으로 다시 생성했습니다: {hnsw_metadata()}")
         except Exception as e:
-            print(f"❌ 벡터 데이터베이스 초기화 실패: {e}")
+            print(f"❌ 컬렉션 재생성 실패: {e}")
             raise
     
-    def add_documents(self, documents: List[str], embeddings: List[List[float]], metadatas: Optional[List[Dict[str, Any]]] = None):
+    def _location(self) -> str:
+        """로그 출력용 데이터베이스 위치"""
+        if settings.chroma_mode == "http":
+            scheme = "https" if settings.chroma_http_ssl else "http"
+            return f"{scheme}://{settings.chroma_http_host}:{settings.chroma_http_port}"
+        return settings.chroma_persist_directory
+    
+    def _initialize_quantized_index(self):
+        """양자화 1차 검색 인덱스 초기화 (컬렉션과 개수가 다르면 재구성)"""
+        if settings.embedding_quantization == "none":
+            return
+        if settings.chroma_mode == "http":
+            # 로컬 양자화 인덱스는 다른 복제본의 쓰기를 반영할 수 없음
+            print("⚠️ 원격 ChromaDB 모드에서는 양자화 인덱스를 사용하지 않습니다.")
+            return
+        
+        # 기본 컬렉션은 기존 경로를 유지하고, 다른 컬렉션은 이름별 형제 디렉토리 사용
+        # (한 컬렉션의 인덱스 파일 정리가 다른 컬렉션 디렉토리에 닿지 않도록 중첩하지 않음)
+        directory = os.path.join(settings.chroma_persist_directory, "quantized")
+        if self.name != settings.default_collection:
+            legacy_directory = os.path.join(directory, self.name)
+            directory = os.path.join(settings.chroma_persist_directory, f"quantized_{self.name}")
+            if os.path.isdir(legacy_directory) and not os.path.exists(directory):
+                # 이전 버전의 기본 컬렉션 하위 디렉토리에서 이동
+                os.replace(legacy_directory, directory)
+        self.quantized_index = QuantizedVectorIndex(
+            directory=directory,
+            mode=settings.embedding_quantization,
+            rescore_factor=settings.quantization_rescore_factor
+        )
+        if self.quantized_index.count != self.collection.count():
+            self.rebuild_quantized_index()
+        
+        stats = self.quantized_index.get_stats()
+        print(f"✅ 양자화 인덱스 준비 완료 ({stats['mode']}, {stats['vectors']}개 벡터, {stats['in_memory_bytes']} bytes)")
+    
+    def rebuild_quantized_index(self, batch_size: int = 1000):
+        """컬렉션에 저장된 임베딩으로 양자화 인덱스 재구성"""
+        if self.quantized_index is None:
+            return
+        
+        print("🔄 양자화 인덱스 재구성 중...")
+        self.quantized_index.clear()
+        for batch in self.iter_records(include=["embeddings"], batch_size=batch_size):
+            self.quantized_index.add(batch["ids"], batch["embeddings"])
+    
+    def iter_records(self, include: Optional[List[str]] = None, batch_size: int = 1000,
+                     where: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """컬렉션 전체를 페이지 단위로 조회 (임베딩은 float32 행렬로 반환)
+
+        Chroma의 offset은 앞선 레코드를 모두 다시 읽고 버리므로 offset 페이지 조회는 전체 O(N²)입니다.
+        ID 목록만 한 번 조회한 뒤 ID 묶음 단위로 가져옵니다.
+        """
+        if self.collection is None:
+            raise Exception("컬렉션이 초기화되지 않았습니다.")
+        
+        with self._using_segments():
+            ids = self.collection.get(where=where, include=[])["ids"]
+            for start in range(0, len(ids), batch_size):
+                batch = self.collection.get(
+                    ids=ids[start:start + batch_size],
+                    include=include if include is not None else ["documents", "metadatas"]
+                )
+                if not batch or not batch["ids"]:
+                    continue
+                if batch.get("embeddings") is not None:
+                    batch["embeddings"] = np.asarray(batch["embeddings"], dtype=np.float32)
+                yield batch
+            if include and "embeddings" in include:
+                # 임베딩 조회로 로드된 HNSW 세그먼트 (양자화 검색 시 불필요, 순회가 끝나면 내림)
+                self._release_float_vectors()
+    
+    def add_documents(self, documents: List[str], embeddings: np.ndarray, metadatas: Optional[List[Dict[str, Any]]] = None):
         """문서를 벡터 데이터베이스에 추가"""
         try:
             if self.collection is None:
@@ -44,40 +342,362 @@ class VectorDatabase:
             if metadatas is None:
                 metadatas = [{} for _ in documents]
             
-            # 고유 ID 생성
-            ids = [f"doc_{i}_{hash(doc[:100])}" for i, doc in enumerate(documents)]
+            # 파일 경로/청크 위치/내용 기반의 결정적 ID (재업로드 시 덮어쓰기)
+            ids = [self._make_id(doc, meta) for doc, meta in zip(documents, metadatas)]
+            
+            self.upsert_records(ids, documents, embeddings, metadatas)
+            
+            print(f"✅ {len(documents)}개 문서가 벡터 데이터베이스에 추가되었습니다.")
             
-            self.collection.add(
+        except Exception as e:
+            print(f"❌ 문서 추가 실패: {e}")
+            raise
+    
+    def upsert_records(self, ids: List[str], documents: List[str], embeddings: np.ndarray, metadatas: List[Dict[str, Any]]):
+        """ID가 지정된 레코드를 그대로 저장 (스냅샷 가져오기 등)"""
+        if self.collection is None:
+            raise Exception("컬렉션이 초기화되지 않았습니다.")
+        
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        with self._using_segments():
+            self.collection.upsert(
                 documents=documents,
-                embeddings=embeddings,
+                embeddings=self._to_chroma_embeddings(embeddings),
                 metadatas=metadatas,
                 ids=ids
             )
+            if self.quantized_index is not None:
+                self.quantized_index.add(ids, embeddings)
+                self._release_float_vectors()
+        if len(embeddings):
+            self._dimension = embeddings.shape[1]
+        self.generation += 1
+    
+    def delete_by_file(self, file_path: str, page: Optional[int] = None, from_page: Optional[int] = None) -> int:
+        """특정 파일에서 생성된 청크 제거 (page/from_page로 페이지 범위 제한, 제거된 청크 수 반환)
+
+        다른 파일과 병합된 청크는 삭제하지 않고 이 파일만 출처에서 빼고, 남은 출처를 대표로 바꿉니다.
+        """
+        try:
+            with self._using_segments():
+                removed_ids, updated_ids, updated_metadatas = [], [], []
+                for chunk_id, metadata in self._chunks_from_file(file_path):
+                    entries = chunk_sources(metadata)
+                    remaining = [
+                        entry for entry in entries
+                        if not self._is_file_source(entry, file_path, page, from_page)
+                    ]
+                    if len(remaining) == len(entries):
+                        continue
+                    if remaining:
+                        # 중복 탐지 키(시그니처)는 내용이 같으므로 유지
+                        updated = merged_metadata(remaining)
+                        updated.update({
+                            key: value for key, value in metadata.items()
+                            if key == "minhash" or key.startswith("lsh_")
+                        })
+                        updated_ids.append(chunk_id)
+                        updated_metadatas.append(updated)
+                    else:
+                        removed_ids.append(chunk_id)
+                
+                if removed_ids:
+                    self.collection.delete(ids=removed_ids)
+                    if self.quantized_index is not None:
+                        self.quantized_index.remove(removed_ids)
+                        self._release_float_vectors()
+                if updated_ids:
+                    # Chroma update는 메타데이터 키를 병합만 하므로(키 삭제 불가) 대표가 바뀐 청크는 다시 저장
+                    stored = self.collection.get(ids=updated_ids, include=["documents", "embeddings"])
+                    by_id = dict(zip(stored["ids"], zip(stored["documents"], stored["embeddings"])))
+                    self.collection.delete(ids=updated_ids)
+                    self.upsert_records(
+                        updated_ids,
+                        [by_id[chunk_id][0] for chunk_id in updated_ids],
+                        np.asarray([by_id[chunk_id][1] for chunk_id in updated_ids], dtype=np.float32),
+                        updated_metadatas
+                    )
+                
+                removed = len(removed_ids) + len(updated_ids)
+                if removed:
+                    self.generation += 1
+                    if page is None and from_page is None:
+                        print(f"🗑️ {file_path}: 기존 청크 {len(removed_ids)}개 삭제, 병합 청크 {len(updated_ids)}개에서 출처 제거")
+                return removed
             
-            print(f"✅ {len(documents)}개 문서가 벡터 데이터베이스에 추가되었습니다.")
+        except Exception as e:
+            print(f"❌ 청크 삭제 실패: {e}")
+            raise
+    
+    def attach_sources(self, matches: Dict[str, List[Dict[str, Any]]]) -> int:
+        """저장된 청크에 중복으로 판정된 새 출처 추가 ({청크 ID: 출처 메타데이터 목록}, 갱신된 청크 수 반환)"""
+        try:
+            with self._using_segments():
+                if self.collection is None:
+                    raise Exception("컬렉션이 초기화되지 않았습니다.")
+                if not matches:
+                    return 0
+                
+                stored = self.collection.get(ids=list(matches), include=["metadatas"])
+                updated_ids, updated_metadatas = [], []
+                for chunk_id, metadata in zip(stored["ids"], stored["metadatas"]):
+                    entries = chunk_sources(metadata)
+                    known = len(entries)
+                    for entry in matches[chunk_id]:
+                        # 같은 출처를 다시 올린 경우 중복 기록하지 않음
+                        if entry not in entries:
+                            entries.append(entry)
+                    if len(entries) > known:
+                        # 대표(첫 출처)는 그대로이므로 병합 키만 추가/갱신
+                        updated_ids.append(chunk_id)
+                        updated_metadatas.append(merged_metadata(entries))
+                
+                if updated_ids:
+                    self.collection.update(ids=updated_ids, metadatas=updated_metadatas)
+                    self.generation += 1
+                return len(updated_ids)
             
         except Exception as e:
-            print(f"❌ 문서 추가 실패: {e}")
+            print(f"❌ 청크 출처 추가 실패: {e}")
             raise
     
-    def search(self, query_embedding: List[float], n_results: int = 5):
-        """유사한 문서 검색"""
+    def _chunks_from_file(self, file_path: str) -> List[tuple]:
+        """파일이 대표이거나 병합 출처로 포함된 청크의 (ID, 메타데이터) 목록"""
+        if self.collection is None:
+            raise Exception("컬렉션이 초기화되지 않았습니다.")
+        existing = self.collection.get(
+            where={"$or": [{"file_path": file_path}, {source_key(file_path): True}]},
+            include=["metadatas"]
+        )
+        return list(zip(existing.get("ids") or [], existing.get("metadatas") or []))
+    
+    @staticmethod
+    def _is_file_source(entry: Dict[str, Any], file_path: str, page: Optional[int] = None,
+                        from_page: Optional[int] = None) -> bool:
+        """출처 메타데이터가 파일(과 페이지 범위)에 해당하는지"""
+        if entry.get("file_path") != file_path:
+            return False
+        entry_page = entry.get("page")
+        if page is not None and entry_page != page:
+            return False
+        if from_page is not None and not (isinstance(entry_page, int) and entry_page >= from_page):
+            return False
+        return True
+    
+    def delete_where(self, where: Dict[str, Any]) -> int:
+        """메타데이터 조건에 맞는 청크 삭제 (삭제된 청크 수 반환)"""
         try:
-            if self.collection is None:
-                raise Exception("컬렉션이 초기화되지 않았습니다.")
+            with self._using_segments():
+                if self.collection is None:
+                    raise Exception("컬렉션이 초기화되지 않았습니다.")
                 
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                include=["documents", "metadatas", "distances"]
-            )
+                existing = self.collection.get(where=where, include=[])
+                ids = existing.get("ids", []) if existing else []
+                if ids:
+                    self.collection.delete(ids=ids)
+                    if self.quantized_index is not None:
+                        self.quantized_index.remove(ids)
+                        self._release_float_vectors()
+                    self.generation += 1
+                return len(ids)
+            
+        except Exception as e:
+            print(f"❌ 청크 삭제 실패: {e}")
+            raise
+    
+    def get_page_hashes(self, file_path: str) -> Dict[int, Optional[str]]:
+        """파일의 페이지별 내용 해시 (페이지 단위로 색인되지 않은 청크가 있으면 None 값)"""
+        try:
+            with self._using_segments():
+                hashes: Dict[int, Optional[str]] = {}
+                for _, metadata in self._chunks_from_file(file_path):
+                    for entry in chunk_sources(metadata):
+                        if entry.get("file_path") != file_path:
+                            continue
+                        page = entry.get("page")
+                        page = page if isinstance(page, int) else -1
+                        hashes[page] = entry.get("page_hash")
+                return hashes
             
-            return results
+        except Exception as e:
+            print(f"❌ 페이지 해시 조회 실패: {e}")
+            raise
+    
+    def get_records(self, where: Dict[str, Any], include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """메타데이터 조건에 맞는 레코드 조회"""
+        if self.collection is None:
+            raise Exception("컬렉션이 초기화되지 않았습니다.")
+        with self._using_segments():
+            return self.collection.get(where=where, include=include if include is not None else ["metadatas"])
+    
+    @staticmethod
+    def _make_id(document: str, metadata: Dict[str, Any]) -> str:
+        """청크의 결정적 ID 생성"""
+        key = f"{metadata.get('file_path', '')}|{metadata.get('chunk_index', '')}|{document}"
+        if "page" in metadata:
+            # 페이지 단위 색인은 chunk_index가 페이지마다 다시 시작
+            key = f"{metadata['page']}|{key}"
+        return "doc_" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _to_chroma_embeddings(embeddings: np.ndarray) -> List[List[float]]:
+        """Chroma 클라이언트 경계에서만 리스트로 변환 (Chroma 0.4는 리스트 임베딩만 허용)"""
+        return np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1).tolist()
+    
+    def search(self, query_embedding: np.ndarray, n_results: int = 5, where: Optional[Dict[str, Any]] = None):
+        """유사한 문서 검색 (where 절은 인덱스 내부에서 후보를 제한)"""
+        try:
+            with self._using_segments():
+                if self.collection is None:
+                    raise Exception("컬렉션이 초기화되지 않았습니다.")
+                
+                # 양자화 인덱스가 있으면 HNSW 대신 1차 검색 후 재채점 (필터는 메타데이터 DB에서 후보 ID로 변환)
+                if self.quantized_index is not None:
+                    return self._quantized_search(query_embedding, n_results, where)
+                
+                results = self.collection.query(
+                    query_embeddings=self._to_chroma_embeddings(np.asarray(query_embedding).reshape(1, -1)),
+                    n_results=n_results,
+                    where=where or None,
+                    include=["documents", "metadatas", "distances"]
+                )
+                
+                return results
             
         except Exception as e:
             print(f"❌ 검색 실패: {e}")
             raise
     
+    def _quantized_search(self, query_embedding: np.ndarray, n_results: int,
+                          where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """양자화 인덱스 검색 결과를 Chroma query 결과 형식으로 변환"""
+        allowed_ids = self.collection.get(where=where, include=[])["ids"] if where else None
+        ids, similarities = self.quantized_index.search(query_embedding, n_results, allowed_ids=allowed_ids)
+        if not ids:
+            return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+        
+        # 문서/메타데이터만 ID로 조회 (HNSW 벡터 인덱스는 사용하지 않음)
+        stored = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        by_id = {
+            doc_id: (doc, meta)
+            for doc_id, doc, meta in zip(stored["ids"], stored["documents"], stored["metadatas"])
+        }
+        
+        result_ids, documents, metadatas, distances = [], [], [], []
+        for doc_id, similarity in zip(ids, similarities):
+            if doc_id not in by_id:
+                continue
+            doc, meta = by_id[doc_id]
+            result_ids.append(doc_id)
+            documents.append(doc)
+            metadatas.append(meta)
+            distances.append(self._similarity_to_distance(similarity))
+        
+        return {
+            "ids": [result_ids],
+            "documents": [documents],
+            "metadatas": [metadatas],
+            "distances": [distances]
+        }
+    
+    def estimate_memory_bytes(self) -> int:
+        """로드된 인덱스의 메모리 사용량 추정 (HNSW 벡터 + 링크, 또는 양자화 코드)"""
+        if self.quantized_index is not None:
+            # 검색은 양자화 인덱스만 사용하고 HNSW 세그먼트는 쓰기 후 내리므로 상주하지 않음
+            return self.quantized_index.get_stats()["in_memory_bytes"]
+        count = self.collection.count()
+        if count and self._dimension is None:
+            self._dimension = self._stored_dimension()
+        m = self._effective_hnsw(self.collection)["hnsw:M"]
+        # hnswlib 0층: 벡터(float32) + 링크 2M개(int32) + 링크 수/라벨
+        return count * ((self._dimension or 0) * 4 + 2 * m * 4 + 12)
+    
+    def _stored_dimension(self) -> int:
+        """컬렉션에 기록된 임베딩 차원 (임베딩을 조회하면 로컬 모드에서 HNSW 세그먼트 전체가 로드되므로 sysdb에서 읽음)"""
+        sysdb = getattr(getattr(self.client, "_server", None), "_sysdb", None)
+        if sysdb is not None:
+            found = sysdb.get_collections(id=self.collection.id)
+            return (found[0]["dimension"] if found else None) or 0
+        # 원격 모드: 서버에서 임베딩 하나만 받아옴 (로컬 메모리에 인덱스를 올리지 않음)
+        sample = self.collection.get(limit=1, include=["embeddings"])
+        return len(sample["embeddings"][0]) if sample["embeddings"] else 0
+    
+    @contextmanager
+    def _using_segments(self):
+        """세그먼트 사용 구간 (검색/쓰기 중에 다른 스레드나 같은 컬렉션의 다른 핸들이 세그먼트를 내리지 않도록 사용 수를 셈)"""
+        collection_id = self.collection.id
+        with _segment_usage_lock:
+            usage = _segment_usage.setdefault(collection_id, {"users": 0, "pending": None})
+            usage["users"] += 1
+        try:
+            yield
+        finally:
+            with _segment_usage_lock:
+                usage["users"] -= 1
+                if usage["users"] == 0:
+                    del _segment_usage[collection_id]
+                    if usage["pending"] is not None:
+                        self._release_segments(collection_id, usage["pending"])
+    
+    def release(self, vectors_only: bool = False):
+        """메모리에 올라간 Chroma 세그먼트(HNSW 인덱스 등)를 내림 (다음 접근 시 디스크에서 다시 로드)
+
+        Chroma 0.4.x 로컬 모드는 한 번 로드한 세그먼트를 내리지 않으므로 세그먼트 관리자에서 직접 제거합니다.
+        (SEGMENT_MANAGER_ATTRIBUTES 참고, 관리자 형태가 다르면 아무것도 하지 않음)
+        vectors_only면 HNSW(벡터) 세그먼트만 내리고 메타데이터 세그먼트는 유지합니다.
+        같은 컬렉션에서 검색/쓰기가 진행 중이면 바로 내리지 않고 마지막 사용이 끝날 때 내립니다.
+        원격 모드에서는 서버가 메모리를 관리하므로 아무것도 하지 않습니다.
+        """
+        if settings.chroma_mode != "local" or self.collection is None:
+            return
+        collection_id = self.collection.id
+        with _segment_usage_lock:
+            usage = _segment_usage.get(collection_id)
+            if usage is not None:
+                # 미뤄진 요청 중 하나라도 전체 release면 전체를 내림
+                pending = usage["pending"]
+                usage["pending"] = vectors_only if pending is None else (pending and vectors_only)
+                return
+            self._release_segments(collection_id, vectors_only)
+    
+    def _release_segments(self, collection_id: Any, vectors_only: bool):
+        """세그먼트 관리자에서 컬렉션 세그먼트 제거 (_segment_usage_lock을 잡고 사용 중인 곳이 없을 때 호출)"""
+        manager = segment_manager(self.client)
+        if manager is None:
+            return
+        
+        with manager._lock:
+            cached = manager._segment_cache.get(collection_id, {})
+            scopes = [SegmentScope.VECTOR] if vectors_only else list(cached)
+            for scope in scopes:
+                segment = cached.pop(scope, None)
+                instance = manager._instances.pop(segment["id"], None) if segment else None
+                if instance is None:
+                    continue
+                # 마지막 저장 이후의 변경(최대 hnsw:sync_threshold개)은 다시 로드할 때 WAL에서 재생됨
+                if hasattr(instance, "close_persistent_index"):
+                    instance.close_persistent_index()
+                instance.stop()
+            if not cached:
+                manager._segment_cache.pop(collection_id, None)
+            manager._vector_instances_file_handle_cache.cache.pop(collection_id, None)
+    
+    def _release_float_vectors(self):
+        """양자화 인덱스로 검색할 때는 쓰기 후 float32 HNSW 세그먼트를 메모리에서 내림
+
+        Chroma는 쓰기 시 HNSW 인덱스를 전부 로드하므로, 내리지 않으면 양자화 코드와 float32 벡터가 함께 상주합니다.
+        """
+        if self.quantized_index is not None:
+            self.release(vectors_only=True)
+    
+    def _similarity_to_distance(self, similarity: float) -> float:
+        """코사인 유사도를 컬렉션 거리 공간의 척도로 변환 (정규화된 벡터 기준)"""
+        if self.space == "l2":
+            # 제곱 L2 거리
+            return max(0.0, float(2.0 - 2.0 * similarity))
+        # cosine, ip 모두 1 - 유사도
+        return float(1.0 - similarity)
+    
     def get_collection_info(self) -> Dict[str, Any]:
         """컬렉션 정보 조회"""
         try:
@@ -85,68 +705,70 @@ class VectorDatabase:
                 return {"error": "컬렉션이 초기화되지 않았습니다."}
                 
             count = self.collection.count()
-            return {
+            info = {
                 "total_documents": count,
-                "collection_name": self.collection.name
+                "collection_name": self.collection.name,
+                "hnsw": self._effective_hnsw(self.collection)
             }
+            if self.quantized_index is not None:
+                info["quantization"] = self.quantized_index.get_stats()
+            return info
         except Exception as e:
             print(f"❌ 컬렉션 정보 조회 실패: {e}")
             return {"error": str(e)}
     
-    def get_chunks_info(self) -> Dict[str, Any]:
-        """저장된 청크들의 상세 정보 조회"""
+    def get_chunks_info(self, limit: Optional[int] = 100, offset: int = 0, include_chunks: bool = True) -> Dict[str, Any]:
+        """저장된 청크들의 상세 정보 조회 (청크 목록은 limit/offset 페이지 단위)"""
         try:
-            if self.collection is None:
-                return {"error": "컬렉션이 초기화되지 않았습니다."}
+            with self._using_segments():
+                if self.collection is None:
+                    return {"error": "컬렉션이 초기화되지 않았습니다."}
+                
+                count = self.collection.count()
+                if count == 0:
+                    return {
+                        "total_chunks": 0,
+                        "chunks": [],
+                        "file_distribution": {}
+                    }
+                
+                # 파일별 분포 계산 (메타데이터만 페이지 단위로 조회)
+                file_distribution = {}
+                for batch in self.iter_records(include=["metadatas"]):
+                    for metadata in batch["metadatas"]:
+                        source_file = (metadata or {}).get('source_file', 'unknown')
+                        if source_file not in file_distribution:
+                            file_distribution[source_file] = 0
+                        file_distribution[source_file] += 1
+                
+                chunks = []
+                if include_chunks:
+                    results = self.collection.get(
+                        include=["documents", "metadatas"],
+                        limit=limit,
+                        offset=offset
+                    )
+                
+                    if results is None or 'documents' not in results:
+                        return {"error": "문서 조회 결과가 없습니다."}
+                
+                    for chunk_id, content, metadata in zip(results['ids'], results['documents'], results['metadatas']):
+                        # 청크 정보 구성
+                        chunks.append({
+                            "id": chunk_id,
+                            "content_preview": content[:100] + "..." if len(content) > 100 else content,
+                            "content_length": len(content),
+                            "metadata": metadata or {}
+                        })
                 
-            count = self.collection.count()
-            if count == 0:
                 return {
-                    "total_chunks": 0,
-                    "chunks": [],
-                    "file_distribution": {}
+                    "total_chunks": count,
+                    "chunks": chunks,
+                    "offset": offset,
+                    "limit": limit,
+                    "file_distribution": file_distribution
                 }
             
-            # 모든 문서 조회
-            results = self.collection.get(
-                include=["documents", "metadatas"]
-            )
-            
-            if results is None or 'documents' not in results:
-                return {"error": "문서 조회 결과가 없습니다."}
-            
-            chunks = []
-            file_distribution = {}
-            
-            documents = results['documents']
-            metadatas = results['metadatas']
-            ids = results['ids']
-            
-            for i in range(len(documents)):
-                content = documents[i]
-                metadata = metadatas[i] if i < len(metadatas) else {}
-                
-                # 파일별 분포 계산
-                source_file = metadata.get('source_file', 'unknown')
-                if source_file not in file_distribution:
-                    file_distribution[source_file] = 0
-                file_distribution[source_file] += 1
-                
-                # 청크 정보 구성
-                chunk_info = {
-                    "id": ids[i] if i < len(ids) else f"chunk_{i}",
-                    "content_preview": content[:100] + "..." if len(content) > 100 else content,
-                    "content_length": len(content),
-                    "metadata": metadata
-                }
-                chunks.append(chunk_info)
-            
-            return {
-                "total_chunks": count,
-                "chunks": chunks,
-                "file_distribution": file_distribution
-            }
-            
         except Exception as e:
             print(f"❌ 청크 정보 조회 실패: {e}")
             return {"error": str(e)}
@@ -154,13 +776,22 @@ class VectorDatabase:
     def clear_database(self):
         """벡터 데이터베이스 초기화"""
         try:
-            if self.collection is None:
-                return {"error": "컬렉션이 초기화되지 않았습니다."}
-            
-            # 모든 문서 삭제
-            self.collection.delete(where={"$and": []})
-            print("✅ 벡터 데이터베이스가 초기화되었습니다.")
-            return {"message": "벡터 데이터베이스가 초기화되었습니다."}
+            with self._using_segments():
+                if self.collection is None:
+                    return {"error": "컬렉션이 초기화되지 않았습니다."}
+                
+                # 모든 문서 삭제 (빈 $and 조건은 Chroma가 거부하므로 ID 단위로 삭제)
+                while True:
+                    batch = self.collection.get(include=[], limit=1000)
+                    if not batch or not batch["ids"]:
+                        break
+                    self.collection.delete(ids=batch["ids"])
+                if self.quantized_index is not None:
+                    self.quantized_index.clear()
+                    self._release_float_vectors()
+                self.generation += 1
+                print("✅ 벡터 데이터베이스가 초기화되었습니다.")
+                return {"message": "벡터 데이터베이스가 초기화되었습니다."}
             
         except Exception as e:
             print(f"❌ 데이터베이스 초기화 실패: {e}")
@@ -0,0 +1,27 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.core.config import settings
+
+
+def _default_workers() -> int:
+    """CPU_EXECUTOR_WORKERS 미설정(0) 시 코어 수 기준 (임베딩/HNSW 검색은 GIL을 놓고 실행)"""
+    return settings.cpu_executor_workers or min(8, os.cpu_count() or 2)
+
+
+# 임베딩 인코딩/벡터 검색 등 CPU 작업용 스레드 풀 (이벤트 루프에서 분리)
+cpu_executor = ThreadPoolExecutor(max_workers=_default_workers(), thread_name_prefix="cpu-worker")
+
+
+async def run_in_cpu_executor(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """동기 함수를 CPU 작업용 스레드 풀에서 실행하고 결과를 기다림"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, functools.partial(func, *args, **kwargs))
+
+
+def shutdown_cpu_executor():
+    """실행 중인 작업을 마친 뒤 스레드 풀 종료"""
+    cpu_executor.shutdown(wait=True)
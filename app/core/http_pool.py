@@ -0,0 +1,120 @@
+import threading
+import time
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+
+# 재시도할 일시적 서버 오류 상태 코드
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# 재시도해도 결과가 같은 Chroma HTTP API (POST 경로 끝부분)
+# add는 첫 요청이 서버에 반영된 뒤 응답만 실패하면 재시도 시 중복 ID 오류가 나므로 제외
+# (이 프로젝트의 쓰기는 모두 upsert 사용)
+CHROMA_IDEMPOTENT_POST_PATHS = ("/get", "/query", "/upsert", "/update", "/delete")
+
+
+class IdempotentRetry(Retry):
+    """멱등 요청만 재시도하는 Retry
+
+    GET/PUT/DELETE 등 멱등 메서드는 urllib3 기본 정책대로 재시도하고,
+    POST는 경로가 retry_post_paths 중 하나로 끝나는 멱등 API만 재시도합니다.
+    연결 단계 오류는 요청이 서버에 전달되지 않았으므로 모든 메서드를 재시도합니다.
+    """
+
+    def __init__(self, *args, retry_post_paths: Tuple[str, ...] = (), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_post_paths = tuple(retry_post_paths)
+
+    def new(self, **kwargs) -> "IdempotentRetry":
+        retry = super().new(**kwargs)
+        retry.retry_post_paths = self.retry_post_paths
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        sent = response is not None or (error is not None and not self._is_connection_error(error))
+        if sent and method and method.upper() == "POST" and not self._is_retryable_post(url):
+            # 서버가 이미 처리했을 수 있는 비멱등 요청 (예: Chroma add, 컬렉션 생성)
+            if error is not None:
+                raise error.with_traceback(_stacktrace)
+            raise MaxRetryError(_pool, url, ResponseError(f"재시도하지 않는 POST 요청: {url}"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+    def _is_method_retryable(self, method: str) -> bool:
+        # POST는 increment에서 경로로 판단
+        return method.upper() == "POST" or super()._is_method_retryable(method)
+
+    def _is_retryable_post(self, url: Optional[str]) -> bool:
+        path = urlparse(url or "").path.rstrip("/")
+        return any(path.endswith(suffix) for suffix in self.retry_post_paths)
+
+
+def configure_pooled_session(
+    session: Optional[requests.Session] = None,
+    pool_size: int = 10,
+    max_retries: int = 3,
+    timeout_seconds: float = 10.0,
+    backoff_factor: float = 0.3,
+    retry_post_paths: Tuple[str, ...] = ()
+) -> requests.Session:
+    """keep-alive 연결 풀, 재시도, 기본 타임아웃이 적용된 requests 세션 구성
+
+    기존 세션(예: 라이브러리가 내부에서 만든 세션)을 넘기면 헤더/인증 설정을 유지한 채
+    어댑터와 타임아웃만 교체합니다. POST는 retry_post_paths로 끝나는 경로만 재시도합니다.
+    """
+    if session is None:
+        session = requests.Session()
+
+    retry = IdempotentRetry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        raise_on_status=False,
+        retry_post_paths=retry_post_paths
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    # 호출부에서 timeout을 지정하지 않은 요청에 기본 타임아웃 적용
+    original_request = session.request
+
+    def request_with_timeout(method, url, **kwargs):
+        kwargs.setdefault("timeout", timeout_seconds)
+        return original_request(method, url, **kwargs)
+
+    session.request = request_with_timeout
+    return session
+
+
+class TokenBucket:
+    """스레드 안전 토큰 버킷 (초당 rate개, 최대 burst개까지 몰아서 허용)"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 하나를 얻을 때까지 대기 (rate가 0 이하이면 제한 없음)"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,350 @@
+import json
+import os
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+
+# 해밍 거리 계산용 바이트별 비트 수 테이블
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# 1차 검색 시 임시 행렬 크기를 제한하기 위한 블록 크기
+_SCAN_BLOCK_ROWS = 65536
+
+# int8 범위를 넘는 값이 들어와 재보정할 때 둘 여유 (재보정 빈도 감소)
+_RECALIBRATION_HEADROOM = 1.1
+
+# 세대별 인덱스 파일 이름 (<이름>.<세대>.<확장자>), 정리 시 이 파일들만 삭제
+INDEX_FILE_STEMS = ("vectors", "codes", "ids")
+
+
+class QuantizedVectorIndex:
+    """양자화 임베딩 1차 검색 + 원본 정밀도 재채점 인덱스
+
+    메모리에는 int8(차원당 1바이트) 또는 binary(차원당 1비트) 코드만 유지하고,
+    float32 원본 벡터는 디스크 파일에 두었다가 후보 재채점 시에만 읽습니다.
+
+    디스크에는 세대(generation)별 파일에 추가만 하고(원본 벡터, 코드, ID 로그),
+    압축/재보정 시에만 새 세대 파일을 쓴 뒤 meta.json을 교체합니다.
+    """
+
+    MODES = ("int8", "binary")
+
+    def __init__(self, directory: str, mode: str = "int8", rescore_factor: int = 4):
+        if mode not in self.MODES:
+            raise ValueError(f"지원하지 않는 양자화 방식입니다: {mode}")
+
+        self.directory = directory
+        self.mode = mode
+        self.rescore_factor = max(1, rescore_factor)
+
+        self.ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.codes: Optional[np.ndarray] = None
+        self.rows = np.empty(0, dtype=np.int64)
+        self.scale: Optional[np.ndarray] = None
+        self.dim: Optional[int] = None
+        self.stored_rows = 0
+        self.generation = 0
+
+        self._full_vectors: Optional[np.memmap] = None
+        self._lock = threading.RLock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    def add(self, ids: List[str], embeddings: Any):
+        """벡터 추가 (같은 ID가 있으면 교체)"""
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(ids) != len(vectors):
+            raise ValueError("ID 수와 임베딩 수가 일치하지 않습니다.")
+        if not len(ids):
+            return
+
+        with self._lock:
+            self.remove([i for i in ids if i in self.positions])
+
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self.scale = self._calibrate(vectors)
+                self._write_meta()
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"임베딩 차원이 다릅니다: {vectors.shape[1]} != {self.dim}")
+
+            # 원본 벡터와 코드는 각 파일 끝에 이어서 기록하고, ID 로그를 마지막에 기록 (로드 시 기준)
+            new_codes = self._quantize(vectors)
+            with open(self._path("vectors.f32"), "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._path("codes.bin"), "ab") as f:
+                f.write(new_codes.tobytes())
+            new_rows = np.arange(self.stored_rows, self.stored_rows + len(vectors), dtype=np.int64)
+            with open(self._path("ids.log"), "a", encoding="utf-8") as f:
+                f.writelines(f"+{row}\t{doc_id}\n" for row, doc_id in zip(new_rows, ids))
+            self.stored_rows += len(vectors)
+            self._full_vectors = None
+
+            self.codes = new_codes if self.codes is None else np.concatenate([self.codes, new_codes])
+            self.rows = np.concatenate([self.rows, new_rows])
+            for doc_id in ids:
+                self.positions[doc_id] = len(self.ids)
+                self.ids.append(doc_id)
+
+            overflow = np.abs(vectors).max(axis=0) * self.scale > 127.0 if self.mode == "int8" else None
+            if overflow is not None and overflow.any():
+                # 보정 범위를 넘는 차원은 잘리지 않도록 스케일을 넓히고 전체 코드를 다시 양자화
+                widened = self._calibrate(vectors) / _RECALIBRATION_HEADROOM
+                self.scale = np.where(overflow, widened, self.scale).astype(np.float32)
+                self._compact()
+
+    def remove(self, ids: List[str]):
+        """벡터 삭제 (디스크의 원본 행은 일정 비율 이상 쌓이면 압축)"""
+        with self._lock:
+            removed = [i for i in ids if i in self.positions]
+            if not removed:
+                return
+            drop = {self.positions[i] for i in removed}
+
+            keep = np.array([p for p in range(len(self.ids)) if p not in drop], dtype=np.int64)
+            self.ids = [self.ids[p] for p in keep]
+            self.positions = {doc_id: p for p, doc_id in enumerate(self.ids)}
+            self.codes = self.codes[keep] if self.codes is not None else None
+            self.rows = self.rows[keep]
+
+            if self.stored_rows > 2 * max(len(self.ids), 1):
+                self._compact()
+            else:
+                with open(self._path("ids.log"), "a", encoding="utf-8") as f:
+                    f.writelines(f"-\t{doc_id}\n" for doc_id in removed)
+
+    def clear(self):
+        """인덱스 전체 삭제"""
+        with self._lock:
+            self.ids = []
+            self.positions = {}
+            self.codes = None
+            self.rows = np.empty(0, dtype=np.int64)
+            self.scale = None
+            self.dim = None
+            self.stored_rows = 0
+            self._full_vectors = None
+            self._remove_files(keep_generation=None)
+            self.generation += 1
+
+    def search(self, query_embedding: Any, n_results: int = 5, rescore: bool = True,
+               allowed_ids: Optional[List[str]] = None) -> Tuple[List[str], np.ndarray]:
+        """양자화 코드로 후보를 고른 뒤 원본 벡터로 재채점 (ID, 코사인 유사도) 반환
+
+        allowed_ids를 주면 그 ID들 중에서만 검색합니다. (메타데이터 필터 결과)
+        """
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+
+        with self._lock:
+            subset = None
+            if allowed_ids is not None:
+                subset = np.array(sorted({self.positions[i] for i in allowed_ids if i in self.positions}), dtype=np.int64)
+            available = len(self.ids) if subset is None else len(subset)
+            if not available:
+                return [], np.empty(0, dtype=np.float32)
+
+            n_results = min(n_results, available)
+            shortlist = n_results * self.rescore_factor if rescore else n_results
+            candidates = self._first_pass(query, min(shortlist, available), subset)
+
+            if rescore:
+                full = self._read_full_vectors(self.rows[candidates])
+                scores = full @ query
+            else:
+                scores = self._approximate_scores(query, candidates)
+
+            order = np.argsort(-scores)[:n_results]
+            return [self.ids[candidates[i]] for i in order], scores[order]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """메모리/디스크 사용량 정보"""
+        with self._lock:
+            quantized_bytes = int(self.codes.nbytes) if self.codes is not None else 0
+            float_bytes = len(self.ids) * (self.dim or 0) * 4
+            return {
+                "mode": self.mode,
+                "vectors": len(self.ids),
+                "dimension": self.dim,
+                "rescore_factor": self.rescore_factor,
+                "in_memory_bytes": quantized_bytes,
+                "float32_equivalent_bytes": float_bytes,
+                "compression_ratio": round(float_bytes / quantized_bytes, 1) if quantized_bytes else None,
+                "on_disk_bytes": self.stored_rows * ((self.dim or 0) * 4 + self._code_width())
+            }
+
+    def _first_pass(self, query: np.ndarray, shortlist: int, subset: Optional[np.ndarray] = None) -> np.ndarray:
+        """양자화 코드 전체(또는 subset 위치)를 블록 단위로 스캔하여 상위 후보 위치 선택"""
+        total = len(self.ids) if subset is None else len(subset)
+        scores = np.empty(total, dtype=np.float32)
+        if self.mode == "int8":
+            scaled_query = query / self.scale
+        else:
+            query_bits = np.packbits(query > 0)
+
+        for start in range(0, total, _SCAN_BLOCK_ROWS):
+            if subset is None:
+                block = self.codes[start:start + _SCAN_BLOCK_ROWS]
+            else:
+                block = self.codes[subset[start:start + _SCAN_BLOCK_ROWS]]
+            if self.mode == "int8":
+                scores[start:start + len(block)] = block @ scaled_query
+            else:
+                # 해밍 거리가 작을수록 유사하므로 음수로 변환
+                scores[start:start + len(block)] = -_POPCOUNT[block ^ query_bits].sum(axis=1, dtype=np.int32)
+
+        if shortlist >= len(scores):
+            selected = np.arange(len(scores))
+        else:
+            selected = np.argpartition(-scores, shortlist - 1)[:shortlist]
+        return selected if subset is None else subset[selected]
+
+    def _approximate_scores(self, query: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        """재채점 없이 양자화 코드만으로 추정한 코사인 유사도"""
+        codes = self.codes[candidates]
+        if self.mode == "int8":
+            return (codes.astype(np.float32) / self.scale) @ query
+        hamming = _POPCOUNT[codes ^ np.packbits(query > 0)].sum(axis=1, dtype=np.int32)
+        return 1.0 - 2.0 * hamming / self.dim
+
+    def _quantize(self, vectors: np.ndarray) -> np.ndarray:
+        """float32 벡터를 양자화 코드로 변환"""
+        if self.mode == "int8":
+            return np.clip(np.rint(vectors * self.scale), -127, 127).astype(np.int8)
+        return np.packbits(vectors > 0, axis=1)
+
+    @staticmethod
+    def _calibrate(vectors: np.ndarray) -> np.ndarray:
+        """차원별 최대 절댓값으로 int8 스케일 계산 (범위를 넘는 값이 들어오면 add에서 재보정)"""
+        max_abs = np.abs(vectors).max(axis=0)
+        max_abs[max_abs == 0] = 1.0
+        return (127.0 / max_abs).astype(np.float32)
+
+    def _code_width(self) -> int:
+        """벡터 하나의 코드 바이트 수"""
+        if not self.dim:
+            return 0
+        return self.dim if self.mode == "int8" else (self.dim + 7) // 8
+
+    def _read_full_vectors(self, rows: np.ndarray) -> np.ndarray:
+        """디스크의 float32 원본 벡터 중 필요한 행만 읽기"""
+        if self._full_vectors is None:
+            self._full_vectors = np.memmap(
+                self._path("vectors.f32"), dtype=np.float32, mode="r",
+                shape=(self.stored_rows, self.dim)
+            )
+        return np.asarray(self._full_vectors[rows])
+
+    def _compact(self):
+        """살아있는 행만 새 세대 파일로 다시 쓰고(현재 스케일로 재양자화) meta.json을 교체"""
+        generation = self.generation + 1
+        codes = []
+        with open(self._path("vectors.f32", generation), "wb") as vectors_file:
+            for start in range(0, len(self.rows), _SCAN_BLOCK_ROWS):
+                block = self._read_full_vectors(self.rows[start:start + _SCAN_BLOCK_ROWS])
+                vectors_file.write(np.ascontiguousarray(block, dtype=np.float32).tobytes())
+                codes.append(self._quantize(block))
+        self.codes = np.concatenate(codes) if codes else None
+        with open(self._path("codes.bin", generation), "wb") as f:
+            if self.codes is not None:
+                f.write(self.codes.tobytes())
+        with open(self._path("ids.log", generation), "w", encoding="utf-8") as f:
+            f.writelines(f"+{row}\t{doc_id}\n" for row, doc_id in enumerate(self.ids))
+
+        self._full_vectors = None
+        self.rows = np.arange(len(self.ids), dtype=np.int64)
+        self.stored_rows = len(self.ids)
+        self.generation = generation
+        self._write_meta()
+        self._remove_files(keep_generation=generation)
+
+    def _write_meta(self):
+        """현재 세대와 스케일 정보를 원자적으로 기록"""
+        temp_path = self._path("meta.json.tmp", generation=None)
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "mode": self.mode,
+                "dim": self.dim,
+                "generation": self.generation,
+                "scale": self.scale.tolist() if self.scale is not None else None
+            }, f)
+        os.replace(temp_path, self._path("meta.json", generation=None))
+
+    def _load(self):
+        """디스크에 저장된 인덱스 로드 (방식이 다르거나 이전 형식이면 비워둠 → 컬렉션에서 재구성)"""
+        meta_path = self._path("meta.json", generation=None)
+        if not os.path.exists(meta_path):
+            self._remove_files(keep_generation=None)
+            return
+
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("mode") != self.mode or not meta.get("dim") or "generation" not in meta:
+            print(f"⚠️ 양자화 인덱스 형식/방식이 변경되어 다시 생성합니다: {meta.get('mode')} → {self.mode}")
+            self.clear()
+            return
+
+        self.generation = meta["generation"]
+        self.dim = meta["dim"]
+        self.scale = np.asarray(meta["scale"], dtype=np.float32) if meta.get("scale") is not None else None
+        self._remove_files(keep_generation=self.generation)
+
+        # 추가 도중 중단된 경우 세 파일 중 가장 짧은 길이까지만 사용
+        width = self._code_width()
+        vector_rows = self._file_size("vectors.f32") // (self.dim * 4)
+        code_rows = self._file_size("codes.bin") // width
+        self.stored_rows = min(vector_rows, code_rows)
+
+        positions: Dict[str, int] = {}
+        if os.path.exists(self._path("ids.log")):
+            with open(self._path("ids.log"), encoding="utf-8") as f:
+                for line in f:
+                    op, _, doc_id = line.rstrip("\n").partition("\t")
+                    if op == "-":
+                        positions.pop(doc_id, None)
+                    elif op.startswith("+") and doc_id and int(op[1:]) < self.stored_rows:
+                        positions[doc_id] = int(op[1:])
+
+        self.ids = list(positions)
+        self.positions = {doc_id: p for p, doc_id in enumerate(self.ids)}
+        self.rows = np.array([positions[doc_id] for doc_id in self.ids], dtype=np.int64)
+        if self.ids:
+            stored_codes = np.memmap(
+                self._path("codes.bin"), dtype=np.int8 if self.mode == "int8" else np.uint8, mode="r",
+                shape=(self.stored_rows, width)
+            )
+            self.codes = np.array(stored_codes[self.rows])
+            del stored_codes
+
+    def _file_size(self, name: str) -> int:
+        path = self._path(name)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def _remove_files(self, keep_generation: Optional[int]):
+        """현재 세대가 아닌 인덱스 파일 삭제 (keep_generation=None이면 전부)"""
+        for name in os.listdir(self.directory):
+            if not os.path.isfile(os.path.join(self.directory, name)):
+                continue
+            parts = name.split(".")
+            if len(parts) != 3 or parts[0] not in INDEX_FILE_STEMS or not parts[1].isdigit():
+                # 이전 형식 파일 (index.npz, vectors.f32 등)
+                if name in ("index.npz", "index.tmp.npz", "vectors.f32", "vectors.f32.tmp") or \
+                        (keep_generation is None and name in ("meta.json", "meta.json.tmp")):
+                    os.remove(os.path.join(self.directory, name))
+                continue
+            if keep_generation is None or int(parts[1]) != keep_generation:
+                os.remove(os.path.join(self.directory, name))
+
+    def _path(self, name: str, generation: Optional[int] = -1) -> str:
+        """인덱스 파일 경로 (기본은 현재 세대 파일: vectors.<세대>.f32, generation=None이면 세대 없음)"""
+        if generation is None:
+            return os.path.join(self.directory, name)
+        stem, ext = name.split(".", 1)
+        return os.path.join(self.directory, f"{stem}.{self.generation if generation == -1 else generation}.{ext}")
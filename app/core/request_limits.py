@@ -0,0 +1,46 @@
+from typing import Dict
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+
+class RequestSizeLimitMiddleware:
+    """경로별 요청 본문 크기 제한 (ASGI 미들웨어)
+
+    Starlette는 multipart 본문을 핸들러 호출 전에 모두 임시 파일로 받아두므로,
+    핸들러 안의 크기 검사는 이미 디스크를 쓴 뒤에야 동작합니다.
+    Content-Length가 제한을 넘으면 본문을 읽지 않고 바로 413을 반환하고,
+    길이를 알 수 없는(chunked) 요청은 수신 중 누적 크기가 제한을 넘는 순간 중단합니다.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits  # {경로: 최대 바이트}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "POST" or scope["path"] not in self.limits:
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = self.limits[scope["path"]]
+        detail = f"요청 크기 제한({max_bytes // (1024 * 1024)}MB)을 초과했습니다."
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+            await JSONResponse(status_code=413, content={"detail": detail})(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # 본문 파싱 중 발생하므로 FastAPI가 그대로 413 응답으로 변환
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,22 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+except ImportError:  # orjson 미설치 시 표준 json으로 대체
+    orjson = None
+    ORJSONResponse = None
+
+
+# 큰 응답을 빠르게 직렬화하는 기본 응답 클래스
+FastJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def dumps_line(obj: Any) -> bytes:
+    """NDJSON 한 줄(개행 포함)로 직렬화"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+    return (json.dumps(obj, ensure_ascii=False, default=str) + "\n").encode("utf-8")
@@ -1,10 +1,20 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
+import asyncio
 import os
 
 from app.api.routes import router
 from app.core.config import settings
+from app.core.database import vector_db
+from app.core.executor import shutdown_cpu_executor
+from app.core.request_limits import RequestSizeLimitMiddleware
+from app.core.responses import FastJSONResponse
+from app.services.snapshot_service import snapshot_service
+from app.services.query_log import query_log_service
+from app.services.cache_warmer import cache_warmer
+from app.services.embedding_service import embedding_service
 
 
 # FastAPI 애플리케이션 생성
@@ -13,7 +23,8 @@ app = FastAPI(
     description="RAG 기반 기술 문서 Q&A 시스템 API",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse  # orjson 직렬화
 )
 
 # CORS 미들웨어 설정
@@ -25,6 +36,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 큰 응답(청크 목록, NDJSON 내보내기 등) gzip 압축
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# 업로드 본문 크기를 수신 중에 제한 (핸들러 호출 전 전체 본문이 디스크에 저장되는 것 방지)
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    limits={
+        "/api/v1/documents/upload": settings.max_upload_request_mb * 1024 * 1024,
+        "/api/v1/snapshot/import": (settings.max_snapshot_size_mb + 1) * 1024 * 1024  # multipart 헤더 여유
+    }
+)
+
 # API 라우터 등록
 app.include_router(router, prefix="/api/v1")
 
@@ -40,11 +63,28 @@ async def startup_event():
     print(f"📚 문서 디렉토리: {settings.documents_dir}")
     print(f"🗄️ 벡터 데이터베이스: {settings.chroma_persist_directory}")
     print(f"🌐 API 문서: http://localhost:{settings.port}/docs")
+    
+    # 새 복제본은 스냅샷으로 인덱스를 적재 (임베딩 재계산 없음)
+    if settings.snapshot_bootstrap_path and vector_db.collection.count() == 0:
+        if os.path.exists(settings.snapshot_bootstrap_path):
+            snapshot_service.import_snapshot(settings.snapshot_bootstrap_path)
+        else:
+            print(f"⚠️ 스냅샷 파일이 없습니다: {settings.snapshot_bootstrap_path}")
+    
+    # 질의 로그 비동기 기록 시작
+    await query_log_service.start()
+    
+    # 자주 묻는 질문으로 캐시 예열 (첫 요청부터 캐시 속도 제공)
+    if settings.cache_warm_on_startup:
+        await asyncio.get_running_loop().run_in_executor(None, cache_warmer.warm)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """애플리케이션 종료 시 실행"""
+    await query_log_service.stop()
+    shutdown_cpu_executor()
+    embedding_service.close()
     print("👋 Q&A 시스템이 종료되었습니다.")
 
 
@@ -2,10 +2,19 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 
 
+class SearchFilters(BaseModel):
+    """검색 범위 제한 필터"""
+    source_file: Optional[str] = None
+    file_extension: Optional[str] = None
+    path_prefix: Optional[str] = None
+
+
 class QuestionRequest(BaseModel):
     """질문 요청 모델"""
     question: str
     max_results: int = 5
+    filters: Optional[SearchFilters] = None
+    collection: Optional[str] = None  # 미지정 시 기본 컬렉션
 
 
 class DocumentChunk(BaseModel):
@@ -13,6 +22,7 @@ class DocumentChunk(BaseModel):
     content: str
     metadata: Dict[str, Any]
     distance: float
+    sources: List[Dict[str, Any]] = []  # 유사 중복으로 병합된 청크의 출처별 메타데이터
 
 
 class AnswerResponse(BaseModel):
@@ -27,6 +37,29 @@ class DocumentUploadResponse(BaseModel):
     message: str
     processed_files: List[str]
     total_chunks: int
+    duplicates_removed: int = 0
+    embedding_time_saved_ms: float = 0.0
+    failed_files: int = 0  # 색인에 실패한 파일 수 (부분 성공)
+
+
+class UploadedFileResult(BaseModel):
+    """업로드 파일별 처리 결과"""
+    filename: str
+    size_bytes: int
+    chunks: int
+    duplicates_removed: int = 0
+    save_time_ms: float
+    index_time_ms: float
+    error: Optional[str] = None
+
+
+class FileUploadResponse(BaseModel):
+    """파일 업로드 응답 모델"""
+    message: str
+    files: List[UploadedFileResult]
+    total_chunks: int
+    failed_files: int = 0  # 색인에 실패한 파일 수 (부분 성공)
+    total_time_ms: float
 
 
 class HealthResponse(BaseModel):
@@ -0,0 +1,60 @@
+import json
+import os
+import time
+from typing import List, Dict, Any, Optional
+
+from app.core.config import settings
+from app.services.query_log import query_log_service
+from app.services.search_service import search_service
+from app.services.llm_service import llm_service
+
+
+class CacheWarmer:
+    """자주 묻는 질문으로 임베딩/검색/답변 캐시 예열"""
+
+    def load_warm_queries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """예열 대상 질의 목록 (오프라인 분석 결과 파일이 없으면 로그를 직접 분석)"""
+        limit = limit or settings.cache_warm_limit
+        if os.path.exists(settings.cache_warm_file):
+            with open(settings.cache_warm_file, encoding="utf-8") as f:
+                return json.load(f)[:limit]
+        return query_log_service.mine_frequent_queries(limit)
+
+    def warm(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """검색(임베딩 포함) 캐시와, 설정 시 답변 캐시까지 미리 채움"""
+        started = time.perf_counter()
+        stats = {"queries": 0, "searched": 0, "answered": 0, "failed": 0}
+
+        try:
+            queries = self.load_warm_queries(limit)
+        except Exception as e:
+            print(f"❌ 캐시 예열 대상 조회 실패: {e}")
+            return stats
+
+        for query in queries:
+            stats["queries"] += 1
+            try:
+                results = search_service.search_documents(
+                    query["question"],
+                    query.get("max_results", 5),
+                    query.get("filters"),
+                    query.get("collection")
+                )
+                stats["searched"] += 1
+
+                # 답변 예열은 LLM 호출 비용이 들므로 설정으로 켤 때만 수행
+                if settings.cache_warm_answers and results and llm_service.model:
+                    llm_service.generate_answer(query["question"], [r["content"] for r in results])
+                    stats["answered"] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"⚠️ 캐시 예열 실패 ('{query.get('question')}'): {e}")
+
+        stats["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        if stats["queries"]:
+            print(f"🔥 캐시 예열 완료: {stats['searched']}개 검색, {stats['answered']}개 답변 ({stats['elapsed_ms']}ms)")
+        return stats
+
+
+# 전역 캐시 예열 인스턴스
+cache_warmer = CacheWarmer()
@@ -0,0 +1,339 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from html.parser import HTMLParser
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+
+from langchain.schema import Document
+
+from app.core.config import settings
+from app.core.http_pool import configure_pooled_session, TokenBucket
+
+
+# 텍스트 변환 시 줄바꿈으로 구분할 블록 태그
+_BLOCK_TAGS = {
+    "p", "br", "div", "li", "tr", "pre", "blockquote", "table",
+    "h1", "h2", "h3", "h4", "h5", "h6", "ac:structured-macro"
+}
+
+
+class _StorageTextExtractor(HTMLParser):
+    """Confluence storage 형식(XHTML)에서 본문 텍스트 추출 (코드 매크로의 CDATA 포함)"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0  # 매크로 파라미터(언어 이름 등)는 본문에서 제외
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "ac:parameter":
+            self._skip_depth += 1
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "ac:parameter" and self._skip_depth:
+            self._skip_depth -= 1
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+    def unknown_decl(self, data):
+        if data.startswith("CDATA["):
+            self.parts.append("\n" + data[len("CDATA["):] + "\n")
+
+
+def storage_to_text(html: str) -> str:
+    """storage 형식 본문을 청킹용 일반 텍스트로 변환"""
+    parser = _StorageTextExtractor()
+    parser.feed(html or "")
+    parser.close()
+    lines = [' '.join(line.split()) for line in "".join(parser.parts).splitlines()]
+    # 빈 줄은 문단 구분용으로 하나만 유지
+    text, blank = [], False
+    for line in lines:
+        if line:
+            text.append(line)
+            blank = False
+        elif not blank and text:
+            text.append("")
+            blank = True
+    return "\n".join(text).strip()
+
+
+def page_file_path(space_key: str, page_id: str) -> str:
+    """페이지 청크의 file_path 메타데이터 (파일 문서와 같은 방식으로 교체/삭제)"""
+    return f"confluence/{space_key}/{page_id}"
+
+
+def page_to_documents(page: Dict[str, Any], space_key: str, text_splitter, base_url: str = "") -> List[Document]:
+    """Confluence 페이지를 청크 Document 목록으로 변환"""
+    title = page.get("title", "")
+    body = page.get("body", {}).get("storage", {}).get("value", "")
+    text = storage_to_text(body)
+    if not text:
+        return []
+
+    # 제목을 본문 앞에 붙여 청크마다 문맥이 남도록 함
+    chunks = text_splitter.split_documents([Document(page_content=f"{title}\n\n{text}")])
+    webui = page.get("_links", {}).get("webui", "")
+    for i, chunk in enumerate(chunks):
+        chunk.metadata.update({
+            "source": "confluence",
+            "source_file": title,
+            "file_path": page_file_path(space_key, page["id"]),
+            "chunk_index": i,
+            "total_chunks": len(chunks),
+            "file_extension": ".confluence",
+            "source_dir": f"confluence/{space_key}",
+            "dir_0": "confluence",
+            "dir_1": f"confluence/{space_key}",
+            "confluence_page_id": page["id"],
+            "confluence_version": page.get("version", {}).get("number", 0),
+            "confluence_url": base_url.rstrip("/") + webui if webui else ""
+        })
+    return chunks
+
+
+class ConfluenceClient:
+    """Confluence REST API 클라이언트 (연결 풀 + 초당 요청 수 제한 + 동시 조회)"""
+
+    def __init__(self, base_url: str, username: Optional[str] = None, api_token: Optional[str] = None,
+                 max_workers: Optional[int] = None, rate_limit_per_second: Optional[float] = None):
+        if not base_url:
+            raise ValueError("CONFLUENCE_BASE_URL이 설정되지 않았습니다.")
+
+        self.base_url = base_url.rstrip("/")
+        self.max_workers = max_workers or settings.confluence_max_workers
+        self.rate_limiter = TokenBucket(
+            rate_limit_per_second if rate_limit_per_second is not None else settings.confluence_rate_limit_per_second
+        )
+        self.session = configure_pooled_session(pool_size=self.max_workers)
+        self.session.headers["Accept"] = "application/json"
+        if username and api_token:
+            # Confluence Cloud: 이메일 + API 토큰
+            self.session.auth = (username, api_token)
+        elif api_token:
+            # Server/Data Center: 개인 액세스 토큰
+            self.session.headers["Authorization"] = f"Bearer {api_token}"
+
+    def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self.rate_limiter.acquire()
+        response = self.session.get(f"{self.base_url}{path}", params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def list_pages(self, space_key: str) -> Iterator[Dict[str, Any]]:
+        """스페이스의 모든 페이지 요약(ID, 제목, 버전) 조회 (본문 제외)"""
+        start, limit = 0, settings.confluence_page_size
+        while True:
+            data = self._get("/rest/api/content", {
+                "spaceKey": space_key,
+                "type": "page",
+                "status": "current",
+                "expand": "version",
+                "start": start,
+                "limit": limit
+            })
+            results = data.get("results", [])
+            yield from results
+            if not results or "next" not in data.get("_links", {}):
+                break
+            start += len(results)
+
+    def get_page(self, page_id: str) -> Dict[str, Any]:
+        """페이지 본문(storage 형식)과 버전 조회"""
+        return self._get(f"/rest/api/content/{page_id}", {"expand": "body.storage,version"})
+
+    def iter_pages(self, page_ids: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """페이지 본문을 동시에 조회하여 완료되는 순서대로 반환
+
+        메모리 사용을 제한하기 위해 동시 작업 수의 2배까지만 미리 요청합니다.
+        조회에 실패한 페이지는 {"id": ..., "error": ...} 형태로 반환합니다.
+        """
+        page_ids = iter(page_ids)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+
+            def submit_next() -> bool:
+                page_id = next(page_ids, None)
+                if page_id is None:
+                    return False
+                pending[executor.submit(self.get_page, page_id)] = page_id
+                return True
+
+            while len(pending) < self.max_workers * 2 and submit_next():
+                pass
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page_id = pending.pop(future)
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        yield {"id": page_id, "error": str(e)}
+                    submit_next()
+
+    def close(self):
+        self.session.close()
+
+
+class ConfluenceSyncService:
+    """Confluence 스페이스 증분 동기화 (변경된 페이지만 다시 청킹/임베딩)
+
+    페이지별 마지막으로 색인한 버전을 상태 파일에 기록하고, 동기화 시 버전이 바뀐 페이지만
+    본문을 가져와 수집 파이프라인으로 바로 넘깁니다. 스페이스에서 사라진 페이지의 청크는 삭제합니다.
+    """
+
+    def __init__(self):
+        self.state_path = settings.confluence_state_path
+        self._lock = threading.Lock()  # 상태 파일을 공유하므로 동기화는 한 번에 하나씩
+
+    def _load_state(self) -> Dict[str, Any]:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self, state: Dict[str, Any]):
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(temp_path, self.state_path)
+
+    def sync_space(self, space_key: str, collection: Optional[str] = None, full: bool = False,
+                   client: Optional[ConfluenceClient] = None) -> Dict[str, Any]:
+        """스페이스 하나를 동기화 (full=True면 버전과 관계없이 모든 페이지 재색인)"""
+        with self._lock:
+            return self._sync_space(space_key, collection, full, client)
+
+    def _sync_space(self, space_key: str, collection: Optional[str], full: bool,
+                    client: Optional[ConfluenceClient]) -> Dict[str, Any]:
+        # 순환 import 방지 (document_loader가 이 모듈을 지연 import)
+        from app.core.collections import collection_manager
+        from app.services.document_loader import document_loader
+        from app.services.ingestion_service import ingestion_service
+
+        started = time.perf_counter()
+        own_client = client is None
+        client = client or ConfluenceClient(
+            settings.confluence_base_url,
+            settings.confluence_username,
+            settings.confluence_api_token
+        )
+        db = collection_manager.get(collection, create=True)
+        state = self._load_state()
+        state_key = f"{db.name}:{space_key}"
+        # full이어도 이전에 색인한 페이지 목록은 유지해야 스페이스에서 사라진 페이지를 찾아 삭제할 수 있음
+        known: Dict[str, int] = dict(state.get(state_key, {}).get("pages", {}))
+        stats = {
+            "space_key": space_key,
+            "collection": db.name,
+            "pages": 0,
+            "changed_pages": 0,
+            "unchanged_pages": 0,
+            "deleted_pages": 0,
+            "failed_pages": 0,
+            "stored_chunks": 0,
+            "duplicates_removed": 0
+        }
+
+        try:
+            # 1. 페이지 목록과 버전만 조회해 변경 여부 판단 (실패하면 상태를 건드리지 않고 중단)
+            current = {page["id"]: page.get("version", {}).get("number", 0) for page in client.list_pages(space_key)}
+        except Exception:
+            if own_client:
+                client.close()
+            raise
+
+        stats["pages"] = len(current)
+        changed = [page_id for page_id, version in current.items() if full or known.get(page_id) != version]
+        stats["unchanged_pages"] = len(current) - len(changed)
+
+        buffer: List[Document] = []
+        batch_pages: Dict[str, int] = {}  # 버퍼에 담긴 페이지 ID → 버전
+
+        def flush():
+            """여러 페이지의 청크를 한 번에 임베딩하고, 임베딩이 끝난 뒤 각 페이지의 기존 청크를 교체"""
+            try:
+                ingest_stats = ingestion_service.ingest_documents(
+                    list(buffer), db.name,
+                    replace_files=[page_file_path(space_key, page_id) for page_id in batch_pages]
+                )
+                stats["stored_chunks"] += ingest_stats["stored_chunks"]
+                stats["duplicates_removed"] += ingest_stats["duplicates_removed"]
+                # 수집에 성공한 페이지만 버전을 기록하여 실패한 페이지는 다음 동기화에서 재시도
+                known.update(batch_pages)
+                stats["changed_pages"] += len(batch_pages)
+            except Exception as e:
+                stats["failed_pages"] += len(batch_pages)
+                print(f"❌ Confluence 페이지 {len(batch_pages)}개 수집 실패: {e}")
+            buffer.clear()
+            batch_pages.clear()
+
+        try:
+            # 2. 스페이스에서 사라진 페이지의 청크 삭제
+            for page_id in set(known) - set(current):
+                db.delete_by_file(page_file_path(space_key, page_id))
+                known.pop(page_id, None)
+                stats["deleted_pages"] += 1
+
+            # 3. 변경된 페이지를 동시에 가져와 도착하는 대로 모아서 수집
+            for page in client.iter_pages(changed):
+                if "error" in page:
+                    stats["failed_pages"] += 1
+                    print(f"❌ Confluence 페이지 {page['id']} 조회 실패: {page['error']}")
+                    continue
+                try:
+                    documents = page_to_documents(page, space_key, document_loader.text_splitter, client.base_url)
+                except Exception as e:
+                    stats["failed_pages"] += 1
+                    print(f"❌ Confluence 페이지 {page['id']} 변환 실패: {e}")
+                    continue
+
+                # 본문이 비어 청크가 없는 페이지도 교체 대상에 넣어 기존 청크를 제거
+                buffer.extend(documents)
+                batch_pages[page["id"]] = page.get("version", {}).get("number", current.get(page["id"], 0))
+                if len(buffer) >= settings.confluence_ingest_batch_chunks:
+                    flush()
+            if batch_pages:
+                flush()
+
+        finally:
+            state[state_key] = {"pages": known, "last_sync": time.time()}
+            self._save_state(state)
+            if own_client:
+                client.close()
+
+        stats["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        print(
+            f"🔄 Confluence 동기화 완료 ({space_key} → {db.name}): 페이지 {stats['pages']}개 중 "
+            f"{stats['changed_pages']}개 갱신, {stats['deleted_pages']}개 삭제, {stats['failed_pages']}개 실패 "
+            f"({stats['elapsed_ms']}ms)"
+        )
+        return stats
+
+    def sync_spaces(self, space_keys: Optional[List[str]] = None, collection: Optional[str] = None,
+                    full: bool = False) -> List[Dict[str, Any]]:
+        """여러 스페이스 동기화 (미지정 시 CONFLUENCE_SPACES)"""
+        space_keys = space_keys or [key.strip() for key in settings.confluence_spaces.split(",") if key.strip()]
+        if not space_keys:
+            raise ValueError("동기화할 Confluence 스페이스가 없습니다. CONFLUENCE_SPACES를 설정하세요.")
+
+        client = ConfluenceClient(settings.confluence_base_url, settings.confluence_username, settings.confluence_api_token)
+        try:
+            return [self.sync_space(space_key, collection, full, client=client) for space_key in space_keys]
+        finally:
+            client.close()
+
+
+# 전역 Confluence 동기화 서비스 인스턴스
+confluence_sync_service = ConfluenceSyncService()
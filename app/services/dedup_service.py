@@ -0,0 +1,211 @@
+import re
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from app.core.config import settings
+from app.core.database import VectorDatabase, chunk_sources, merged_metadata, source_metadata
+
+
+# MinHash 해시 함수 계수 계산용 메르센 소수 (2^61 - 1)
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# 저장된 청크와 비교하기 위해 메타데이터에 남기는 시그니처/LSH 밴드 키
+SIGNATURE_KEY = "minhash"
+BAND_KEY_PREFIX = "lsh_"
+# 저장된 청크 조회 1회에 묶는 새 청크 수 (where 절 크기 제한)
+_LOOKUP_BATCH = 100
+
+
+class DeduplicationService:
+    """MinHash 기반 유사 중복 청크 제거 서비스"""
+
+    def __init__(self):
+        self.num_perm = settings.dedup_num_perm
+        self.shingle_size = settings.dedup_shingle_size
+        self.threshold = settings.dedup_similarity_threshold
+        self.rows_per_band, self.num_bands = self._choose_bands(self.num_perm, self.threshold)
+
+        # 해시 함수 계수 (고정 시드로 프로세스 간 재현 가능)
+        generator = np.random.RandomState(seed=1)
+        self._a = generator.randint(1, _MERSENNE_PRIME, size=self.num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, _MERSENNE_PRIME, size=self.num_perm, dtype=np.uint64)
+
+    def deduplicate(self, documents: List[Any]) -> Tuple[List[Any], Dict[str, Any]]:
+        """유사 중복 청크를 하나로 병합하고 (남은 청크, 통계) 반환
+
+        병합된 청크의 메타데이터에는 모든 출처가 `sources`(JSON 문자열)로 기록되고,
+        남은 청크에는 이후 저장된 청크와 비교할 수 있도록 시그니처와 LSH 밴드 키가 기록됩니다.
+        """
+        if not documents:
+            return documents, {"input_chunks": 0, "duplicates_removed": 0}
+
+        kept: List[Any] = []
+        signatures: List[np.ndarray] = []
+        sources: List[List[Dict[str, Any]]] = []
+        buckets: Dict[Tuple[int, str], List[int]] = {}
+
+        for doc in documents:
+            signature = self._signature(doc.page_content)
+            band_keys = self._band_keys(signature)
+
+            duplicate_of = self._find_duplicate(signature, band_keys, buckets, signatures)
+            if duplicate_of is not None:
+                sources[duplicate_of].append(source_metadata(doc.metadata))
+                continue
+
+            index = len(kept)
+            kept.append(doc)
+            signatures.append(signature)
+            sources.append([source_metadata(doc.metadata)])
+            for band, key in enumerate(band_keys):
+                buckets.setdefault((band, key), []).append(index)
+
+        # 병합된 출처 정보와 시그니처를 대표 청크 메타데이터에 기록
+        for doc, signature, doc_sources in zip(kept, signatures, sources):
+            doc.metadata = merged_metadata(doc_sources)
+            doc.metadata[SIGNATURE_KEY] = self._encode(signature)
+            for band, key in enumerate(self._band_keys(signature)):
+                doc.metadata[f"{BAND_KEY_PREFIX}{band}"] = key
+
+        removed = len(documents) - len(kept)
+        if removed:
+            print(f"🧹 유사 중복 청크 {removed}개 병합 (임계값 {self.threshold})")
+
+        return kept, {"input_chunks": len(documents), "duplicates_removed": removed}
+
+    def match_stored(self, documents: List[Any], db: VectorDatabase,
+                     replaced: Optional[Callable[[Dict[str, Any]], bool]] = None
+                     ) -> Tuple[List[Any], Dict[str, List[Dict[str, Any]]]]:
+        """deduplicate를 거친 청크를 이미 저장된 청크와 비교
+
+        (저장할 새 청크, {중복인 저장된 청크 ID: 추가할 출처 메타데이터 목록}) 반환.
+        LSH 밴드 키가 하나라도 같은 저장된 청크만 조회한 뒤 시그니처로 검증합니다.
+        replaced(출처 메타데이터)가 모든 출처에 대해 참인 저장된 청크(곧 교체될 청크)는 비교하지 않습니다.
+        """
+        remaining: List[Any] = []
+        matches: Dict[str, List[Dict[str, Any]]] = {}
+        if not documents or db.collection.count() == 0:
+            return documents, matches
+
+        for start in range(0, len(documents), _LOOKUP_BATCH):
+            batch = [doc for doc in documents[start:start + _LOOKUP_BATCH] if SIGNATURE_KEY in doc.metadata]
+            remaining.extend(doc for doc in documents[start:start + _LOOKUP_BATCH] if SIGNATURE_KEY not in doc.metadata)
+            if not batch:
+                continue
+
+            # 밴드별 키 중 하나라도 같은 저장된 청크 조회
+            conditions = []
+            for band in range(self.num_bands):
+                field = f"{BAND_KEY_PREFIX}{band}"
+                conditions.append({field: {"$in": sorted({doc.metadata[field] for doc in batch})}})
+            stored = db.get_records(conditions[0] if len(conditions) == 1 else {"$or": conditions})
+
+            candidates: Dict[Tuple[int, str], List[int]] = {}
+            stored_signatures: List[np.ndarray] = []
+            for index, metadata in enumerate(stored.get("metadatas") or []):
+                stored_signatures.append(self._decode(metadata.get(SIGNATURE_KEY, "")))
+                if len(stored_signatures[-1]) != self.num_perm:
+                    # MinHash 설정이 바뀌기 전에 저장된 청크는 비교하지 않음
+                    continue
+                if replaced is not None and all(replaced(entry) for entry in chunk_sources(metadata)):
+                    continue
+                for band in range(self.num_bands):
+                    candidates.setdefault((band, metadata.get(f"{BAND_KEY_PREFIX}{band}")), []).append(index)
+
+            for doc in batch:
+                signature = self._decode(doc.metadata[SIGNATURE_KEY])
+                band_keys = [doc.metadata[f"{BAND_KEY_PREFIX}{band}"] for band in range(self.num_bands)]
+                duplicate_of = self._find_duplicate(signature, band_keys, candidates, stored_signatures)
+                if duplicate_of is None:
+                    remaining.append(doc)
+                    continue
+                # 새 청크에 병합된 출처까지 모두 저장된 청크로 옮김
+                matches.setdefault(stored["ids"][duplicate_of], []).extend(chunk_sources(doc.metadata))
+
+        matched = len(documents) - len(remaining)
+        if matched:
+            print(f"🧹 저장된 청크와 유사한 청크 {matched}개 병합 (임계값 {self.threshold})")
+        return remaining, matches
+
+    def estimate_similarity(self, text1: str, text2: str) -> float:
+        """두 텍스트 간 MinHash 추정 자카드 유사도"""
+        return self._jaccard(self._signature(text1), self._signature(text2))
+
+    def _find_duplicate(self, signature: np.ndarray, band_keys: List[str],
+                        buckets: Dict[Tuple[int, str], List[int]],
+                        signatures: List[np.ndarray]):
+        """LSH 버킷에서 후보를 찾고 임계값 이상인 대표 청크 인덱스 반환"""
+        checked = set()
+        for band, key in enumerate(band_keys):
+            for candidate in buckets.get((band, key), []):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if self._jaccard(signature, signatures[candidate]) >= self.threshold:
+                    return candidate
+        return None
+
+    def _signature(self, text: str) -> np.ndarray:
+        """문자 단위 shingle의 MinHash 시그니처 계산"""
+        normalized = ' '.join(re.findall(r'\w+', text.lower()))
+        k = self.shingle_size
+        if len(normalized) <= k:
+            shingles = {normalized}
+        else:
+            shingles = {normalized[i:i + k] for i in range(len(normalized) - k + 1)}
+
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+
+        # (a * x + b) mod p 를 모든 해시 함수에 대해 벡터화 계산
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        permuted &= _MAX_HASH
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[str]:
+        """시그니처를 밴드로 나눈 LSH 버킷 키 목록 (밴드 순서, 메타데이터에 저장할 수 있는 문자열)"""
+        r = self.rows_per_band
+        return [self._encode(signature[band * r:(band + 1) * r]) for band in range(self.num_bands)]
+
+    @staticmethod
+    def _encode(values: np.ndarray) -> str:
+        """시그니처(32비트 해시값)를 16진 문자열로 변환"""
+        return values.astype("<u4").tobytes().hex()
+
+    @staticmethod
+    def _decode(encoded: str) -> np.ndarray:
+        """16진 문자열 시그니처 복원"""
+        return np.frombuffer(bytes.fromhex(encoded), dtype="<u4").astype(np.uint64)
+
+    @staticmethod
+    def _jaccard(signature1: np.ndarray, signature2: np.ndarray) -> float:
+        """시그니처 일치 비율로 자카드 유사도 추정"""
+        return float(np.mean(signature1 == signature2))
+
+    @staticmethod
+    def _choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+        """LSH S-커브가 임계값보다 조금 앞에서 꺾이도록 (행 수, 밴드 수) 선택
+
+        후보는 시그니처 비교로 다시 검증하므로 누락(false negative)을 줄이는 쪽으로 잡습니다.
+        """
+        target = max(0.5, threshold - 0.15)
+        best = (1, num_perm)
+        best_error = float("inf")
+        for rows in range(1, num_perm + 1):
+            if num_perm % rows:
+                continue
+            bands = num_perm // rows
+            # LSH 후보 확률이 급변하는 지점 ≈ (1/b)^(1/r)
+            error = abs((1.0 / bands) ** (1.0 / rows) - target)
+            if error < best_error:
+                best, best_error = (rows, bands), error
+        return best
+
+
+# 전역 중복 제거 서비스 인스턴스
+dedup_service = DeduplicationService()
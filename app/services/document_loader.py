@@ -1,18 +1,30 @@
 import os
 import glob
-from typing import List, Dict, Any
+import hashlib
+import time
+from typing import List, Dict, Any, Optional, Iterator
 from pathlib import Path
 
+from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.document_loaders import (
-    PyPDFLoader,
     TextLoader,
     Docx2txtLoader,
     UnstructuredMarkdownLoader
 )
+from pypdf import PdfReader
 from app.core.config import settings
 
 
+# 지원하는 파일 확장자별 로더 (PDF는 페이지 단위 스트리밍 로더 iter_pdf_pages 사용)
+SUPPORTED_LOADERS = {
+    ".pdf": None,
+    ".txt": TextLoader,
+    ".md": TextLoader,
+    ".docx": Docx2txtLoader
+}
+
+
 class DocumentLoader:
     """문서 로더 및 청킹 서비스"""
     
@@ -31,52 +43,167 @@ class DocumentLoader:
         
         documents = []
         
-        # 지원하는 파일 확장자
-        file_patterns = {
-            "*.pdf": PyPDFLoader,
-            "*.txt": TextLoader,
-            "*.md": TextLoader,
-            "*.docx": Docx2txtLoader
-        }
-        
-        for pattern, loader_class in file_patterns.items():
-            file_paths = glob.glob(os.path.join(directory, pattern))
-            
-            for file_path in file_paths:
-                try:
-                    print(f"📄 문서 로딩 중: {file_path}")
-                    
-                    # 문서 로드
-                    loader = loader_class(file_path)
-                    raw_docs = loader.load()
-                    
-                    # 청킹
-                    chunks = self.text_splitter.split_documents(raw_docs)
-                    
-                    # 메타데이터 추가
-                    for i, chunk in enumerate(chunks):
-                        chunk.metadata.update({
-                            "source_file": os.path.basename(file_path),
-                            "file_path": file_path,
-                            "chunk_index": i,
-                            "total_chunks": len(chunks)
-                        })
-                    
-                    documents.extend(chunks)
-                    print(f"✅ {file_path}: {len(chunks)}개 청크 생성")
-                    
-                except Exception as e:
-                    print(f"❌ {file_path} 로딩 실패: {e}")
-                    continue
+        for file_path in self.list_document_files(directory):
+            try:
+                documents.extend(self.load_file(file_path, directory))
+            except Exception as e:
+                print(f"❌ {file_path} 로딩 실패: {e}")
+                continue
         
         print(f"📊 총 {len(documents)}개 문서 청크 로드 완료")
         return documents
     
-    def load_confluence_documents(self, space_key: str, username: str, api_token: str) -> List[Dict[str, Any]]:
-        """Confluence에서 문서 로드 (향후 구현)"""
-        # TODO: Confluence API 연동 구현
-        print("🔄 Confluence 연동 기능은 향후 구현 예정입니다.")
-        return []
+    def list_document_files(self, directory: str = "") -> List[str]:
+        """디렉토리(하위 폴더 포함)에서 지원하는 문서 파일 목록 조회"""
+        if not directory:
+            directory = settings.documents_dir
+        
+        file_paths = []
+        for extension in SUPPORTED_LOADERS:
+            # 하위 디렉토리(핸드북별 폴더 등)까지 포함
+            file_paths.extend(glob.glob(os.path.join(directory, "**", f"*{extension}"), recursive=True))
+        return file_paths
+    
+    def is_supported(self, file_path: str) -> bool:
+        """지원하는 문서 형식인지 확인"""
+        return os.path.splitext(file_path)[1].lower() in SUPPORTED_LOADERS
+    
+    def load_file(self, file_path: str, directory: str = "") -> List[Any]:
+        """단일 문서를 로드하고 청킹"""
+        if not directory:
+            directory = settings.documents_dir
+        
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension not in SUPPORTED_LOADERS:
+            raise ValueError(f"지원하지 않는 파일 형식입니다: {file_path}")
+        
+        print(f"📄 문서 로딩 중: {file_path}")
+        
+        if extension == ".pdf":
+            # 일부 페이지만 읽은 결과를 파일 전체로 저장하지 않도록 시간 제한을 넘으면 실패로 처리
+            # (페이지 단위 교체/재개는 ingestion_service.ingest_file 사용)
+            chunks = []
+            for page in self.iter_pdf_pages(file_path, directory):
+                if page.get("timed_out"):
+                    raise TimeoutError(
+                        f"PDF 추출 시간 제한({settings.pdf_max_extract_seconds}초)을 넘었습니다: "
+                        f"{file_path} ({page['page']}/{page['total_pages']}페이지)"
+                    )
+                chunks.extend(page["chunks"] or [])
+            print(f"✅ {file_path}: {len(chunks)}개 청크 생성")
+            return chunks
+        
+        loader_class = SUPPORTED_LOADERS[extension]
+        
+        # 문서 로드
+        loader = loader_class(file_path)
+        raw_docs = loader.load()
+        
+        # 청킹
+        chunks = self.text_splitter.split_documents(raw_docs)
+        
+        # 메타데이터 추가 (검색 필터용 확장자/디렉토리 정보 포함)
+        path_metadata = self._path_metadata(file_path, directory)
+        for i, chunk in enumerate(chunks):
+            chunk.metadata.update({
+                "source_file": os.path.basename(file_path),
+                "file_path": file_path,
+                "chunk_index": i,
+                "total_chunks": len(chunks),
+                **path_metadata
+            })
+        
+        print(f"✅ {file_path}: {len(chunks)}개 청크 생성")
+        return chunks
+    
+    def iter_pdf_pages(self, file_path: str, directory: str = "",
+                       known_hashes: Optional[Dict[int, str]] = None,
+                       max_seconds: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """PDF를 한 페이지씩 읽어 청킹한 결과를 바로 반환 (전체 페이지를 메모리에 올리지 않음)
+
+        페이지 내용 스트림의 해시가 known_hashes와 같으면 텍스트 추출 없이 chunks=None으로 건너뜁니다.
+        파일당 추출 시간이 max_seconds(기본 PDF_MAX_EXTRACT_SECONDS)를 넘으면 남은 페이지는 읽지 않고
+        {"timed_out": True, "page": 다음 페이지}를 마지막으로 반환합니다. (페이지 하나의 추출은 중단할 수 없음)
+        """
+        if not directory:
+            directory = settings.documents_dir
+        known_hashes = known_hashes or {}
+        max_seconds = settings.pdf_max_extract_seconds if max_seconds is None else max_seconds
+        deadline = time.monotonic() + max_seconds if max_seconds > 0 else None
+        path_metadata = self._path_metadata(file_path, directory)
+        
+        reader = PdfReader(file_path)
+        total_pages = len(reader.pages)
+        for page_number in range(total_pages):
+            if deadline is not None and time.monotonic() > deadline:
+                print(f"⏱️ {file_path}: 추출 시간 제한({max_seconds}초) 초과, {page_number}/{total_pages}페이지에서 중단")
+                yield {"page": page_number, "total_pages": total_pages, "timed_out": True}
+                return
+            
+            page = reader.pages[page_number]
+            page_hash = self._pdf_page_hash(page)
+            if known_hashes.get(page_number) == page_hash:
+                yield {"page": page_number, "total_pages": total_pages, "page_hash": page_hash, "chunks": None}
+                continue
+            
+            text = page.extract_text() or ""
+            chunks = self.text_splitter.split_documents([
+                Document(page_content=text, metadata={"source": file_path, "page": page_number})
+            ]) if text.strip() else []
+            for i, chunk in enumerate(chunks):
+                chunk.metadata.update({
+                    "source_file": os.path.basename(file_path),
+                    "file_path": file_path,
+                    "chunk_index": i,  # 페이지 내 순번
+                    "total_chunks": len(chunks),
+                    "total_pages": total_pages,
+                    "page_hash": page_hash,
+                    **path_metadata
+                })
+            yield {"page": page_number, "total_pages": total_pages, "page_hash": page_hash, "chunks": chunks}
+    
+    @staticmethod
+    def _pdf_page_hash(page) -> str:
+        """텍스트 추출 없이 비교할 수 있는 페이지 내용 스트림 해시"""
+        contents = page.get_contents()
+        data = contents.get_data() if contents is not None else b""
+        return hashlib.sha1(data).hexdigest()
+    
+    def _path_metadata(self, file_path: str, directory: str) -> Dict[str, Any]:
+        """필터링용 경로 메타데이터 생성
+
+        Chroma의 where 절은 접두사 연산자가 없으므로 상위 디렉토리 경로를
+        깊이별 키(dir_0, dir_1, ...)로 저장해 경로 접두사 필터를 등호 비교로 처리합니다.
+        """
+        relative_dir = os.path.relpath(os.path.dirname(file_path), directory)
+        parts = [part for part in Path(relative_dir).parts if part not in (".", "")]
+        
+        metadata = {
+            "file_extension": os.path.splitext(file_path)[1].lower(),
+            "source_dir": "/".join(parts)
+        }
+        for depth in range(len(parts)):
+            metadata[f"dir_{depth}"] = "/".join(parts[:depth + 1])
+        return metadata
+    
+    def load_confluence_documents(self, space_key: str, username: str, api_token: str) -> List[Any]:
+        """Confluence 스페이스의 모든 페이지를 로드하고 청킹 (증분 동기화는 confluence_sync_service 사용)"""
+        from app.services.confluence_loader import ConfluenceClient, page_to_documents
+        
+        client = ConfluenceClient(settings.confluence_base_url, username, api_token)
+        try:
+            documents = []
+            page_ids = [page["id"] for page in client.list_pages(space_key)]
+            for page in client.iter_pages(page_ids):
+                if "error" in page:
+                    print(f"❌ Confluence 페이지 {page['id']} 로딩 실패: {page['error']}")
+                    continue
+                documents.extend(page_to_documents(page, space_key, self.text_splitter, client.base_url))
+            
+            print(f"📊 Confluence {space_key}: {len(page_ids)}개 페이지에서 {len(documents)}개 청크 로드 완료")
+            return documents
+        finally:
+            client.close()
     
     def get_document_info(self, directory: str = "") -> Dict[str, Any]:
         """문서 디렉토리 정보 조회"""
@@ -89,10 +216,10 @@ class DocumentLoader:
         file_info = {}
         total_files = 0
         
-        for file_path in glob.glob(os.path.join(directory, "*.*")):
-            if file_path.lower().endswith(('.pdf', '.txt', '.md', '.docx')):
+        for file_path in glob.glob(os.path.join(directory, "**", "*.*"), recursive=True):
+            if self.is_supported(file_path):
                 file_size = os.path.getsize(file_path)
-                file_info[os.path.basename(file_path)] = {
+                file_info[os.path.relpath(file_path, directory)] = {
                     "size": file_size,
                     "path": file_path
                 }
@@ -0,0 +1,120 @@
+"""임베딩 모델 백엔드
+
+- torch: sentence-transformers(PyTorch)로 모델 실행
+- onnx: benchmark_embeddings.py --export로 내보낸 같은 모델의 ONNX 파일을 onnxruntime으로 실행
+  (torch/transformers를 import하지 않아 시작이 빠르고, int8 양자화 모델도 사용 가능)
+
+워커 프로세스(spawn)에서도 import하므로 app 서비스 모듈(전역 인스턴스)을 import하지 않습니다.
+"""
+
+import json
+import os
+from typing import Any, List, Optional
+
+import numpy as np
+
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+SUPPORTED_BACKENDS = ("torch", "onnx")
+
+# ONNX 모델 디렉토리 구성 (benchmark_embeddings.py --export 출력)
+ONNX_TOKENIZER_FILE = "tokenizer.json"
+ONNX_CONFIG_FILE = "embedding_config.json"
+
+
+class OnnxEmbeddingModel:
+    """ONNX로 내보낸 sentence-transformers 모델 (토크나이저 → 트랜스포머 → mean pooling → 정규화)
+
+    SentenceTransformer와 같은 encode / get_sentence_embedding_dimension 인터페이스를 제공합니다.
+    """
+
+    def __init__(self, model_dir: str, model_file: str = "model.onnx", num_threads: Optional[int] = None):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(model_dir, model_file)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"ONNX 모델 파일이 없습니다: {model_path} "
+                "(python benchmark_embeddings.py --export 로 생성)"
+            )
+
+        config = {}
+        config_path = os.path.join(model_dir, ONNX_CONFIG_FILE)
+        if os.path.exists(config_path):
+            with open(config_path, encoding="utf-8") as f:
+                config = json.load(f)
+        self.max_seq_length = config.get("max_seq_length", 256)
+        self.dimension = config.get("dimension")
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, ONNX_TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.model_path = model_path
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self.dimension is None:
+            self.dimension = int(self.encode(["dimension"]).shape[1])
+        return self.dimension
+
+    def encode(self, sentences: List[str], batch_size: int = 32, normalize_embeddings: bool = True,
+               **kwargs: Any) -> np.ndarray:
+        """문장 임베딩 ((문장 수, 차원) float32)
+
+        convert_to_tensor 등 SentenceTransformer 전용 인자는 무시합니다.
+        패딩을 줄이기 위해 길이순으로 정렬하여 배치를 만들고 원래 순서로 되돌립니다.
+        """
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        if not sentences:
+            return np.empty((0, self.dimension or 0), dtype=np.float32)
+
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            batches.append(self._encode_batch([sentences[i] for i in order[start:start + batch_size]]))
+        embeddings = np.empty((len(sentences), batches[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.concatenate(batches)
+
+        if normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings
+
+    def _encode_batch(self, sentences: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(sentences)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # sentence-transformers와 같은 mean pooling (패딩 토큰 제외)
+        mask = attention_mask[:, :, None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        return (summed / np.maximum(mask.sum(axis=1), 1e-9)).astype(np.float32)
+
+
+def load_embedding_model(backend: str, model_name: str, onnx_model_path: str = "",
+                         onnx_model_file: str = "model.onnx", num_threads: Optional[int] = None):
+    """설정된 백엔드로 임베딩 모델 로드 (encode / get_sentence_embedding_dimension 제공)"""
+    if backend == "onnx":
+        return OnnxEmbeddingModel(onnx_model_path, onnx_model_file, num_threads)
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+        return SentenceTransformer(model_name)
+    raise ValueError(f"지원하지 않는 임베딩 백엔드입니다: {backend} ({', '.join(SUPPORTED_BACKENDS)})")
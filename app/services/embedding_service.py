@@ -1,6 +1,8 @@
-from typing import List
-from sentence_transformers import SentenceTransformer
+from typing import List, Optional
 from app.core.config import settings
+from app.core.cache import LRUCache, MISSING
+from app.services.embedding_backends import EMBEDDING_MODEL_NAME, load_embedding_model
+from app.services.embedding_worker import EmbeddingWorkerPool
 import numpy as np
 
 
@@ -9,21 +11,50 @@ class EmbeddingService:
     
     def __init__(self):
         self.local_model = None
+        self.worker_pool = None
+        self.query_cache = LRUCache(maxsize=settings.embedding_cache_size)
         self._initialize_models()
     
     def _initialize_models(self):
         """임베딩 모델 초기화"""
         try:
-            # 기존 벡터 데이터베이스와 호환되는 모델 사용
-            self.local_model = SentenceTransformer('all-MiniLM-L6-v2')
-            print("✅ 로컬 임베딩 모델 초기화 완료 (all-MiniLM-L6-v2)")
+            # 워커 프로세스 사용 시 API 프로세스에는 모델을 올리지 않음
+            if settings.embedding_workers > 0:
+                self.worker_pool = EmbeddingWorkerPool(
+                    num_workers=settings.embedding_workers,
+                    model_name=EMBEDDING_MODEL_NAME,
+                    torch_threads=settings.embedding_torch_threads,
+                    capacity=settings.embedding_worker_batch_capacity,
+                    timeout=settings.embedding_worker_timeout_seconds or None,
+                    **self._backend_options()
+                )
+                return
+            
+            # 기존 벡터 데이터베이스와 호환되는 모델 사용 (onnx 백엔드는 같은 모델을 내보낸 파일)
+            self.local_model = load_embedding_model(model_name=EMBEDDING_MODEL_NAME, **self._backend_options())
+            print(f"✅ 로컬 임베딩 모델 초기화 완료 ({EMBEDDING_MODEL_NAME}, {settings.embedding_backend} 백엔드)")
             
         except Exception as e:
             print(f"❌ 임베딩 모델 초기화 실패: {e}")
             raise
     
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """텍스트 리스트에 대한 임베딩 생성"""
+    @staticmethod
+    def _backend_options():
+        return {
+            "backend": settings.embedding_backend,
+            "onnx_model_path": settings.onnx_model_path,
+            "onnx_model_file": settings.onnx_model_file
+        }
+    
+    @property
+    def dimension(self) -> Optional[int]:
+        """임베딩 차원"""
+        if self.worker_pool is not None:
+            return self.worker_pool.dim
+        return self.local_model.get_sentence_embedding_dimension() if self.local_model is not None else None
+    
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """텍스트 리스트에 대한 임베딩 생성 ((텍스트 수, 차원) float32 행렬)"""
         try:
             return self._get_local_embeddings(texts)
                 
@@ -31,23 +62,37 @@ class EmbeddingService:
             print(f"❌ 임베딩 생성 실패: {e}")
             raise
     
-    def _get_local_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def _get_local_embeddings(self, texts: List[str]) -> np.ndarray:
         """로컬 임베딩 모델로 임베딩 생성"""
         try:
+            if not texts:
+                return np.empty((0, self.dimension or 0), dtype=np.float32)
+            
             # 텍스트 전처리
             processed_texts = [self._preprocess_text(text) for text in texts]
             
+            if self.worker_pool is not None:
+                return self.worker_pool.encode(processed_texts)
+            
             embeddings = self.local_model.encode(
                 processed_texts,
                 convert_to_tensor=False,
+                convert_to_numpy=True,
                 normalize_embeddings=True  # 코사인 유사도 최적화
             )
-            return embeddings.tolist()
+            # 파이썬 float 리스트로 바꾸지 않고 연속된 float32 행렬로 유지
+            return np.ascontiguousarray(embeddings, dtype=np.float32)
             
         except Exception as e:
             print(f"❌ 로컬 임베딩 생성 실패: {e}")
             raise
     
+    def close(self):
+        """임베딩 워커 종료"""
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+            self.worker_pool = None
+    
     def _preprocess_text(self, text: str) -> str:
         """텍스트 전처리"""
         # 불필요한 공백 제거
@@ -56,28 +101,21 @@ class EmbeddingService:
         text = text.strip()
         return text
     
-    def get_single_embedding(self, text: str) -> List[float]:
-        """단일 텍스트에 대한 임베딩 생성"""
+    def get_single_embedding(self, text: str) -> np.ndarray:
+        """단일 텍스트에 대한 임베딩 생성 (반복 질문은 캐시 사용)"""
+        key = self._preprocess_text(text)
+        cached = self.query_cache.get(key)
+        if cached is not MISSING:
+            return cached
+        
         embeddings = self.get_embeddings([text])
-        return embeddings[0] if embeddings else []
-    
-    def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
-        """두 임베딩 간의 코사인 유사도 계산"""
-        try:
-            vec1 = np.array(embedding1)
-            vec2 = np.array(embedding2)
-            
-            # 정규화
-            vec1_norm = vec1 / np.linalg.norm(vec1)
-            vec2_norm = vec2 / np.linalg.norm(vec2)
-            
-            # 코사인 유사도 계산
-            similarity = np.dot(vec1_norm, vec2_norm)
-            return float(similarity)
-            
-        except Exception as e:
-            print(f"❌ 유사도 계산 실패: {e}")
-            return 0.0
+        if not len(embeddings):
+            return np.empty(0, dtype=np.float32)
+        embedding = embeddings[0].copy()
+        # 캐시에 공유되는 벡터이므로 호출자가 수정하지 못하게 함
+        embedding.setflags(write=False)
+        self.query_cache.set(key, embedding)
+        return embedding
 
 
 # 전역 임베딩 서비스 인스턴스
@@ -0,0 +1,197 @@
+"""임베딩 전용 워커 프로세스 풀
+
+임베딩 모델(torch 또는 ONNX 백엔드)의 encode를 API 프로세스와 분리된 워커 프로세스에서 실행합니다.
+요청 텍스트는 파이프(로컬 IPC)로 보내고, 결과 임베딩은 워커별 공유 메모리 버퍼에
+float32로 기록하여 리스트를 pickle하지 않고 그대로 읽어 옵니다.
+
+spawn 방식으로 워커를 띄우므로 이 모듈은 app 서비스 모듈(전역 인스턴스)을 import하지 않습니다.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional
+
+import numpy as np
+
+from app.services.embedding_backends import load_embedding_model
+
+
+def _worker_main(conn, model_name: str, torch_threads: int, backend: str = "torch",
+                 onnx_model_path: str = "", onnx_model_file: str = "model.onnx"):
+    """워커 프로세스 진입점: 모델 로드 후 인코딩 요청 처리"""
+    # torch import 전에 스레드 수를 고정해야 OpenMP/MKL 스레드 풀에 반영됨
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(torch_threads)
+
+    shm = None
+    try:
+        model = load_embedding_model(backend, model_name, onnx_model_path, onnx_model_file, torch_threads)
+        conn.send(("ready", model.get_sentence_embedding_dimension()))
+
+        # 부모가 만든 공유 메모리 버퍼에 연결 (해제는 부모가 담당)
+        shm_name, capacity, dim = conn.recv()
+        shm = SharedMemory(name=shm_name)
+        output = np.ndarray((capacity, dim), dtype=np.float32, buffer=shm.buf)
+
+        while True:
+            texts = conn.recv()
+            if texts is None:
+                break
+            try:
+                embeddings = model.encode(texts, convert_to_tensor=False, normalize_embeddings=True)
+                output[:len(texts)] = embeddings
+                conn.send(("ok", len(texts)))
+            except Exception as e:
+                conn.send(("error", str(e)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    except Exception as e:
+        conn.send(("error", str(e)))
+    finally:
+        if shm is not None:
+            shm.close()
+        conn.close()
+
+
+class _Worker:
+    """워커 프로세스 하나와 그 파이프/공유 메모리"""
+
+    def __init__(self, context, model_name: str, torch_threads: int, capacity: int, backend_args: tuple = ()):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, model_name, torch_threads, *backend_args),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+        status, payload = self.conn.recv()
+        if status != "ready":
+            self.process.join(timeout=5)
+            raise RuntimeError(f"임베딩 워커 시작 실패: {payload}")
+
+        self.dim = payload
+        self.capacity = capacity
+        self.shm = SharedMemory(create=True, size=capacity * self.dim * 4)
+        self.output = np.ndarray((capacity, self.dim), dtype=np.float32, buffer=self.shm.buf)
+        self.conn.send((self.shm.name, capacity, self.dim))
+
+    def encode(self, texts: List[str], timeout: Optional[float] = None) -> np.ndarray:
+        """버퍼 용량 단위로 나누어 인코딩하고 공유 메모리에서 결과 복사 (배치당 timeout초 안에 응답이 없으면 TimeoutError)"""
+        result = np.empty((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), self.capacity):
+            batch = texts[start:start + self.capacity]
+            self.conn.send(batch)
+            if not self.conn.poll(timeout):
+                raise TimeoutError(f"임베딩 워커가 {timeout}초 안에 응답하지 않았습니다.")
+            status, payload = self.conn.recv()
+            if status != "ok":
+                raise RuntimeError(f"워커 임베딩 생성 실패: {payload}")
+            result[start:start + payload] = self.output[:payload]
+        return result
+
+    def close(self, force: bool = False):
+        """워커 종료 (force면 종료 요청 없이 바로 종료, 응답하지 않는 워커용)"""
+        if not force:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+        self.conn.close()
+        # numpy 뷰가 버퍼를 참조하고 있으면 close가 실패하므로 먼저 해제
+        self.output = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+class EmbeddingWorkerPool:
+    """임베딩 워커 프로세스 풀 (워커 하나는 한 번에 한 요청만 처리)"""
+
+    def __init__(self, num_workers: int, model_name: str, torch_threads: int = 1, capacity: int = 256,
+                 backend: str = "torch", onnx_model_path: str = "", onnx_model_file: str = "model.onnx",
+                 timeout: Optional[float] = None):
+        self.model_name = model_name
+        self.torch_threads = torch_threads
+        self.capacity = capacity
+        self.backend = backend
+        self.timeout = timeout  # 워커 대기/배치 인코딩 제한 시간 (None이면 무제한)
+        self._backend_args = (backend, onnx_model_path, onnx_model_file)
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: List[_Worker] = []
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.restarts = 0
+
+        for _ in range(num_workers):
+            self._start_worker()
+        print(f"✅ 임베딩 워커 {num_workers}개 시작 ({model_name}, {backend} 백엔드, 스레드 {torch_threads}개)")
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._workers[0].dim if self._workers else None
+
+    def _start_worker(self) -> _Worker:
+        worker = _Worker(self._context, self.model_name, self.torch_threads, self.capacity, self._backend_args)
+        with self._lock:
+            self._workers.append(worker)
+        self._idle.put(worker)
+        return worker
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """쉬고 있는 워커에 인코딩 요청 (모두 사용 중이면 timeout초까지 대기)"""
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"{self.timeout}초 동안 쉬고 있는 임베딩 워커가 없습니다.")
+        try:
+            result = worker.encode(texts, timeout=self.timeout)
+            self.requests += 1
+        except TimeoutError as e:
+            # 응답하지 않는 워커는 공유 메모리 상태를 믿을 수 없으므로 강제 종료 후 교체
+            print(f"⚠️ 임베딩 워커가 응답하지 않아 다시 시작합니다: {e}")
+            self._replace_worker(worker, force=True)
+            raise
+        except (EOFError, BrokenPipeError, ConnectionResetError) as e:
+            # 워커 프로세스가 죽었으면 새 워커로 교체
+            print(f"⚠️ 임베딩 워커가 종료되어 다시 시작합니다: {e}")
+            self._replace_worker(worker)
+            raise RuntimeError("임베딩 워커가 비정상 종료되었습니다.") from e
+        except Exception:
+            self._idle.put(worker)
+            raise
+        self._idle.put(worker)
+        return result
+
+    def _replace_worker(self, worker: _Worker, force: bool = False):
+        """워커를 종료하고 새 워커로 교체"""
+        with self._lock:
+            self._workers.remove(worker)
+        worker.close(force=force)
+        self.restarts += 1
+        self._start_worker()
+
+    def close(self):
+        """모든 워커 종료 및 공유 메모리 해제"""
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+
+    def get_stats(self):
+        return {
+            "workers": len(self._workers),
+            "backend": self.backend,
+            "idle": self._idle.qsize(),
+            "torch_threads": self.torch_threads,
+            "requests": self.requests,
+            "restarts": self.restarts
+        }
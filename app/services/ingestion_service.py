@@ -0,0 +1,295 @@
+import json
+import os
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+from app.core.config import settings
+from app.core.collections import collection_manager
+from app.core.database import vector_db
+from app.services.embedding_service import embedding_service
+from app.services.dedup_service import dedup_service
+from app.services.document_loader import document_loader
+
+
+class IngestionService:
+    """문서 수집 파이프라인 (중복 제거 → 임베딩 → 저장)"""
+
+    def __init__(self):
+        self.vector_db = vector_db
+        self.collection_manager = collection_manager
+        self.embedding_service = embedding_service
+        self.dedup_service = dedup_service
+        self.document_loader = document_loader
+        self.pdf_page_state_path = settings.pdf_page_state_path
+        self._pdf_page_state_lock = threading.Lock()
+
+    def ingest_documents(self, documents: List[Any], collection: Optional[str] = None,
+                         replace_file: Optional[str] = None, replace_pages: Optional[List[int]] = None,
+                         replace_files: Optional[List[str]] = None) -> Dict[str, Any]:
+        """청크 목록을 중복 제거 후 임베딩하여 벡터 데이터베이스에 저장 (collection 미지정 시 기본 컬렉션)
+
+        replace_file을 주면 임베딩이 끝난 뒤 그 파일(replace_pages를 주면 해당 페이지)의 기존 청크를 제거하고 저장하므로,
+        임베딩에 실패해도 기존 청크가 남습니다. 여러 파일의 청크를 한 번에 저장할 때는 replace_files를 사용합니다.
+        """
+        try:
+            db = self.collection_manager.get(collection, create=True)
+            stats = {
+                "input_chunks": len(documents),
+                "stored_chunks": 0,
+                "duplicates_removed": 0,
+                "replaced_chunks": 0,
+                "embedding_time_ms": 0.0,
+                "embedding_time_saved_ms": 0.0
+            }
+
+            def replaced(entry: Dict[str, Any]) -> bool:
+                """곧 제거될 기존 출처인지"""
+                if replace_files and entry.get("file_path") in replace_files:
+                    return True
+                return (
+                    replace_file is not None and entry.get("file_path") == replace_file
+                    and (replace_pages is None or entry.get("page") in replace_pages)
+                )
+
+            def remove_replaced():
+                for file_path in replace_files or []:
+                    stats["replaced_chunks"] += db.delete_by_file(file_path)
+                if replace_file is None:
+                    return
+                if replace_pages is None:
+                    stats["replaced_chunks"] += db.delete_by_file(replace_file)
+                else:
+                    stats["replaced_chunks"] += sum(db.delete_by_file(replace_file, page=page) for page in replace_pages)
+
+            # 유사 중복 청크 병합 (배치 내부 → 이미 저장된 청크, 교체될 청크는 비교 대상에서 제외)
+            matches: Dict[str, List[Dict[str, Any]]] = {}
+            if documents and settings.dedup_enabled:
+                documents, dedup_stats = self.dedup_service.deduplicate(documents)
+                unique_chunks = len(documents)
+                documents, matches = self.dedup_service.match_stored(documents, db, replaced)
+                stats["duplicates_removed"] = dedup_stats["duplicates_removed"] + unique_chunks - len(documents)
+
+            if not documents:
+                remove_replaced()
+                db.attach_sources(matches)
+                if matches:
+                    print(f"📥 {stats['input_chunks']}개 청크가 모두 저장된 청크와 중복되어 출처만 추가했습니다.")
+                return stats
+
+            texts = [doc.page_content for doc in documents]
+            metadatas = [doc.metadata for doc in documents]
+
+            # 임베딩 생성
+            started = time.perf_counter()
+            embeddings = self.embedding_service.get_embeddings(texts)
+            embedding_seconds = time.perf_counter() - started
+
+            # 기존 청크 제거 후 벡터 데이터베이스에 저장
+            remove_replaced()
+            db.add_documents(texts, embeddings, metadatas)
+            db.attach_sources(matches)
+            self.collection_manager.refresh_memory(db.name)
+
+            # 제거된 청크 수 × 청크당 임베딩 시간으로 절약 시간 추정
+            per_chunk_ms = embedding_seconds * 1000 / len(texts)
+            stats.update({
+                "stored_chunks": len(texts),
+                "embedding_time_ms": round(embedding_seconds * 1000, 2),
+                "embedding_time_saved_ms": round(per_chunk_ms * stats["duplicates_removed"], 2)
+            })
+
+            print(
+                f"📥 {stats['input_chunks']}개 청크 중 {stats['stored_chunks']}개 저장 "
+                f"(중복 {stats['duplicates_removed']}개 제거, "
+                f"임베딩 약 {stats['embedding_time_saved_ms']}ms 절약)"
+            )
+            return stats
+
+        except Exception as e:
+            print(f"❌ 문서 수집 실패: {e}")
+            raise
+
+    def ingest_file(self, file_path: str, directory: str = "", collection: Optional[str] = None) -> Dict[str, Any]:
+        """단일 파일만 로드하여 기존 청크를 교체 (디렉토리 전체 재스캔 없음)"""
+        try:
+            if file_path.lower().endswith(".pdf"):
+                return self._ingest_pdf(file_path, directory, collection)
+
+            started = time.perf_counter()
+
+            # 문서 로드 및 청킹
+            chunks = self.document_loader.load_file(file_path, directory)
+            loaded = time.perf_counter()
+
+            # 임베딩 후 같은 파일의 이전 청크를 교체
+            stats = self.ingest_documents(chunks, collection, replace_file=file_path)
+            finished = time.perf_counter()
+
+            stats.update({
+                "file_path": file_path,
+                "load_time_ms": round((loaded - started) * 1000, 2),
+                "index_time_ms": round((finished - loaded) * 1000, 2)
+            })
+            return stats
+
+        except Exception as e:
+            print(f"❌ {file_path} 수집 실패: {e}")
+            raise
+
+    def ingest_directory(self, directory: str, collection: Optional[str] = None) -> Dict[str, Any]:
+        """디렉토리의 문서를 파일 단위로 교체 색인 (PDF는 페이지 단위 스트리밍, 실패한 파일은 건너뜀)"""
+        stats = {
+            "processed_files": [],
+            "failed_files": {},
+            "stored_chunks": 0,
+            "duplicates_removed": 0,
+            "embedding_time_saved_ms": 0.0
+        }
+        for file_path in self.document_loader.list_document_files(directory):
+            try:
+                file_stats = self.ingest_file(file_path, directory, collection)
+            except Exception as e:
+                stats["failed_files"][file_path] = str(e)
+                continue
+            if file_stats.get("timed_out"):
+                # 읽은 페이지까지는 저장되었고, 다음 색인 때 나머지 페이지를 이어서 처리
+                stats["failed_files"][file_path] = "PDF 추출 시간 제한 초과 (일부 페이지만 색인)"
+            else:
+                stats["processed_files"].append(os.path.basename(file_path))
+            for key in ("stored_chunks", "duplicates_removed", "embedding_time_saved_ms"):
+                stats[key] += file_stats[key]
+
+        print(
+            f"📊 {directory}: {len(stats['processed_files'])}개 파일에서 청크 {stats['stored_chunks']}개 저장, "
+            f"실패 {len(stats['failed_files'])}개"
+        )
+        return stats
+
+    def _ingest_pdf(self, file_path: str, directory: str, collection: Optional[str]) -> Dict[str, Any]:
+        """PDF를 페이지 단위로 스트리밍 색인 (내용이 바뀐 페이지만 다시 추출/임베딩)"""
+        started = time.perf_counter()
+        db = self.collection_manager.get(collection, create=True)
+
+        known_hashes = db.get_page_hashes(file_path)
+        # 페이지 단위 색인 이전에 저장된 청크는 해시 비교가 불가능하므로 첫 배치 저장 시 전체 교체
+        replace_all = None in known_hashes.values()
+        empty_hashes: Dict[int, str] = {}
+        if replace_all:
+            known_hashes = {}
+        else:
+            # 텍스트가 없는 페이지는 청크가 없어 해시가 청크 메타데이터에 남지 않으므로 별도 기록에서 읽음
+            empty_hashes = self._load_empty_pdf_pages(db.name, file_path)
+            known_hashes = {**empty_hashes, **known_hashes}
+        empty_pages: Dict[int, str] = {}  # 이번 색인에서 확인한 텍스트 없는 페이지
+
+        stats = {
+            "input_chunks": 0,
+            "stored_chunks": 0,
+            "duplicates_removed": 0,
+            "replaced_chunks": 0,
+            "embedding_time_ms": 0.0,
+            "embedding_time_saved_ms": 0.0
+        }
+        pages = {"pages": 0, "pages_skipped": 0, "pages_changed": 0, "pages_removed": 0, "timed_out": False}
+        buffer: List[Any] = []
+        replace_pages: List[int] = []  # 버퍼 저장 시 기존 청크를 교체할 페이지
+        index_seconds = 0.0
+
+        def flush():
+            nonlocal index_seconds, replace_all
+            flush_started = time.perf_counter()
+            # 임베딩이 끝난 뒤 바뀐 페이지의 기존 청크를 제거하고 저장
+            batch_stats = self.ingest_documents(
+                buffer, db.name, replace_file=file_path,
+                replace_pages=None if replace_all else list(replace_pages)
+            )
+            index_seconds += time.perf_counter() - flush_started
+            for key in stats:
+                stats[key] += batch_stats[key]
+            buffer.clear()
+            replace_pages.clear()
+            replace_all = False
+
+        for page in self.document_loader.iter_pdf_pages(file_path, directory, known_hashes):
+            if page.get("timed_out"):
+                # 읽지 못한 페이지의 기존 청크는 다음 색인 때까지 유지
+                pages["timed_out"] = True
+                break
+            pages["pages"] += 1
+            if page["chunks"] is None:
+                pages["pages_skipped"] += 1
+                if empty_hashes.get(page["page"]) == page["page_hash"]:
+                    empty_pages[page["page"]] = page["page_hash"]
+                continue
+            if not page["chunks"]:
+                empty_pages[page["page"]] = page["page_hash"]
+
+            pages["pages_changed"] += 1
+            if page["page"] in known_hashes:
+                replace_pages.append(page["page"])
+            buffer.extend(page["chunks"])
+            if len(buffer) >= settings.pdf_ingest_batch_chunks:
+                flush()
+        if buffer or replace_pages or (replace_all and not pages["timed_out"]):
+            flush()
+
+        if not pages["timed_out"]:
+            # 줄어든 페이지의 청크 제거
+            removed = [p for p in known_hashes if p >= pages["pages"]]
+            if removed:
+                pages["pages_removed"] = len(removed)
+                stats["replaced_chunks"] += db.delete_by_file(file_path, from_page=pages["pages"])
+        else:
+            # 읽지 못한 페이지의 기록은 유지
+            empty_pages.update({
+                page: page_hash for page, page_hash in empty_hashes.items() if page >= pages["pages"]
+            })
+        # 모든 배치를 저장한 뒤에 기록 (중간에 실패하면 다음 색인에서 다시 확인)
+        self._save_empty_pdf_pages(db.name, file_path, empty_pages)
+
+        finished = time.perf_counter()
+        stats.update(pages)
+        stats.update({
+            "file_path": file_path,
+            "load_time_ms": round((finished - started - index_seconds) * 1000, 2),
+            "index_time_ms": round(index_seconds * 1000, 2)
+        })
+        print(
+            f"📑 {file_path}: {pages['pages']}페이지 중 {pages['pages_changed']}페이지 색인, "
+            f"{pages['pages_skipped']}페이지 변경 없음"
+            + (" (추출 시간 제한으로 중단)" if pages["timed_out"] else "")
+        )
+        return stats
+
+    def _load_pdf_page_state(self) -> Dict[str, Dict[str, str]]:
+        if not os.path.exists(self.pdf_page_state_path):
+            return {}
+        with open(self.pdf_page_state_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _load_empty_pdf_pages(self, collection: str, file_path: str) -> Dict[int, str]:
+        """텍스트가 없는 페이지의 내용 해시 ({페이지: 해시})"""
+        with self._pdf_page_state_lock:
+            entry = self._load_pdf_page_state().get(f"{collection}:{file_path}", {})
+        return {int(page): page_hash for page, page_hash in entry.items()}
+
+    def _save_empty_pdf_pages(self, collection: str, file_path: str, empty_pages: Dict[int, str]):
+        with self._pdf_page_state_lock:
+            state = self._load_pdf_page_state()
+            key = f"{collection}:{file_path}"
+            if empty_pages:
+                state[key] = {str(page): page_hash for page, page_hash in sorted(empty_pages.items())}
+            elif state.pop(key, None) is None:
+                return
+            directory = os.path.dirname(self.pdf_page_state_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = self.pdf_page_state_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(temp_path, self.pdf_page_state_path)
+
+
+# 전역 수집 서비스 인스턴스
+ingestion_service = IngestionService()
@@ -1,5 +1,7 @@
 from typing import List, Dict, Any
+import hashlib
 import google.generativeai as genai
+from app.core.cache import LRUCache, MISSING
 from app.core.config import settings
 
 
@@ -8,6 +10,10 @@ class LLMService:
     
     def __init__(self):
         self.model = None
+        self.answer_cache = LRUCache(
+            maxsize=settings.answer_cache_size,
+            ttl_seconds=settings.answer_cache_ttl_seconds
+        )
         self._initialize_models()
     
     def _initialize_models(self):
@@ -29,7 +35,34 @@ class LLMService:
             raise ValueError("LLM 모델이 초기화되지 않았습니다.")
             
         try:
-            return self._generate_gemini_answer(question, context_chunks)
+            # 같은 질문 + 같은 컨텍스트는 캐시된 답변 재사용
+            cache_key = self._cache_key(question, context_chunks)
+            cached = self.answer_cache.get(cache_key)
+            if cached is not MISSING:
+                return {**cached, "cached": True}
+            
+            response = self._generate_gemini_answer(question, context_chunks)
+            self.answer_cache.set(cache_key, response)
+            return {**response, "cached": False}
+                
+        except Exception as e:
+            print(f"❌ 답변 생성 실패: {e}")
+            raise
+    
+    async def agenerate_answer(self, question: str, context_chunks: List[str]) -> Dict[str, Any]:
+        """generate_answer의 비동기 버전 (Gemini 비동기 API를 사용하여 이벤트 루프를 막지 않음)"""
+        if not self.model:
+            raise ValueError("LLM 모델이 초기화되지 않았습니다.")
+            
+        try:
+            cache_key = self._cache_key(question, context_chunks)
+            cached = self.answer_cache.get(cache_key)
+            if cached is not MISSING:
+                return {**cached, "cached": True}
+            
+            response = await self._agenerate_gemini_answer(question, context_chunks)
+            self.answer_cache.set(cache_key, response)
+            return {**response, "cached": False}
                 
         except Exception as e:
             print(f"❌ 답변 생성 실패: {e}")
@@ -38,11 +71,29 @@ class LLMService:
     def _generate_gemini_answer(self, question: str, context_chunks: List[str]) -> Dict[str, Any]:
         """Google Gemini를 사용한 답변 생성"""
         try:
-            # 컨텍스트 조합
-            context = "\n\n".join(context_chunks)
+            response = self.model.generate_content(self._build_prompt(question, context_chunks))
+            return self._build_response(context_chunks, response.text)
+            
+        except Exception as e:
+            print(f"❌ Gemini 답변 생성 실패: {e}")
+            raise
+    
+    async def _agenerate_gemini_answer(self, question: str, context_chunks: List[str]) -> Dict[str, Any]:
+        """Google Gemini 비동기 API를 사용한 답변 생성"""
+        try:
+            response = await self.model.generate_content_async(self._build_prompt(question, context_chunks))
+            return self._build_response(context_chunks, response.text)
             
-            # 프롬프트 구성
-            prompt = f"""당신은 개발자를 위한 기술 문서 Q&A 어시스턴트입니다.
+        except Exception as e:
+            print(f"❌ Gemini 답변 생성 실패: {e}")
+            raise
+    
+    def _build_prompt(self, question: str, context_chunks: List[str]) -> str:
+        """컨텍스트와 질문으로 프롬프트 구성"""
+        # 컨텍스트 조합
+        context = "\n\n".join(context_chunks)
+        
+        return f"""당신은 개발자를 위한 기술 문서 Q&A 어시스턴트입니다.
 
 컨텍스트:
 {context}
@@ -50,23 +101,23 @@ class LLMService:
 질문: {question}
 
 위 컨텍스트를 기반으로 질문에 답변해주세요. 컨텍스트에 없는 정보는 언급하지 마시고, 명확하고 구조화된 답변을 제공해주세요."""
-            
-            response = self.model.generate_content(prompt)
-            answer = response.text
-            
-            # 신뢰도 평가
-            confidence = self._calculate_confidence(context_chunks, answer)
-            
-            return {
-                "answer": answer,
-                "confidence": confidence,
-                "model": "Google Gemini 1.5 Flash",
-                "sources_used": len(context_chunks)
-            }
-            
-        except Exception as e:
-            print(f"❌ Gemini 답변 생성 실패: {e}")
-            raise
+    
+    def _build_response(self, context_chunks: List[str], answer: str) -> Dict[str, Any]:
+        """생성된 답변에 신뢰도와 모델 정보 추가"""
+        return {
+            "answer": answer,
+            "confidence": self._calculate_confidence(context_chunks, answer),
+            "model": "Google Gemini 1.5 Flash",
+            "sources_used": len(context_chunks)
+        }
+    
+    def _cache_key(self, question: str, context_chunks: List[str]) -> str:
+        """정규화된 질문과 컨텍스트 내용으로 캐시 키 생성"""
+        digest = hashlib.sha256(' '.join(question.lower().split()).encode("utf-8"))
+        for chunk in context_chunks:
+            digest.update(b"\x00")
+            digest.update(chunk.encode("utf-8"))
+        return digest.hexdigest()
     
     def _calculate_confidence(self, context_chunks: List[str], answer: str) -> float:
         """답변의 신뢰도 계산 (간단한 휴리스틱)"""
@@ -103,7 +154,8 @@ class LLMService:
                     "status": "available"
                 }
             ],
-            "default_model": "Google Gemini 1.5 Flash"
+            "default_model": "Google Gemini 1.5 Flash",
+            "answer_cache": self.answer_cache.get_stats()
         }
 
 
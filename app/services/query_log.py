@@ -0,0 +1,172 @@
+import asyncio
+import json
+import os
+import re
+import time
+from collections import Counter
+from typing import List, Dict, Any, Optional
+
+from app.core.config import settings
+
+
+class QueryLogService:
+    """질의 로그 서비스 (비동기 배치 기록 + 빈도 분석)
+
+    요청 처리 경로에서는 큐에 넣기만 하고, 백그라운드 작업이 모아서 JSONL 파일에 기록합니다.
+    큐가 가득 차면 요청을 막지 않고 해당 로그를 버립니다.
+    """
+
+    def __init__(self):
+        self.path = settings.query_log_path
+        self.enabled = settings.query_log_enabled
+        self.written = 0
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """백그라운드 기록 작업 시작"""
+        if not self.enabled or self._task is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=settings.query_log_queue_size)
+        self._task = asyncio.create_task(self._writer())
+        print(f"📝 질의 로그 기록 시작: {self.path}")
+
+    async def stop(self):
+        """남은 로그를 기록하고 작업 종료"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self._flush(self._drain(self._queue.qsize()))
+
+    def record(self, entry: Dict[str, Any]):
+        """질의 기록 요청 (블로킹 없음, 다른 스레드에서 호출해도 안전)"""
+        if self._queue is None:
+            return
+        entry.setdefault("ts", time.time())
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._enqueue(entry)
+        else:
+            self._loop.call_soon_threadsafe(self._enqueue, entry)
+
+    def _enqueue(self, entry: Dict[str, Any]):
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _writer(self):
+        """배치 크기 또는 flush 주기마다 모아서 기록"""
+        batch: List[Dict[str, Any]] = []
+        try:
+            while True:
+                batch.append(await self._queue.get())
+                deadline = time.monotonic() + settings.query_log_flush_interval_seconds
+                while len(batch) < settings.query_log_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+                pending, batch = batch, []
+                await self._flush(pending)
+        except asyncio.CancelledError:
+            # 종료 시 모으던 로그까지 기록
+            await self._flush(batch)
+            raise
+
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        """파일 쓰기는 스레드 풀에서 실행"""
+        if not batch:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._write_batch, batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            print(f"❌ 질의 로그 기록 실패: {e}")
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        # 최대 크기를 넘으면 이전 로그를 .1로 회전
+        if os.path.exists(self.path) and os.path.getsize(self.path) > settings.query_log_max_bytes:
+            os.replace(self.path, self.path + ".1")
+        lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in batch)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """빈도 집계용 질문 정규화 (소문자, 공백 정리, 끝 문장부호 제거)"""
+        question = ' '.join(question.lower().split())
+        return re.sub(r'[\s?!.。？！]+$', '', question)
+
+    def mine_frequent_queries(self, limit: int = 50, path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """로그에서 가장 자주 나온 질의 추출 (회전된 이전 로그 포함)"""
+        path = path or self.path
+        counter: Counter = Counter()
+        samples: Dict[str, Dict[str, Any]] = {}
+        raw_forms: Dict[str, Counter] = {}
+
+        for log_path in (path + ".1", path):
+            if not os.path.exists(log_path):
+                continue
+            with open(log_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if entry.get("status") != "ok" or not entry.get("question"):
+                        continue
+                    key = json.dumps(
+                        [entry["question"], entry.get("max_results", 5), entry.get("filters"), entry.get("collection")],
+                        sort_keys=True, ensure_ascii=False
+                    )
+                    counter[key] += 1
+                    samples.setdefault(key, {
+                        "max_results": entry.get("max_results", 5),
+                        "filters": entry.get("filters"),
+                        "collection": entry.get("collection")
+                    })
+                    # 캐시 키와 맞추기 위해 가장 많이 쓰인 원문 형태로 예열
+                    raw_forms.setdefault(key, Counter())[entry.get("raw_question") or entry["question"]] += 1
+
+        return [
+            {"question": raw_forms[key].most_common(1)[0][0], **samples[key], "count": count}
+            for key, count in counter.most_common(limit)
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "written": self.written,
+            "dropped": self.dropped,
+            "pending": self._queue.qsize() if self._queue is not None else 0
+        }
+
+
+# 전역 질의 로그 서비스 인스턴스
+query_log_service = QueryLogService()
@@ -1,6 +1,12 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import json
 import re
-from app.core.database import vector_db
+from app.core.cache import LRUCache, MISSING
+from app.core.config import settings
+from app.core.collections import collection_manager
+from app.core.database import (
+    VectorDatabase, CollectionNotFoundError, chunk_sources, filter_condition, source_metadata, vector_db
+)
 from app.services.embedding_service import embedding_service
 
 
@@ -9,34 +15,73 @@ class SearchService:
     
     def __init__(self):
         self.vector_db = vector_db
+        self.collection_manager = collection_manager
         self.embedding_service = embedding_service
+        self.result_cache = LRUCache(
+            maxsize=settings.search_cache_size,
+            ttl_seconds=settings.search_cache_ttl_seconds
+        )
     
-    def search_documents(self, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    def search_documents(self, query: str, max_results: int = 5, filters: Optional[Dict[str, Any]] = None,
+                         collection: Optional[str] = None) -> List[Dict[str, Any]]:
         """질문에 대한 관련 문서 검색 (개선된 버전)"""
+        results, _ = self.search_documents_with_status(query, max_results, filters, collection)
+        return results
+    
+    def search_documents_with_status(self, query: str, max_results: int = 5,
+                                     filters: Optional[Dict[str, Any]] = None,
+                                     collection: Optional[str] = None) -> Tuple[List[Dict[str, Any]], bool]:
+        """관련 문서 검색 결과와 캐시 적중 여부 반환 (collection 미지정 시 기본 컬렉션)"""
+        db = self.collection_manager.get(collection)
+        
+        # 메타데이터 필터를 where 절로 변환
+        where = self._build_where_clause(filters)
+        
+        # 질문 전처리
+        processed_query = self._preprocess_query(query)
+        
+        # 인덱스가 변경되면(generation 증가) 이전 캐시 항목은 자연히 무효화
+        cache_key = (
+            db.name,
+            processed_query,
+            max_results,
+            json.dumps(where, sort_keys=True),
+            db.generation
+        )
+        cached = self.result_cache.get(cache_key)
+        if cached is not MISSING:
+            return cached, True
+        
+        results = self._search_documents(db, query, processed_query, max_results, where)
+        self.result_cache.set(cache_key, results)
+        return results, False
+    
+    def _search_documents(self, db: VectorDatabase, query: str, processed_query: str, max_results: int,
+                          where: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """캐시를 거치지 않은 문서 검색"""
         try:
-            # 질문 전처리
-            processed_query = self._preprocess_query(query)
-            
             # 질문을 임베딩으로 변환
             query_embedding = self.embedding_service.get_single_embedding(processed_query)
             
-            if not query_embedding:
+            if query_embedding is None or not len(query_embedding):
                 raise ValueError("질문 임베딩 생성에 실패했습니다.")
             
             # 벡터 데이터베이스에서 유사한 문서 검색 (더 많은 결과 가져오기)
-            initial_results = self.vector_db.search(
+            initial_results = db.search(
                 query_embedding=query_embedding,
-                n_results=min(max_results * 3, 20)  # 더 많은 후보 검색
+                n_results=min(max_results * 3, 20),  # 더 많은 후보 검색
+                where=where
             )
             
             # 결과 포맷팅 및 초기 점수 계산
             formatted_results = []
             if initial_results and 'documents' in initial_results:
+                ids = initial_results['ids'][0]
                 documents = initial_results['documents'][0]
                 metadatas = initial_results.get('metadatas', [[]])[0]
                 distances = initial_results.get('distances', [[]])[0]
                 
-                for i, (doc, metadata, distance) in enumerate(zip(documents, metadatas, distances)):
+                for i, (doc_id, doc, metadata, distance) in enumerate(zip(ids, documents, metadatas, distances)):
                     # 키워드 매칭 점수 계산
                     keyword_score = self._calculate_keyword_score(query, doc)
                     
@@ -47,8 +92,10 @@ class SearchService:
                     combined_score = (vector_score * 0.7) + (keyword_score * 0.3)
                     
                     formatted_results.append({
+                        "id": doc_id,
                         "content": doc,
-                        "metadata": metadata or {},
+                        "metadata": source_metadata(metadata),
+                        "sources": chunk_sources(metadata),  # 유사 중복으로 병합된 모든 출처
                         "distance": distance,
                         "vector_score": vector_score,
                         "keyword_score": keyword_score,
@@ -74,6 +121,37 @@ class SearchService:
             print(f"❌ 문서 검색 실패: {e}")
             raise
     
+    def _build_where_clause(self, filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """검색 필터를 Chroma where 절로 변환 (병합 청크는 어느 출처와 일치해도 포함)"""
+        if not filters:
+            return None
+        
+        conditions = []
+        
+        source_file = filters.get("source_file")
+        if source_file:
+            conditions.append(filter_condition("source_file", source_file))
+        
+        file_extension = filters.get("file_extension")
+        if file_extension:
+            extension = file_extension.lower()
+            if not extension.startswith("."):
+                extension = "." + extension
+            conditions.append(filter_condition("file_extension", extension))
+        
+        path_prefix = filters.get("path_prefix")
+        if path_prefix:
+            # 디렉토리 깊이별 메타데이터 키와 등호 비교
+            parts = [part for part in path_prefix.replace("\\", "/").split("/") if part not in (".", "")]
+            if parts:
+                conditions.append(filter_condition(f"dir_{len(parts) - 1}", "/".join(parts)))
+        
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
+    
     def _preprocess_query(self, query: str) -> str:
         """질문 전처리"""
         # 불필요한 공백 제거
@@ -131,16 +209,27 @@ class SearchService:
             print(f"❌ 관련 문서 청크 검색 실패: {e}")
             return []
     
-    def search_by_keywords(self, keywords: List[str], max_results: int = 5) -> List[Dict[str, Any]]:
+    def search_by_keywords(self, keywords: List[str], max_results: int = 5, filters: Optional[Dict[str, Any]] = None,
+                           collection: Optional[str] = None) -> List[Dict[str, Any]]:
         """키워드 기반 검색"""
+        results, _ = self.search_by_keywords_with_status(keywords, max_results, filters, collection)
+        return results
+    
+    def search_by_keywords_with_status(self, keywords: List[str], max_results: int = 5,
+                                       filters: Optional[Dict[str, Any]] = None,
+                                       collection: Optional[str] = None) -> Tuple[List[Dict[str, Any]], bool]:
+        """키워드 기반 검색 결과와 캐시 적중 여부 반환"""
         try:
             # 키워드를 하나의 쿼리로 결합
             query = ' '.join(keywords)
-            return self.search_documents(query, max_results)
+            return self.search_documents_with_status(query, max_results, filters, collection)
             
+        except (ValueError, CollectionNotFoundError):
+            # 잘못된/없는 컬렉션은 호출 측에서 4xx로 응답하도록 전달
+            raise
         except Exception as e:
             print(f"❌ 키워드 검색 실패: {e}")
-            return []
+            return [], False
     
     def get_search_statistics(self) -> Dict[str, Any]:
         """검색 통계 정보"""
@@ -148,13 +237,23 @@ class SearchService:
             db_info = self.vector_db.get_collection_info()
             return {
                 "database_info": db_info,
+                "cache": {
+                    "embedding": self.embedding_service.query_cache.get_stats(),
+                    "search": self.result_cache.get_stats()
+                },
                 "embedding_model": "all-MiniLM-L6-v2",
+                "embedding_backend": settings.embedding_backend,
+                "embedding_workers": (
+                    self.embedding_service.worker_pool.get_stats()
+                    if self.embedding_service.worker_pool is not None else None
+                ),
                 "search_algorithm": "Hybrid Search (Vector + Keyword)",
                 "search_features": [
                     "벡터 유사도 검색",
                     "키워드 매칭",
                     "재순위화",
-                    "임계값 필터링"
+                    "임계값 필터링",
+                    "메타데이터 필터 (파일명/확장자/경로 접두사)"
                 ]
             }
         except Exception as e:
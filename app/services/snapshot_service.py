@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import time
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+from app.core.collections import collection_manager
+
+
+SNAPSHOT_FORMAT_VERSION = 1
+SUPPORTED_DTYPES = ("float32", "float16")
+
+
+class SnapshotService:
+    """인덱스 스냅샷 내보내기/가져오기 서비스
+
+    스냅샷은 ids, 문서, 메타데이터(JSON)와 연속된 임베딩 행렬을 담은 npz 파일이며,
+    가져올 때 임베딩 모델 추론 없이 그대로 적재합니다.
+    collection을 지정하지 않으면 기본 컬렉션을 대상으로 합니다.
+    """
+
+    def __init__(self):
+        self.collection_manager = collection_manager
+
+    def export_snapshot(
+        self,
+        path: str,
+        dtype: str = "float16",
+        collection: Optional[str] = None,
+        batch_size: int = 1000
+    ) -> Dict[str, Any]:
+        """컬렉션 전체를 스냅샷 파일로 내보내기"""
+        try:
+            if dtype not in SUPPORTED_DTYPES:
+                raise ValueError(f"지원하지 않는 임베딩 형식입니다: {dtype}")
+            if collection and not self.collection_manager.exists(collection):
+                raise ValueError(f"컬렉션이 존재하지 않습니다: {collection}")
+            db = self.collection_manager.get(collection)
+
+            started = time.perf_counter()
+            ids: List[str] = []
+            documents: List[str] = []
+            metadatas: List[str] = []
+            blocks: List[np.ndarray] = []
+
+            for batch in db.iter_records(
+                include=["documents", "metadatas", "embeddings"], batch_size=batch_size
+            ):
+                ids.extend(batch["ids"])
+                documents.extend(batch["documents"])
+                metadatas.extend(json.dumps(meta or {}, ensure_ascii=False) for meta in batch["metadatas"])
+                blocks.append(np.asarray(batch["embeddings"], dtype=dtype))
+
+            embeddings = np.ascontiguousarray(np.concatenate(blocks)) if blocks else np.empty((0, 0), dtype=dtype)
+            arrays = {
+                "ids": np.array(ids, dtype=np.str_),
+                "documents": np.array(documents, dtype=np.str_),
+                "metadatas": np.array(metadatas, dtype=np.str_),
+                "embeddings": embeddings
+            }
+            manifest = {
+                "format_version": SNAPSHOT_FORMAT_VERSION,
+                "collection_name": db.name,
+                "count": len(ids),
+                "dimension": int(embeddings.shape[1]) if len(ids) else 0,
+                "dtype": dtype,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "checksum": self._checksum(arrays)
+            }
+
+            # 쓰기 도중 실패해도 기존 스냅샷이 깨지지 않도록 임시 파일에 먼저 기록
+            temp_path = path + ".tmp.npz"
+            np.savez_compressed(temp_path, manifest=np.array(json.dumps(manifest)), **arrays)
+            os.replace(temp_path, path)
+
+            stats = {
+                **manifest,
+                "path": path,
+                "size_bytes": os.path.getsize(path),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+            print(f"📦 스냅샷 내보내기 완료: {path} ({len(ids)}개 청크, {stats['size_bytes']} bytes)")
+            return stats
+
+        except Exception as e:
+            print(f"❌ 스냅샷 내보내기 실패: {e}")
+            raise
+
+    def import_snapshot(
+        self,
+        path: str,
+        replace: bool = False,
+        collection: Optional[str] = None,
+        batch_size: int = 1000
+    ) -> Dict[str, Any]:
+        """스냅샷 파일을 검증한 뒤 임베딩 재계산 없이 일괄 적재 (없는 컬렉션은 생성)"""
+        try:
+            started = time.perf_counter()
+
+            with np.load(path) as data:
+                manifest = json.loads(str(data["manifest"]))
+                if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+                    raise ValueError(f"지원하지 않는 스냅샷 버전입니다: {manifest.get('format_version')}")
+
+                arrays = {name: data[name] for name in ("ids", "documents", "metadatas", "embeddings")}
+
+            if self._checksum(arrays) != manifest["checksum"]:
+                raise ValueError("스냅샷 체크섬이 일치하지 않습니다. 파일이 손상되었을 수 있습니다.")
+
+            db = self.collection_manager.get(collection, create=True)
+            if replace:
+                # 컬렉션을 다시 만들어 현재 HNSW 설정을 적용
+                db.recreate_collection()
+
+            ids = arrays["ids"].tolist()
+            documents = arrays["documents"].tolist()
+            metadatas = [json.loads(meta) for meta in arrays["metadatas"].tolist()]
+            embeddings = arrays["embeddings"]
+
+            for start in range(0, len(ids), batch_size):
+                end = start + batch_size
+                db.upsert_records(
+                    ids[start:end],
+                    documents[start:end],
+                    embeddings[start:end],
+                    metadatas[start:end]
+                )
+            # 적재한 만큼 메모리 추정치를 갱신하고 상한을 넘으면 다른 컬렉션을 내림
+            self.collection_manager.refresh_memory(db.name)
+
+            stats = {
+                "path": path,
+                "imported_chunks": len(ids),
+                "dimension": manifest["dimension"],
+                "dtype": manifest["dtype"],
+                "collection": db.name,
+                "source_collection": manifest["collection_name"],
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+            print(f"📦 스냅샷 가져오기 완료: {path} ({len(ids)}개 청크, {stats['elapsed_ms']}ms)")
+            return stats
+
+        except Exception as e:
+            print(f"❌ 스냅샷 가져오기 실패: {e}")
+            raise
+
+    @staticmethod
+    def _checksum(arrays: Dict[str, np.ndarray]) -> str:
+        """스냅샷 내용의 SHA-256 체크섬"""
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(arrays["embeddings"]).tobytes())
+        for name in ("ids", "documents", "metadatas"):
+            for value in arrays[name].tolist():
+                digest.update(value.encode("utf-8"))
+                digest.update(b"\x00")
+        return digest.hexdigest()
+
+
+# 전역 스냅샷 서비스 인스턴스
+snapshot_service = SnapshotService()
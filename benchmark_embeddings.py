@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+임베딩 백엔드 벤치마크 (torch vs ONNX)
+
+같은 텍스트로 백엔드별 초당 임베딩 수와 프로세스 시작 시간(import + 모델 로드 + 첫 인코딩)을 측정하고,
+ONNX 출력이 torch 출력과 허용 오차 안에서 일치하는지(코사인 유사도) 확인합니다.
+일치하지 않는 ONNX 모델이 있으면 종료 코드 1로 끝납니다.
+
+--export는 현재 sentence-transformers 모델을 ONNX_MODEL_PATH에 내보내고(torch, onnx 패키지 필요),
+--quantize를 함께 주면 int8 동적 양자화 모델(model_int8.onnx)도 만듭니다.
+
+사용법:
+    python benchmark_embeddings.py --export --quantize       # ONNX 모델 내보내기 + int8 양자화
+    python benchmark_embeddings.py                           # torch / onnx / onnx-int8 비교
+    python benchmark_embeddings.py --texts chunks.txt --batch-size 64 --threads 4 --json
+
+EMBEDDING_BACKEND=onnx, ONNX_MODEL_FILE=model_int8.onnx 처럼 .env에 설정하면 서버에 적용됩니다.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# 임베딩 서비스(전역 인스턴스)는 모델을 바로 로드하므로 백엔드 모듈만 사용
+from app.core.config import settings
+from app.services.embedding_backends import (
+    EMBEDDING_MODEL_NAME, ONNX_CONFIG_FILE, ONNX_TOKENIZER_FILE, load_embedding_model
+)
+
+INT8_MODEL_FILE = "model_int8.onnx"
+
+# 시작 시간 측정용 새 프로세스 (이미 import된 모듈의 영향을 받지 않도록)
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+from app.services.embedding_backends import load_embedding_model
+imported = time.perf_counter()
+model = load_embedding_model({backend!r}, {model_name!r}, {onnx_path!r}, {onnx_file!r}, {threads!r})
+loaded = time.perf_counter()
+model.encode(["warm up"])
+encoded = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "load_ms": (loaded - imported) * 1000,
+    "first_encode_ms": (encoded - loaded) * 1000
+}}))
+"""
+
+
+def export_onnx(output_dir, quantize):
+    """sentence-transformers 모델을 ONNX(토큰 임베딩 출력)로 내보내기"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    os.makedirs(output_dir, exist_ok=True)
+
+    class TokenEmbeddings(torch.nn.Module):
+        """pooling 전 토큰 임베딩만 반환 (pooling/정규화는 OnnxEmbeddingModel에서 수행)"""
+
+        def __init__(self, module):
+            super().__init__()
+            self.module = module
+
+        def forward(self, input_ids, attention_mask, token_type_ids=None):
+            return self.module(
+                input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+            )[0]
+
+    sample = tokenizer(["export sample sentence"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["token_embeddings"]}
+    model_path = os.path.join(output_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer),
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, ONNX_TOKENIZER_FILE))
+    with open(os.path.join(output_dir, ONNX_CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "model_name": EMBEDDING_MODEL_NAME,
+            "max_seq_length": model.max_seq_length,
+            "dimension": model.get_sentence_embedding_dimension(),
+            "pooling": "mean",
+            "normalize": True
+        }, f, indent=2)
+    print(f"✅ ONNX 모델 내보내기 완료: {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantized_path = os.path.join(output_dir, INT8_MODEL_FILE)
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        print(
+            f"✅ int8 양자화 완료: {quantized_path} "
+            f"({os.path.getsize(model_path) / 1e6:.1f}MB → {os.path.getsize(quantized_path) / 1e6:.1f}MB)"
+        )
+
+
+def load_texts(args):
+    """벤치마크용 텍스트 (파일이 없으면 길이가 다양한 합성 문장)"""
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+        return texts[:args.num_texts]
+
+    rng = np.random.default_rng(args.seed)
+    words = (
+        "api server request response cache index vector embedding query document chunk deploy "
+        "config token latency thread process memory database collection search answer model"
+    ).split()
+    return [
+        " ".join(rng.choice(words, size=int(rng.integers(5, 120))))
+        for _ in range(args.num_texts)
+    ]
+
+
+def measure_startup(backend, onnx_file, threads, repeats):
+    """새 프로세스에서 import + 모델 로드 + 첫 인코딩 시간 측정 (중앙값)"""
+    script = STARTUP_SCRIPT.format(
+        root=str(project_root), backend=backend, model_name=EMBEDDING_MODEL_NAME,
+        onnx_path=settings.onnx_model_path, onnx_file=onnx_file, threads=threads
+    )
+    runs = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True, cwd=str(project_root)
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        result["process_ms"] = (time.perf_counter() - started) * 1000
+        runs.append(result)
+    return {key: round(float(np.median([run[key] for run in runs])), 1) for key in runs[0]}
+
+
+def measure_throughput(model, texts, batch_size, repeats):
+    """초당 임베딩 수 (반복 중 최고값, 첫 배치로 예열)"""
+    model.encode(texts[:batch_size], batch_size=batch_size)
+    best = 0.0
+    embeddings = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        embeddings = model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+        best = max(best, len(texts) / (time.perf_counter() - started))
+    return round(best, 1), np.asarray(embeddings, dtype=np.float32)
+
+
+def compare(reference, embeddings, tolerance):
+    """torch 출력 대비 코사인 유사도와 최대 절대 오차"""
+    cosine = np.sum(reference * embeddings, axis=1) / np.maximum(
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(embeddings, axis=1), 1e-12
+    )
+    return {
+        "min_cosine": round(float(cosine.min()), 6),
+        "mean_cosine": round(float(cosine.mean()), 6),
+        "max_abs_diff": round(float(np.abs(reference - embeddings).max()), 6),
+        "passed": bool(cosine.min() >= tolerance)
+    }
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="임베딩 백엔드 벤치마크 (torch vs ONNX)")
+    parser.add_argument("--export", action="store_true", help="ONNX 모델을 ONNX_MODEL_PATH에 내보낸 뒤 벤치마크")
+    parser.add_argument("--quantize", action="store_true", help="--export 시 int8 동적 양자화 모델도 생성")
+    parser.add_argument("--texts", help="한 줄에 하나씩 텍스트가 적힌 파일 (기본: 합성 문장)")
+    parser.add_argument("--num-texts", type=int, default=1000, help="벤치마크 텍스트 수")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, help="백엔드 스레드 수 (기본: 라이브러리 기본값)")
+    parser.add_argument("--repeats", type=int, default=3, help="처리량 측정 반복 횟수")
+    parser.add_argument("--startup-repeats", type=int, default=3, help="시작 시간 측정 프로세스 수")
+    parser.add_argument("--tolerance", type=float, default=0.99, help="torch 대비 최소 코사인 유사도")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    if args.export:
+        export_onnx(settings.onnx_model_path, args.quantize)
+
+    texts = load_texts(args)
+    candidates = [("torch", "torch", "")]
+    for onnx_file, label in ((settings.onnx_model_file, "onnx"), (INT8_MODEL_FILE, "onnx-int8")):
+        if os.path.exists(os.path.join(settings.onnx_model_path, onnx_file)) \
+                and all(c[2] != onnx_file for c in candidates):
+            candidates.append((label, "onnx", onnx_file))
+    if len(candidates) == 1:
+        print(f"⚠️ ONNX 모델이 없습니다: {settings.onnx_model_path} (--export로 생성)")
+
+    rows, reference = [], None
+    for label, backend, onnx_file in candidates:
+        print(f"⏱️ {label} 측정 중...", file=sys.stderr)
+        model = load_embedding_model(
+            backend, EMBEDDING_MODEL_NAME, settings.onnx_model_path, onnx_file or "model.onnx", args.threads
+        )
+        throughput, embeddings = measure_throughput(model, texts, args.batch_size, args.repeats)
+        row = {
+            "backend": label,
+            "model_file": onnx_file or EMBEDDING_MODEL_NAME,
+            "embeddings_per_second": throughput,
+            "startup": measure_startup(backend, onnx_file or "model.onnx", args.threads, args.startup_repeats)
+        }
+        if reference is None:
+            reference = embeddings
+        else:
+            row["parity"] = compare(reference, embeddings, args.tolerance)
+        rows.append(row)
+        del model
+
+    failed = [row["backend"] for row in rows if not row.get("parity", {"passed": True})["passed"]]
+    if args.json:
+        print(json.dumps({"texts": len(texts), "batch_size": args.batch_size, "results": rows}, indent=2))
+    else:
+        print(f"\n📊 텍스트 {len(texts)}개, 배치 {args.batch_size}, 스레드 {args.threads or '기본'}")
+        print(f"   {'백엔드':<12}{'임베딩/s':>10}{'프로세스(ms)':>14}{'import(ms)':>12}{'로드(ms)':>10}{'최소 cos':>10}")
+        for row in rows:
+            parity = row.get("parity")
+            print(
+                f"   {row['backend']:<12}{row['embeddings_per_second']:>10,.1f}"
+                f"{row['startup']['process_ms']:>14,.0f}{row['startup']['import_ms']:>12,.0f}"
+                f"{row['startup']['load_ms']:>10,.0f}"
+                f"{(format(parity['min_cosine'], '.5f') if parity else '기준'):>10}"
+                + ("  ❌" if parity and not parity["passed"] else "")
+            )
+    if failed:
+        print(f"❌ torch 출력과 일치하지 않는 백엔드 (최소 코사인 < {args.tolerance}): {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
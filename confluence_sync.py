@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Confluence 증분 동기화 스크립트
+
+마지막 동기화 이후 버전이 바뀐 페이지만 가져와 다시 청킹/임베딩하고,
+스페이스에서 삭제된 페이지의 청크는 벡터 데이터베이스에서 제거합니다.
+주기적으로 실행하려면 cron 등에 등록하세요.
+
+사용법:
+    python confluence_sync.py                      # CONFLUENCE_SPACES 전체
+    python confluence_sync.py DEV OPS --collection team-platform
+    python confluence_sync.py DEV --full           # 버전과 관계없이 전체 재색인
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.services.confluence_loader import confluence_sync_service
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="Confluence 증분 동기화")
+    parser.add_argument("spaces", nargs="*", help="스페이스 키 (기본: CONFLUENCE_SPACES)")
+    parser.add_argument("--collection", help="색인할 컬렉션 (기본: DEFAULT_COLLECTION)")
+    parser.add_argument("--full", action="store_true", help="모든 페이지 재색인")
+    args = parser.parse_args()
+
+    if not settings.ingest_enabled:
+        print("❌ 이 인스턴스는 읽기 전용입니다 (INGEST_ENABLED=false).")
+        sys.exit(1)
+
+    try:
+        results = confluence_sync_service.sync_spaces(args.spaces or None, args.collection, args.full)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    if any(result["failed_pages"] for result in results):
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+HNSW 인덱스 파라미터 튜닝 도구
+
+현재 컬렉션의 임베딩으로 M / construction_ef / search_ef 조합별 HNSW 인덱스를 만들고,
+전수 검색 대비 recall@k, 질의 지연 시간(p50/p99), 인덱스 생성 시간을 비교합니다.
+다른 조합보다 모든 지표에서 뒤지지 않는 조합(파레토 최적)에 ★ 표시를 합니다.
+
+Chroma가 내부에서 사용하는 hnswlib로 직접 측정하므로, 실제 API 지연 시간에는
+Chroma의 고정 오버헤드(메타데이터 조회 등)가 더해집니다.
+
+사용법:
+    python hnsw_tuning.py --k 5 --queries 200
+    python hnsw_tuning.py --m 8,16,32 --construction-ef 64,100,200 --search-ef 10,50,100
+    python hnsw_tuning.py --questions questions.txt --json   # 실제 질문 사용 (임베딩 모델 로드)
+
+선택한 값은 .env의 HNSW_M / HNSW_CONSTRUCTION_EF / HNSW_SEARCH_EF에 설정한 뒤
+스냅샷을 --replace로 다시 가져오면 적용됩니다.
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+
+import hnswlib
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.core.database import vector_db
+
+
+def load_corpus():
+    """컬렉션의 모든 임베딩 로드"""
+    blocks = [batch["embeddings"] for batch in vector_db.iter_records(include=["embeddings"])]
+    return np.concatenate(blocks) if blocks else np.empty((0, 0), dtype=np.float32)
+
+
+def load_queries(args, vectors):
+    """질문 임베딩 또는 코퍼스에서 떼어낸 검증용 벡터 준비"""
+    if args.questions:
+        from app.services.embedding_service import embedding_service
+        questions = [line.strip() for line in open(args.questions, encoding="utf-8") if line.strip()]
+        return vectors, embedding_service.get_embeddings(questions)
+
+    # 질문 파일이 없으면 일부 청크를 인덱스에서 제외하고 질의로 사용
+    rng = np.random.default_rng(args.seed)
+    n_queries = min(args.queries, len(vectors) // 5)
+    held_out = rng.choice(len(vectors), size=n_queries, replace=False)
+    mask = np.ones(len(vectors), dtype=bool)
+    mask[held_out] = False
+    return vectors[mask], vectors[held_out]
+
+
+def exact_neighbors(vectors, queries, k, space):
+    """전수 검색 기준 정답 (거리 공간별)"""
+    if space == "l2":
+        scores = -(np.sum(vectors ** 2, axis=1)[None, :] - 2 * queries @ vectors.T)
+    elif space == "cosine":
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(queries, axis=1)[:, None]
+        scores = (queries @ vectors.T) / np.maximum(norms, 1e-12)
+    else:
+        scores = queries @ vectors.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+
+def build_index(vectors, space, m, construction_ef):
+    """HNSW 인덱스 생성 및 생성 시간 측정"""
+    started = time.perf_counter()
+    index = hnswlib.Index(space=space, dim=vectors.shape[1])
+    index.init_index(max_elements=len(vectors), M=m, ef_construction=construction_ef)
+    index.add_items(vectors, np.arange(len(vectors)))
+    return index, (time.perf_counter() - started) * 1000
+
+
+def evaluate(index, queries, exact_top, k, search_ef):
+    """recall@k와 질의 지연 시간 측정 (질의는 API처럼 하나씩 실행)"""
+    # hnswlib는 ef < k를 허용하지 않으므로 Chroma와 마찬가지로 k 이상으로 맞춤
+    index.set_ef(max(search_ef, k))
+    recalls, latencies = [], []
+    for query, expected in zip(queries, exact_top):
+        started = time.perf_counter()
+        labels, _ = index.knn_query(query, k=k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(len(set(labels[0].tolist()) & expected) / k)
+    return float(np.mean(recalls)), float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99))
+
+
+def mark_pareto(rows):
+    """recall은 높을수록, p99 지연과 생성 시간은 낮을수록 좋은 기준의 파레토 최적 표시"""
+    for row in rows:
+        row["pareto"] = not any(
+            other is not row
+            and other["recall_at_k"] >= row["recall_at_k"]
+            and other["p99_ms"] <= row["p99_ms"]
+            and other["build_ms"] <= row["build_ms"]
+            and (other["recall_at_k"], -other["p99_ms"], -other["build_ms"])
+            != (row["recall_at_k"], -row["p99_ms"], -row["build_ms"])
+            for other in rows
+        )
+
+
+def parse_ints(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="HNSW 인덱스 파라미터 튜닝")
+    parser.add_argument("--k", type=int, default=5, help="recall@k의 k")
+    parser.add_argument("--queries", type=int, default=200, help="검증용 질의 수 (질문 파일 미사용 시)")
+    parser.add_argument("--questions", help="한 줄에 하나씩 질문이 적힌 파일")
+    parser.add_argument("--space", default=settings.hnsw_space, choices=["l2", "cosine", "ip"])
+    parser.add_argument("--m", default="8,16,32", help="M 후보 목록")
+    parser.add_argument("--construction-ef", default="64,100,200", help="construction_ef 후보 목록")
+    parser.add_argument("--search-ef", default="10,50,100", help="search_ef 후보 목록")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    vectors = load_corpus()
+    if len(vectors) < 10:
+        print("❌ 튜닝하기에 컬렉션의 청크 수가 너무 적습니다.")
+        sys.exit(1)
+
+    vectors, queries = load_queries(args, vectors)
+    k = min(args.k, len(vectors))
+    print(f"📊 코퍼스 {len(vectors)}개 벡터 ({vectors.shape[1]}차원), 질의 {len(queries)}개, k={k}, space={args.space}")
+
+    exact_top = exact_neighbors(vectors, queries, k, args.space)
+    current = (settings.hnsw_m, settings.hnsw_construction_ef, settings.hnsw_search_ef)
+
+    rows = []
+    for m, construction_ef in itertools.product(parse_ints(args.m), parse_ints(args.construction_ef)):
+        # search_ef는 생성 후 바꿀 수 있으므로 인덱스 하나로 모든 후보를 측정
+        index, build_ms = build_index(vectors, args.space, m, construction_ef)
+        for search_ef in parse_ints(args.search_ef):
+            recall, p50, p99 = evaluate(index, queries, exact_top, k, search_ef)
+            rows.append({
+                "m": m,
+                "construction_ef": construction_ef,
+                "search_ef": search_ef,
+                "recall_at_k": round(recall, 4),
+                "p50_ms": round(p50, 3),
+                "p99_ms": round(p99, 3),
+                "build_ms": round(build_ms, 1),
+                "current": (m, construction_ef, search_ef) == current
+            })
+    mark_pareto(rows)
+
+    if args.json:
+        print(json.dumps({"space": args.space, "k": k, "corpus": len(vectors), "results": rows}, indent=2))
+        return
+
+    print(f"\n   {'M':>4}{'c_ef':>7}{'s_ef':>7}{'recall@k':>10}{'p50(ms)':>10}{'p99(ms)':>10}{'생성(ms)':>11}")
+    for row in rows:
+        mark = ("★" if row["pareto"] else " ") + ("←현재" if row["current"] else "")
+        print(
+            f"   {row['m']:>4}{row['construction_ef']:>7}{row['search_ef']:>7}"
+            f"{row['recall_at_k']:>10.4f}{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['build_ms']:>11.1f}  {mark}"
+        )
+    print("\n   ★ 파레토 최적 (recall↑, p99↓, 생성 시간↓ 기준으로 더 나은 조합이 없음)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+오프라인 대량 색인 스크립트
+
+서버를 거치지 않고 문서 디렉토리 전체를 벡터 데이터베이스에 색인합니다.
+문서 로드/청킹은 여러 프로세스에서 병렬로 처리하고, 임베딩과 저장은 배치 단위로 수행합니다.
+PDF는 서버 업로드와 같은 페이지 단위 스트리밍 색인을 사용하므로 바뀐 페이지만 다시 추출/임베딩합니다.
+완료한 파일과 배치를 체크포인트 파일에 주기적으로 기록하므로, 중단되더라도 같은 명령을
+다시 실행하면 이어서 진행합니다.
+
+ChromaDB 로컬 저장소는 여러 프로세스의 동시 쓰기를 지원하지 않으므로, 서버가 열어 둔
+CHROMA_PERSIST_DIRECTORY에 대해 실행하면 안 됩니다. (서버를 멈춘 뒤 실행하거나, 별도 디렉토리에
+색인한 뒤 스냅샷으로 옮기거나, CHROMA_MODE=http로 원격 서버에 색인)
+
+사용법:
+    python ingest.py                          # DOCUMENTS_DIR 색인 (체크포인트가 있으면 이어서 진행)
+    python ingest.py ./handbooks --workers 4 --batch-size 512
+    python ingest.py --collection team-payments   # COLLECTION_DOCUMENTS_DIR/team-payments를 해당 컬렉션에 색인
+    python ingest.py --fresh --replace        # 체크포인트를 무시하고 컬렉션을 비운 뒤 처음부터 색인
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# 로드 워커(spawn)가 이 모듈을 다시 import하므로 임베딩 모델/DB를 여는 모듈은 main()에서 import
+
+DEFAULT_CHECKPOINT = "./logs/ingest_checkpoint.json"
+
+
+def load_file_chunks(file_path, directory):
+    """로드 워커: 파일 하나를 로드하고 청킹 (PDF는 메인 프로세스에서 페이지 단위로 스트리밍하므로 None)"""
+    if file_path.lower().endswith(".pdf"):
+        return file_path, None, None
+    from app.services.document_loader import document_loader
+    try:
+        return file_path, document_loader.load_file(file_path, directory), None
+    except Exception as e:
+        return file_path, [], str(e)
+
+
+class Checkpoint:
+    """완료한 파일과 진행 중인 파일의 완료 배치 수를 기록하는 체크포인트"""
+
+    def __init__(self, path, directory, collection, batch_size):
+        self.path = path
+        self.data = {
+            "directory": os.path.abspath(directory),
+            "collection": collection,
+            "batch_size": batch_size,
+            "files_done": [],
+            "in_progress": {},
+            "failed": {},
+            "stats": {"chunks": 0, "duplicates_removed": 0}
+        }
+
+    def load(self):
+        """기존 체크포인트 로드 (디렉토리나 컬렉션이 다르면 사용하지 않음)"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        if (data.get("directory"), data.get("collection")) != (self.data["directory"], self.data["collection"]):
+            print(
+                f"⚠️ 체크포인트의 대상이 다릅니다 ({data.get('directory')}, {data.get('collection')}). "
+                "처음부터 색인합니다."
+            )
+            return False
+        if data.get("batch_size") != self.data["batch_size"]:
+            # 진행 중인 파일의 배치 경계를 맞추기 위해 이전 배치 크기를 유지
+            print(f"⚠️ 체크포인트의 배치 크기 {data['batch_size']}를 사용합니다.")
+        self.data = data
+        return True
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체하여 중단 시에도 체크포인트가 깨지지 않게 함"""
+        self.data["updated_at"] = time.time()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    @property
+    def batch_size(self):
+        return self.data["batch_size"]
+
+    def batches_done(self, file_path):
+        return self.data["in_progress"].get(file_path, 0)
+
+    def mark_batch(self, file_path, stats):
+        self.data["in_progress"][file_path] = self.batches_done(file_path) + 1
+        self.add_stats(stats)
+
+    def add_stats(self, stats):
+        self.data["stats"]["chunks"] += stats["stored_chunks"]
+        self.data["stats"]["duplicates_removed"] += stats["duplicates_removed"]
+
+    def mark_file(self, file_path):
+        self.data["in_progress"].pop(file_path, None)
+        self.data["failed"].pop(file_path, None)
+        self.data["files_done"].append(file_path)
+
+    def mark_failed(self, file_path, error):
+        self.data["failed"][file_path] = error
+
+
+class Progress:
+    """처리량과 남은 시간 표시 (진행률은 파일 크기 기준)"""
+
+    def __init__(self, total_files, total_bytes):
+        self.total_files = total_files
+        self.total_bytes = max(total_bytes, 1)
+        self.done_files = 0
+        self.done_bytes = 0
+        self.chunks = 0
+        self.started = time.perf_counter()
+
+    def update(self, chunks=0, file_bytes=0, file_done=False):
+        self.chunks += chunks
+        self.done_bytes += file_bytes
+        self.done_files += int(file_done)
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        ratio = self.done_bytes / self.total_bytes
+        rate = self.chunks / elapsed if elapsed > 0 else 0.0
+        eta = elapsed * (1 - ratio) / ratio if ratio > 0 else None
+        print(
+            f"⏳ 파일 {self.done_files}/{self.total_files} ({ratio:.1%}) | "
+            f"청크 {self.chunks:,}개 ({rate:,.1f}/s) | "
+            f"경과 {format_duration(elapsed)} | 남은 시간 {format_duration(eta) if eta is not None else '-'}"
+        )
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def iter_loaded(pool, files, directory, window):
+    """로드 결과를 파일 순서대로 반환 (메모리 사용을 제한하기 위해 window개까지만 미리 로드)"""
+    pending = deque()
+    files = iter(files)
+    for file_path in files:
+        pending.append(pool.apply_async(load_file_chunks, (file_path, directory)))
+        if len(pending) >= window:
+            break
+    while pending:
+        yield pending.popleft().get()
+        next_file = next(files, None)
+        if next_file is not None:
+            pending.append(pool.apply_async(load_file_chunks, (next_file, directory)))
+
+
+def ingest_file_batches(ingestion_service, db, checkpoint, progress, file_path, chunks):
+    """파일 하나의 청크를 배치 단위로 색인 (이미 완료한 배치는 건너뜀)"""
+    batch_size = checkpoint.batch_size
+    skip = checkpoint.batches_done(file_path)
+    if skip:
+        print(f"↪️ {file_path}: 완료된 배치 {skip}개 건너뜀")
+
+    # 청크가 없는 파일도 빈 배치 하나로 이전 색인 결과를 제거
+    batches = [chunks[start:start + batch_size] for start in range(0, len(chunks), batch_size)] or [[]]
+    for index in range(skip, len(batches)):
+        # 새로 시작하는 파일은 첫 배치의 임베딩이 끝난 뒤 이전 색인 결과를 교체 (임베딩 실패 시 기존 청크 유지)
+        stats = ingestion_service.ingest_documents(
+            batches[index], db.name, replace_file=file_path if index == 0 else None
+        )
+        checkpoint.mark_batch(file_path, stats)
+        checkpoint.save()
+        progress.update(chunks=stats["stored_chunks"])
+        progress.report()
+
+
+def ingest_pdf(ingestion_service, db, checkpoint, progress, file_path, directory):
+    """PDF 하나를 페이지 단위로 스트리밍 색인 (중단 후 다시 실행하면 저장된 페이지는 해시로 건너뜀)
+
+    추출 시간 제한으로 중단되면 읽은 페이지까지만 저장하고 실패로 기록하여 다음 실행에서 이어서 색인합니다.
+    """
+    stats = ingestion_service.ingest_file(file_path, directory, db.name)
+    checkpoint.add_stats(stats)
+    progress.update(chunks=stats["stored_chunks"])
+    progress.report()
+    return not stats.get("timed_out")
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="오프라인 대량 색인")
+    parser.add_argument("directory", nargs="?", help="문서 디렉토리 (기본: DOCUMENTS_DIR 또는 컬렉션별 문서 디렉토리)")
+    parser.add_argument("--collection", help="색인할 컬렉션 (기본: DEFAULT_COLLECTION)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="로드/청킹 프로세스 수")
+    parser.add_argument("--batch-size", type=int, default=256, help="임베딩/저장 배치당 청크 수")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="체크포인트 파일 경로")
+    parser.add_argument("--fresh", action="store_true", help="기존 체크포인트를 무시하고 처음부터 색인")
+    parser.add_argument("--replace", action="store_true", help="시작 전에 컬렉션을 비움 (--fresh와 함께 사용)")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    from app.core.collections import collection_manager, validate_collection_name
+    from app.services.document_loader import document_loader
+    from app.services.ingestion_service import ingestion_service
+
+    if not settings.ingest_enabled:
+        print("❌ 이 인스턴스는 읽기 전용입니다 (INGEST_ENABLED=false).")
+        sys.exit(1)
+
+    collection = validate_collection_name(args.collection) if args.collection else settings.default_collection
+    directory = args.directory or (
+        settings.documents_dir if collection == settings.default_collection
+        else os.path.join(settings.collection_documents_dir, collection)
+    )
+    if not os.path.isdir(directory):
+        print(f"❌ 문서 디렉토리가 존재하지 않습니다: {directory}")
+        sys.exit(1)
+
+    db = collection_manager.get(collection, create=True)
+    checkpoint = Checkpoint(args.checkpoint, directory, collection, args.batch_size)
+    resumed = not args.fresh and checkpoint.load()
+    if args.replace:
+        if resumed:
+            print("❌ 이어서 색인할 때는 --replace를 사용할 수 없습니다. --fresh와 함께 사용하세요.")
+            sys.exit(1)
+        db.clear_database()
+
+    done = set(checkpoint.data["files_done"])
+    files = sorted(f for f in document_loader.list_document_files(directory) if f not in done)
+    if not files:
+        print("✅ 색인할 파일이 없습니다.")
+        return
+
+    sizes = {f: os.path.getsize(f) for f in files}
+    progress = Progress(len(files), sum(sizes.values()))
+    print(
+        f"🚀 {'이어서 ' if resumed else ''}색인 시작: {len(files)}개 파일 "
+        f"(컬렉션 {collection}, 완료 {len(done)}개, 로드 프로세스 {args.workers}개, 배치 {checkpoint.batch_size}개)"
+    )
+
+    context = multiprocessing.get_context("spawn")
+    try:
+        with context.Pool(processes=args.workers) as pool:
+            for file_path, chunks, error in iter_loaded(pool, files, directory, window=args.workers * 2):
+                if error:
+                    print(f"❌ {file_path} 로딩 실패: {error}")
+                    checkpoint.mark_failed(file_path, error)
+                elif chunks is None:
+                    try:
+                        if ingest_pdf(ingestion_service, db, checkpoint, progress, file_path, directory):
+                            checkpoint.mark_file(file_path)
+                        else:
+                            checkpoint.mark_failed(file_path, "PDF 추출 시간 제한 초과 (읽은 페이지까지 색인)")
+                    except Exception as e:
+                        print(f"❌ {file_path} 색인 실패: {e}")
+                        checkpoint.mark_failed(file_path, str(e))
+                else:
+                    try:
+                        ingest_file_batches(ingestion_service, db, checkpoint, progress, file_path, chunks)
+                        checkpoint.mark_file(file_path)
+                    except Exception as e:
+                        print(f"❌ {file_path} 색인 실패: {e}")
+                        checkpoint.mark_failed(file_path, str(e))
+                checkpoint.save()
+                progress.update(file_bytes=sizes[file_path], file_done=True)
+    except KeyboardInterrupt:
+        checkpoint.save()
+        print(f"\n⏸️ 중단되었습니다. 같은 명령을 다시 실행하면 이어서 색인합니다. ({args.checkpoint})")
+        sys.exit(130)
+
+    stats = checkpoint.data["stats"]
+    failed = checkpoint.data["failed"]
+    print(
+        f"\n✅ 색인 완료: 청크 {stats['chunks']:,}개 저장, 중복 {stats['duplicates_removed']:,}개 제거, "
+        f"실패 파일 {len(failed)}개"
+    )
+    if failed:
+        print("   실패한 파일은 다시 실행하면 재시도합니다.")
+    else:
+        os.remove(args.checkpoint)
+
+
+if __name__ == "__main__":
+    main()
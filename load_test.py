@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+HTTP API 부하 테스트
+
+app.main의 앱을 별도 프로세스로 띄우고(결정적인 가짜 LLM + 합성 문서 코퍼스),
+/ask, /search/keywords, /health 요청을 지정한 비율과 도착률(초당 요청 수, 포아송 도착)로 보냅니다.
+구간(window)별 처리량, 오류율, p50/p95/p99 지연 시간과 엔드포인트별 요약을 출력합니다.
+
+지연 시간은 요청이 예정된 시각부터 측정하므로, 동시 사용자 수(--users)가 모두 사용 중이라
+대기한 시간도 포함됩니다. (서버가 느려져도 요청을 덜 보내서 지연이 가려지지 않음)
+종료 후 --drain-timeout 안에 끝나지 않은 요청은 취소하고 오류(unfinished)로 집계합니다.
+
+요약을 기준선(JSON)으로 저장해 두고, 배포 전에 같은 조건으로 실행해 용량 회귀를 확인합니다.
+httpx가 설치되어 있으면 연결을 재사용하는 httpx 클라이언트를, 없으면 내장 asyncio 클라이언트를 사용합니다.
+
+사용법:
+    python load_test.py --rate 50 --users 100 --duration 60
+    python load_test.py --rate 200 --users 500 --mix ask=0.5,search=0.4,health=0.1 --llm-latency-ms 800
+    python load_test.py --save-baseline logs/load_baseline.json
+    python load_test.py --compare-baseline logs/load_baseline.json --max-regression 0.2   # 회귀 시 종료 코드 1
+    python load_test.py --target http://staging:8000 --rate 20   # 이미 실행 중인 서버 (실제 LLM 호출)
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# 앱 모듈은 환경 변수를 설정한 뒤 서버 프로세스(--serve)에서만 import
+
+ENDPOINTS = ("ask", "search", "health")
+
+TOPICS = [
+    "deployment", "authentication", "caching", "database", "logging", "monitoring",
+    "kubernetes", "api", "testing", "configuration", "queue", "search"
+]
+WORDS = (
+    "server request response cache index vector embedding query document chunk deploy config "
+    "token latency thread process memory collection answer model cluster pod service release "
+    "rollback migration schema replica shard timeout retry backoff metric alert dashboard"
+).split()
+
+
+# ---------------------------------------------------------------------------
+# 서버 프로세스 (--serve)
+# ---------------------------------------------------------------------------
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Gemini 대신 사용하는 결정적 가짜 LLM (프롬프트 해시 기반 답변과 지연 시간)"""
+
+    def __init__(self, latency_ms, jitter_ms):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    def _answer(self, prompt):
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        delay = (self.latency_ms + (digest[0] / 255) * self.jitter_ms) / 1000
+        words = [WORDS[b % len(WORDS)] for b in digest[1:25]]
+        return delay, FakeResponse("가짜 답변: " + " ".join(words))
+
+    def generate_content(self, prompt, **kwargs):
+        delay, response = self._answer(prompt)
+        time.sleep(delay)
+        return response
+
+    async def generate_content_async(self, prompt, **kwargs):
+        delay, response = self._answer(prompt)
+        await asyncio.sleep(delay)
+        return response
+
+
+def synthetic_corpus(num_chunks, seed):
+    """주제별 합성 문서 청크 (같은 시드면 같은 코퍼스)"""
+    from langchain.schema import Document
+
+    rng = random.Random(seed)
+    documents = []
+    for i in range(num_chunks):
+        topic = TOPICS[i % len(TOPICS)]
+        body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(60, 160)))
+        file_path = f"synthetic/{topic}/guide_{i // 10}.md"
+        documents.append(Document(
+            page_content=f"{topic} guide section {i}: {body}",
+            metadata={
+                "source_file": os.path.basename(file_path),
+                "file_path": file_path,
+                "chunk_index": i % 10,
+                "total_chunks": 10,
+                "dir_0": "synthetic",
+                "dir_1": topic
+            }
+        ))
+    return documents
+
+
+def serve(args):
+    """임시 디렉토리의 벡터 DB에 합성 코퍼스를 색인하고 가짜 LLM으로 앱 실행"""
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    os.environ.update({
+        "CHROMA_MODE": "local",
+        "CHROMA_PERSIST_DIRECTORY": os.path.join(workdir, "chroma_db"),
+        "SNAPSHOT_BOOTSTRAP_PATH": "",
+        "QUERY_LOG_PATH": os.path.join(workdir, "query_log.jsonl"),
+        "CACHE_WARM_FILE": os.path.join(workdir, "warm_queries.json"),
+        "CACHE_WARM_ON_STARTUP": "false",
+        "DEDUP_ENABLED": "false"
+    })
+    os.environ.setdefault("GOOGLE_API_KEY", "load-test")
+
+    import uvicorn
+    from app.main import app
+    from app.services.ingestion_service import ingestion_service
+    from app.services.llm_service import llm_service
+
+    llm_service.model = FakeGenerativeModel(args.llm_latency_ms, args.llm_jitter_ms)
+
+    documents = synthetic_corpus(args.corpus_chunks, args.seed)
+    for start in range(0, len(documents), 256):
+        ingestion_service.ingest_documents(documents[start:start + 256])
+    print(f"✅ 합성 코퍼스 {len(documents)}개 청크 색인 완료 ({workdir})", flush=True)
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args):
+    """서버 프로세스를 띄우고 /health가 응답할 때까지 대기"""
+    port = free_port()
+    command = [
+        sys.executable, str(Path(__file__).resolve()), "--serve", "--port", str(port),
+        "--corpus-chunks", str(args.corpus_chunks), "--seed", str(args.seed),
+        "--llm-latency-ms", str(args.llm_latency_ms), "--llm-jitter-ms", str(args.llm_jitter_ms)
+    ]
+    # 서버 로그는 stderr로 (--json 출력과 섞이지 않도록)
+    process = subprocess.Popen(command, cwd=str(project_root), stdout=sys.stderr)
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"서버 프로세스가 종료되었습니다 (종료 코드 {process.returncode})")
+        try:
+            status = asyncio.run(RawClient(base_url).request("GET", "/api/v1/health"))
+            if status == 200:
+                return process, base_url
+        except OSError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"서버가 {args.startup_timeout}초 안에 시작되지 않았습니다.")
+
+
+# ---------------------------------------------------------------------------
+# 부하 생성기
+# ---------------------------------------------------------------------------
+
+class RawClient:
+    """httpx가 없을 때 사용하는 최소 HTTP/1.1 클라이언트 (요청마다 연결)"""
+
+    def __init__(self, base_url, timeout=30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+
+    async def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        try:
+            writer.write(
+                f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nConnection: close\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("ascii") + body
+            )
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+            await asyncio.wait_for(reader.read(), self.timeout)
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
+
+    async def aclose(self):
+        pass
+
+
+class HttpxClient:
+    """연결 풀을 재사용하는 httpx 클라이언트"""
+
+    def __init__(self, base_url, max_connections, timeout=30.0):
+        import httpx
+        self.client = httpx.AsyncClient(
+            base_url=base_url, timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+
+    async def request(self, method, path, payload=None):
+        response = await self.client.request(method, path, json=payload)
+        return response.status_code
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def make_client(base_url, max_connections):
+    try:
+        return HttpxClient(base_url, max_connections)
+    except ImportError:
+        return RawClient(base_url)
+
+
+def parse_mix(value):
+    """'ask=0.6,search=0.3,health=0.1' → 정규화된 비율"""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise ValueError(f"알 수 없는 엔드포인트입니다: {name} ({', '.join(ENDPOINTS)})")
+        mix[name.strip()] = float(weight)
+    total = sum(mix.values())
+    return {name: round(weight / total, 4) for name, weight in mix.items() if weight > 0}
+
+
+def build_request(endpoint, rng, questions):
+    """엔드포인트별 요청 (method, path, body), rng는 요청마다 따로 만든 난수 생성기"""
+    if endpoint == "ask":
+        return "POST", "/api/v1/ask", {"question": rng.choice(questions), "max_results": 5}
+    if endpoint == "search":
+        return "POST", "/api/v1/search/keywords?max_results=5", rng.sample(WORDS, 2) + [rng.choice(TOPICS)]
+    return "GET", "/api/v1/health", None
+
+
+def percentiles(latencies):
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 1), "p95_ms": round(float(p95), 1), "p99_ms": round(float(p99), 1)}
+
+
+def summarize(results, seconds):
+    """결과 목록 → 처리량/오류율/지연 백분위"""
+    errors = sum(1 for r in results if not r["ok"])
+    return {
+        "requests": len(results),
+        "throughput_rps": round(len(results) / seconds, 2) if seconds > 0 else 0.0,
+        "error_rate": round(errors / len(results), 4) if results else 0.0,
+        **percentiles([r["latency_ms"] for r in results if r["ok"]])
+    }
+
+
+async def run_load(args, base_url):
+    """포아송 도착으로 요청을 보내고 구간별 지표를 출력"""
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    questions = [
+        f"How do I configure {rng.choice(TOPICS)} {rng.choice(WORDS)} {rng.choice(WORDS)}?"
+        for _ in range(args.unique_questions)
+    ]
+    names, weights = list(mix), list(mix.values())
+
+    client = make_client(base_url, args.users)
+    users = asyncio.Semaphore(args.users)
+    results, windows = [], []
+    tasks = {}  # 진행 중인 요청 → (엔드포인트, 예정 시각)
+    started = time.perf_counter()
+
+    async def send(endpoint, request, scheduled):
+        method, path, payload = request
+        async with users:
+            try:
+                status = await client.request(method, path, payload)
+                ok, error = 200 <= status < 300, None if 200 <= status < 300 else f"HTTP {status}"
+            except Exception as e:
+                ok, error = False, type(e).__name__
+        finished = time.perf_counter()
+        results.append({
+            "endpoint": endpoint,
+            "finished": finished - started,
+            "latency_ms": (finished - scheduled) * 1000,
+            "ok": ok,
+            "error": error
+        })
+
+    async def report():
+        window_start = 0
+        while True:
+            await asyncio.sleep(args.window)
+            now = time.perf_counter() - started
+            window = [r for r in results if window_start <= r["finished"] < now]
+            stats = {"t": round(now, 1), "in_flight": len(tasks), **summarize(window, now - window_start)}
+            windows.append(stats)
+            if not args.json:
+                print(
+                    f"   {stats['t']:>6.1f}s  {stats['throughput_rps']:>8.1f} rps  오류 {stats['error_rate']:>6.1%}  "
+                    f"p50 {stats['p50_ms'] or 0:>8.1f}  p95 {stats['p95_ms'] or 0:>8.1f}  "
+                    f"p99 {stats['p99_ms'] or 0:>8.1f} ms  진행 중 {stats['in_flight']}"
+                )
+            window_start = now
+
+    if not args.json:
+        print(f"🚀 {base_url} | 도착률 {args.rate}/s, 동시 사용자 {args.users}, {args.duration}초, 비율 {mix}")
+    reporter = asyncio.create_task(report())
+
+    # 포아송 도착: 지수 분포 간격으로 예정 시각을 정하고, 늦어져도 예정 시각 기준으로 지연을 측정
+    next_at = started
+    scheduled = 0
+    while next_at - started < args.duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        endpoint = rng.choices(names, weights)[0]
+        # 요청 내용은 요청마다 별도 시드로 만들어, 응답 완료 순서와 관계없이 같은 시드면 같은 요청열이 됨
+        request = build_request(endpoint, random.Random(f"{args.seed}:{scheduled}"), questions)
+        task = asyncio.create_task(send(endpoint, request, next_at))
+        tasks[task] = (endpoint, next_at)
+        task.add_done_callback(lambda done: tasks.pop(done, None))
+        scheduled += 1
+        next_at += rng.expovariate(args.rate)
+
+    if tasks:
+        await asyncio.wait(list(tasks), timeout=args.drain_timeout)
+    elapsed = time.perf_counter() - started
+    reporter.cancel()
+
+    # 제한 시간 안에 끝나지 않은 요청은 취소하고 오류로 집계 (빠진 채로 두면 느려질수록 오류율/지연이 좋아 보임)
+    unfinished = list(tasks.items())
+    now = time.perf_counter()
+    for task, (endpoint, scheduled_at) in unfinished:
+        task.cancel()
+        results.append({
+            "endpoint": endpoint,
+            "finished": now - started,
+            "latency_ms": (now - scheduled_at) * 1000,
+            "ok": False,
+            "error": "unfinished"
+        })
+    await asyncio.gather(*(task for task, _ in unfinished), return_exceptions=True)
+    await client.aclose()
+
+    errors = {}
+    for r in results:
+        if r["error"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    return {
+        "config": {
+            "rate": args.rate, "users": args.users, "duration": args.duration, "mix": mix,
+            "llm_latency_ms": args.llm_latency_ms, "corpus_chunks": args.corpus_chunks,
+            "unique_questions": args.unique_questions, "target": args.target or "local"
+        },
+        "scheduled": scheduled,
+        "offered_rps": round(scheduled / args.duration, 2),
+        "overall": summarize(results, elapsed),
+        "endpoints": {
+            name: summarize([r for r in results if r["endpoint"] == name], elapsed) for name in mix
+        },
+        "errors": errors,
+        "unfinished": len(unfinished),
+        "windows": windows
+    }
+
+
+def compare_baseline(summary, baseline, max_regression):
+    """기준선 대비 처리량 감소, p95/p99 증가, 오류율 증가 확인 (회귀 목록 반환)
+
+    처리량은 도착 간격의 무작위성을 없애기 위해 실제 보낸 요청률(offered_rps) 대비 비율로 비교합니다.
+    """
+    regressions = []
+    if baseline["config"] != summary["config"]:
+        print("⚠️ 기준선과 실행 조건이 다릅니다. 결과 비교가 정확하지 않을 수 있습니다.")
+
+    pairs = [("overall", baseline["overall"], summary["overall"])]
+    pairs += [(name, stats, summary["endpoints"].get(name)) for name, stats in baseline["endpoints"].items()]
+    for name, before, after in pairs:
+        if after is None:
+            continue
+        before_ratio = before["throughput_rps"] / max(baseline["offered_rps"], 1e-9)
+        after_ratio = after["throughput_rps"] / max(summary["offered_rps"], 1e-9)
+        if after_ratio < before_ratio * (1 - max_regression):
+            regressions.append(
+                f"{name} 처리량/요청률 {before_ratio:.1%} → {after_ratio:.1%} "
+                f"({before['throughput_rps']} → {after['throughput_rps']} rps)"
+            )
+        for key in ("p95_ms", "p99_ms"):
+            if before[key] and after[key] and after[key] > before[key] * (1 + max_regression):
+                regressions.append(f"{name} {key} {before[key]} → {after[key]}")
+        if after["error_rate"] > before["error_rate"] + 0.01:
+            regressions.append(f"{name} 오류율 {before['error_rate']:.2%} → {after['error_rate']:.2%}")
+    if summary["unfinished"] > baseline.get("unfinished", 0):
+        regressions.append(f"제한 시간 안에 끝나지 않은 요청 {baseline.get('unfinished', 0)} → {summary['unfinished']}개")
+    return regressions
+
+
+def print_summary(summary):
+    print(f"\n📊 요약 (요청 {summary['overall']['requests']}개, 제시 {summary['offered_rps']} rps)")
+    print(f"   {'엔드포인트':<10}{'요청':>8}{'rps':>9}{'오류율':>9}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+    for name, stats in [*summary["endpoints"].items(), ("전체", summary["overall"])]:
+        print(
+            f"   {name:<10}{stats['requests']:>8}{stats['throughput_rps']:>9.1f}{stats['error_rate']:>9.2%}"
+            f"{stats['p50_ms'] or 0:>10.1f}{stats['p95_ms'] or 0:>10.1f}{stats['p99_ms'] or 0:>10.1f}"
+        )
+    if summary["errors"]:
+        print(f"   오류: {summary['errors']}")
+    if summary["unfinished"]:
+        print(f"   ⚠️ 제한 시간 안에 끝나지 않은 요청 {summary['unfinished']}개")
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="HTTP API 부하 테스트")
+    parser.add_argument("--target", help="이미 실행 중인 서버 주소 (기본: 가짜 LLM으로 로컬 서버 실행)")
+    parser.add_argument("--rate", type=float, default=20.0, help="초당 요청 도착률")
+    parser.add_argument("--users", type=int, default=50, help="최대 동시 요청 수 (동시 사용자)")
+    parser.add_argument("--duration", type=float, default=30.0, help="요청을 보내는 시간(초)")
+    parser.add_argument("--mix", default="ask=0.6,search=0.3,health=0.1", help="엔드포인트별 요청 비율")
+    parser.add_argument("--window", type=float, default=5.0, help="구간 보고 간격(초)")
+    parser.add_argument("--unique-questions", type=int, default=200, help="서로 다른 질문 수 (적을수록 캐시 적중 증가)")
+    parser.add_argument("--corpus-chunks", type=int, default=2000, help="합성 코퍼스 청크 수")
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0, help="가짜 LLM 기본 지연 시간")
+    parser.add_argument("--llm-jitter-ms", type=float, default=200.0, help="가짜 LLM 추가 지연 시간 범위")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--startup-timeout", type=float, default=300.0, help="로컬 서버 시작 대기 시간(초)")
+    parser.add_argument("--drain-timeout", type=float, default=60.0, help="종료 후 남은 요청 대기 시간(초)")
+    parser.add_argument("--save-baseline", help="요약을 기준선 JSON으로 저장")
+    parser.add_argument("--compare-baseline", help="기준선 JSON과 비교 (회귀 시 종료 코드 1)")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="허용하는 처리량 감소/지연 증가 비율")
+    parser.add_argument("--json", action="store_true", help="요약을 JSON으로 출력")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    process = None
+    if args.target:
+        base_url = args.target.rstrip("/")
+    else:
+        process, base_url = start_server(args)
+    try:
+        summary = asyncio.run(run_load(args, base_url))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+    else:
+        print_summary(summary)
+
+    if args.save_baseline:
+        directory = os.path.dirname(args.save_baseline)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"💾 기준선 저장: {args.save_baseline}")
+
+    if args.compare_baseline:
+        with open(args.compare_baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_baseline(summary, baseline, args.max_regression)
+        if regressions:
+            print(f"❌ 기준선 대비 용량 회귀 ({args.max_regression:.0%} 초과):")
+            for regression in regressions:
+                print(f"   - {regression}")
+            sys.exit(1)
+        print("✅ 기준선 대비 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+양자화 임베딩 재현율/메모리 리포트
+
+현재 컬렉션의 임베딩으로 int8/binary 양자화 인덱스를 만들고,
+float32 전수 검색 대비 recall@k, 검색 지연 시간, 메모리 사용량을 비교합니다.
+
+사용법:
+    python quantization_report.py --k 5 --queries 200
+    python quantization_report.py --questions questions.txt   # 실제 질문 사용 (임베딩 모델 로드)
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from app.core.database import vector_db
+from app.core.quantization import QuantizedVectorIndex
+
+
+def load_corpus():
+    """컬렉션의 모든 임베딩 로드"""
+    ids, blocks = [], []
+    for batch in vector_db.iter_records(include=["embeddings"]):
+        ids.extend(batch["ids"])
+        blocks.append(batch["embeddings"])
+    return ids, np.concatenate(blocks) if blocks else np.empty((0, 0), dtype=np.float32)
+
+
+def load_queries(args, ids, vectors):
+    """질문 임베딩 또는 코퍼스에서 떼어낸 검증용 벡터 준비"""
+    if args.questions:
+        from app.services.embedding_service import embedding_service
+        questions = [line.strip() for line in open(args.questions, encoding="utf-8") if line.strip()]
+        return ids, vectors, embedding_service.get_embeddings(questions)
+
+    # 질문 파일이 없으면 일부 청크를 인덱스에서 제외하고 질의로 사용
+    rng = np.random.default_rng(args.seed)
+    n_queries = min(args.queries, len(ids) // 5)
+    held_out = rng.choice(len(ids), size=n_queries, replace=False)
+    mask = np.ones(len(ids), dtype=bool)
+    mask[held_out] = False
+    return [i for i, keep in zip(ids, mask) if keep], vectors[mask], vectors[held_out]
+
+
+def evaluate(index, ids, queries, exact_top, k, rescore):
+    """recall@k와 질의 지연 시간 측정"""
+    recalls, latencies = [], []
+    for query, expected in zip(queries, exact_top):
+        started = time.perf_counter()
+        found, _ = index.search(query, k, rescore=rescore)
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(len(set(found) & expected) / k)
+    return float(np.mean(recalls)), float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99))
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="양자화 임베딩 재현율/메모리 리포트")
+    parser.add_argument("--k", type=int, default=5, help="recall@k의 k")
+    parser.add_argument("--queries", type=int, default=200, help="검증용 질의 수 (질문 파일 미사용 시)")
+    parser.add_argument("--questions", help="한 줄에 하나씩 질문이 적힌 파일")
+    parser.add_argument("--rescore-factors", default="1,2,4,8", help="재채점 후보 배수 목록")
+    parser.add_argument("--batch-size", type=int, default=256, help="인덱스에 추가하는 배치 크기 (색인 배치와 동일하게)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    ids, vectors = load_corpus()
+    if len(ids) < 10:
+        print("❌ 리포트를 만들기에 컬렉션의 청크 수가 너무 적습니다.")
+        sys.exit(1)
+
+    ids, vectors, queries = load_queries(args, ids, vectors)
+    k = min(args.k, len(ids))
+    print(f"📊 코퍼스 {len(ids)}개 벡터 ({vectors.shape[1]}차원), 질의 {len(queries)}개, k={k}")
+
+    # float32 전수 검색 기준 정답
+    exact_scores = queries @ vectors.T
+    exact_top = [set(ids[i] for i in np.argsort(-row)[:k]) for row in exact_scores]
+    float_bytes = vectors.nbytes
+
+    rows = []
+    for mode in QuantizedVectorIndex.MODES:
+        with tempfile.TemporaryDirectory() as directory:
+            index = QuantizedVectorIndex(directory, mode=mode)
+            # 실제 색인처럼 배치 단위로 추가 (int8 스케일 재보정 포함)
+            for start in range(0, len(ids), args.batch_size):
+                index.add(ids[start:start + args.batch_size], vectors[start:start + args.batch_size])
+            memory = index.get_stats()["in_memory_bytes"]
+
+            settings_to_try = [(None, False)] + [(int(f), True) for f in args.rescore_factors.split(",")]
+            for factor, rescore in settings_to_try:
+                if factor is not None:
+                    index.rescore_factor = factor
+                recall, p50, p99 = evaluate(index, ids, queries, exact_top, k, rescore)
+                rows.append({
+                    "mode": mode,
+                    "rescore_factor": factor if rescore else "-",
+                    "recall_at_k": round(recall, 4),
+                    "p50_ms": round(p50, 3),
+                    "p99_ms": round(p99, 3),
+                    "memory_bytes": memory,
+                    "memory_ratio": round(float_bytes / memory, 1)
+                })
+
+    if args.json:
+        print(json.dumps({"float32_bytes": float_bytes, "results": rows}, indent=2))
+        return
+
+    print(f"\n   float32 기준 메모리: {float_bytes:,} bytes")
+    print(f"   {'방식':<8}{'재채점':>8}{'recall@k':>10}{'p50(ms)':>10}{'p99(ms)':>10}{'메모리(bytes)':>16}{'절감배수':>10}")
+    for row in rows:
+        print(
+            f"   {row['mode']:<8}{str(row['rescore_factor']):>8}{row['recall_at_k']:>10.3f}"
+            f"{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['memory_bytes']:>16,}{row['memory_ratio']:>9.1f}x"
+        )
+    print(
+        "\n💡 양자화 사용 시 검색에는 양자화 코드만 상주하므로(HNSW는 쓰기 후 내림) 절감배수만큼 "
+        "같은 메모리에 더 많은 코퍼스를 올릴 수 있습니다. (재채점용 float32 원본은 디스크에 한 벌 더 보관)"
+    )
+
+
+if __name__ == "__main__":
+    main()
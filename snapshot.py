@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+벡터 인덱스 스냅샷 내보내기/가져오기 스크립트
+
+임베딩 모델을 로드하지 않으므로 새 복제본을 몇 초 만에 준비할 수 있습니다.
+
+사용법:
+    python snapshot.py export snapshots/developer_docs.npz --dtype float16
+    python snapshot.py import snapshots/developer_docs.npz --replace
+    python snapshot.py export snapshots/platform.npz --collection platform
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from app.services.snapshot_service import snapshot_service, SUPPORTED_DTYPES
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="벡터 인덱스 스냅샷 내보내기/가져오기")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="컬렉션을 스냅샷 파일로 내보내기")
+    export_parser.add_argument("path", help="저장할 스냅샷 파일 경로 (.npz)")
+    export_parser.add_argument("--dtype", choices=SUPPORTED_DTYPES, default="float16", help="임베딩 저장 형식")
+    export_parser.add_argument("--collection", help="내보낼 컬렉션 (기본: 기본 컬렉션)")
+
+    import_parser = subparsers.add_parser("import", help="스냅샷 파일을 컬렉션에 적재")
+    import_parser.add_argument("path", help="스냅샷 파일 경로 (.npz)")
+    import_parser.add_argument("--replace", action="store_true", help="컬렉션을 현재 HNSW 설정으로 다시 만든 뒤 적재")
+    import_parser.add_argument("--collection", help="적재할 컬렉션 (기본: 기본 컬렉션, 없으면 생성)")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "export":
+            directory = os.path.dirname(args.path)
+            if directory:
+                Path(directory).mkdir(parents=True, exist_ok=True)
+            stats = snapshot_service.export_snapshot(args.path, dtype=args.dtype, collection=args.collection)
+            print(f"   체크섬: {stats['checksum']}")
+        else:
+            stats = snapshot_service.import_snapshot(
+                args.path, replace=args.replace, collection=args.collection
+            )
+            print(f"   원본 컬렉션: {stats['source_collection']} → {stats['collection']} ({stats['dtype']}, {stats['dimension']}차원)")
+    except Exception as e:
+        print(f"\n❌ 스냅샷 {args.command} 중 오류가 발생했습니다: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
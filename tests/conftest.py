@@ -0,0 +1,30 @@
+"""테스트 공통 설정
+
+app 설정/DB 모듈은 import 시점에 환경 변수를 읽고 전역 인스턴스를 만들므로,
+테스트 모듈이 app을 import하기 전에 임시 ChromaDB 디렉토리와 로컬 모드를 지정합니다.
+(.env는 load_dotenv가 기존 환경 변수를 덮어쓰지 않으므로 여기서 지정한 값이 우선)
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+_data_dir = tempfile.mkdtemp(prefix="rag_tests_")
+os.environ.update({
+    "CHROMA_MODE": "local",
+    "CHROMA_PERSIST_DIRECTORY": os.path.join(_data_dir, "chroma"),
+    "EMBEDDING_WORKERS": "0",
+    "EMBEDDING_QUANTIZATION": "none",
+    "QUERY_LOG_ENABLED": "false",
+})
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_data_dir, ignore_errors=True)
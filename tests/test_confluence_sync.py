@@ -0,0 +1,262 @@
+"""Confluence 증분 동기화 테스트
+
+Confluence REST API(/rest/api/content)의 응답을 흉내 내는 로컬 스텁 서버를 띄우고,
+임시 ChromaDB 컬렉션과 상태 파일로 동기화를 여러 번 실행합니다.
+임베딩은 설정된 임베딩 모델(EMBEDDING_BACKEND)을 그대로 사용하므로 관련 패키지가 없으면 건너뜁니다.
+"""
+
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("langchain")
+pytest.importorskip("sentence_transformers")
+
+SPACE_KEY = "DEV"
+CONTEXT_PATH = "/wiki"
+
+_WORDS = (
+    "deploy rollback cache index shard replica quorum lease token retry backoff budget latency "
+    "schema migration snapshot restore queue worker cron alert pager runbook owner review branch "
+    "release canary flag config secret vault rotate audit trace span metric dashboard incident"
+).split()
+
+
+def sample_body(seed: int, paragraphs: int = 6) -> str:
+    """페이지마다 내용이 다른 storage 형식 본문 (유사 중복으로 병합되지 않도록)"""
+    rng = random.Random(seed)
+    parts = []
+    for p in range(paragraphs):
+        words = rng.choices(_WORDS, k=40)
+        parts.append(f"<p>page {seed} section {p}: {' '.join(words)}</p>")
+    # 코드 블록도 페이지마다 달라야 다른 페이지의 코드 블록 청크와 병합되지 않음
+    command = f"./deploy.sh --page {seed} " + " ".join(f"--{word}" for word in rng.choices(_WORDS, k=20))
+    parts.append(
+        f'<ac:structured-macro ac:name="code"><ac:parameter ac:name="language">bash</ac:parameter>'
+        f"<ac:plain-text-body><![CDATA[{command}]]></ac:plain-text-body></ac:structured-macro>"
+    )
+    return "".join(parts)
+
+
+class ConfluenceStub:
+    """Confluence REST 응답을 흉내 내는 스텁 서버 (페이지 목록 페이지 넘김, 본문 조회, 장애 주입)"""
+
+    def __init__(self):
+        self.pages = {}  # 페이지 ID → {"title", "version", "body"}
+        self.fail_listing = False
+        self.fail_pages = set()
+        self.body_requests = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}{CONTEXT_PATH}"
+
+    def set_page(self, page_id: str, version: int, seed: int):
+        self.pages[page_id] = {"title": f"Page {page_id}", "version": version, "body": sample_body(seed)}
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _summary(self, page_id: str):
+        page = self.pages[page_id]
+        return {
+            "id": page_id,
+            "type": "page",
+            "title": page["title"],
+            "version": {"number": page["version"]},
+            "_links": {"webui": f"/spaces/{SPACE_KEY}/pages/{page_id}"}
+        }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                prefix = CONTEXT_PATH + "/rest/api/content"
+                if url.path == prefix:
+                    if stub.fail_listing:
+                        return self._reply(500, {"message": "listing unavailable"})
+                    start, limit = int(query.get("start", 0)), int(query.get("limit", 25))
+                    ids = sorted(stub.pages)
+                    links = {}
+                    if start + limit < len(ids):
+                        links["next"] = f"{prefix}?spaceKey={SPACE_KEY}&start={start + limit}&limit={limit}"
+                    return self._reply(200, {
+                        "results": [stub._summary(page_id) for page_id in ids[start:start + limit]],
+                        "start": start, "limit": limit, "_links": links
+                    })
+                if url.path.startswith(prefix + "/"):
+                    page_id = url.path[len(prefix) + 1:]
+                    with stub._lock:
+                        stub.body_requests.append(page_id)
+                    if page_id in stub.fail_pages:
+                        # 4xx는 재시도하지 않으므로 바로 실패로 처리됨
+                        return self._reply(404, {"message": "page unavailable"})
+                    if page_id not in stub.pages:
+                        return self._reply(404, {"message": "not found"})
+                    page = stub._summary(page_id)
+                    page["body"] = {"storage": {"value": stub.pages[page_id]["body"], "representation": "storage"}}
+                    return self._reply(200, page)
+                self._reply(404, {"message": "not found"})
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class SyncHarness:
+    """스텁 서버 하나에 대해 동기화를 실행하고 요청/임베딩 호출을 기록"""
+
+    def __init__(self, stub, service, client, db, embedding_calls):
+        self.stub = stub
+        self.service = service
+        self.client = client
+        self.db = db
+        self.embedding_calls = embedding_calls
+
+    def sync(self, full: bool = False):
+        self.stub.body_requests.clear()
+        self.embedding_calls.clear()
+        return self.service.sync_space(SPACE_KEY, collection=self.db.name, full=full, client=self.client)
+
+    def page_documents(self, page_id: str):
+        """페이지의 청크 본문 (다른 페이지와 유사 중복으로 병합된 청크 포함)"""
+        from app.core.database import source_key
+        from app.services.confluence_loader import page_file_path
+
+        file_path = page_file_path(SPACE_KEY, page_id)
+        where = {"$or": [{"file_path": file_path}, {source_key(file_path): True}]}
+        return self.db.get_records(where, include=["documents"])["documents"]
+
+
+@pytest.fixture
+def harness(tmp_path, monkeypatch, request):
+    from app.core.collections import collection_manager
+    from app.core.config import settings
+    from app.services.confluence_loader import ConfluenceClient, ConfluenceSyncService
+    from app.services.embedding_service import embedding_service
+
+    monkeypatch.setattr(settings, "confluence_page_size", 2)  # 목록 페이지 넘김 확인
+    stub = ConfluenceStub().start()
+    service = ConfluenceSyncService()
+    service.state_path = str(tmp_path / "state.json")
+    client = ConfluenceClient(stub.base_url, rate_limit_per_second=0)
+
+    # 임베딩 호출 횟수 기록 (페이지별이 아니라 배치 단위로 임베딩하는지 확인)
+    embedding_calls = []
+    get_embeddings = embedding_service.get_embeddings
+
+    def counting_get_embeddings(texts, *args, **kwargs):
+        embedding_calls.append(len(texts))
+        return get_embeddings(texts, *args, **kwargs)
+
+    monkeypatch.setattr(embedding_service, "get_embeddings", counting_get_embeddings)
+
+    db = collection_manager.get(f"confluence-{request.node.name.replace('_', '-')}"[:63], create=True)
+    for i in range(1, 6):
+        stub.set_page(str(100 + i), 1, i)
+    yield SyncHarness(stub, service, client, db, embedding_calls)
+    client.session.close()
+    stub.stop()
+    db.clear_database()
+
+
+def test_first_sync_indexes_every_page_in_one_batch(harness):
+    stats = harness.sync()
+
+    assert stats["pages"] == 5 and stats["changed_pages"] == 5
+    assert all(harness.page_documents(str(100 + i)) for i in range(1, 6))
+    assert len(harness.embedding_calls) == 1
+    assert any("./deploy.sh --page 1 " in doc for doc in harness.page_documents("101"))
+
+
+def test_unchanged_resync_fetches_no_bodies(harness):
+    harness.sync()
+
+    stats = harness.sync()
+
+    assert stats["changed_pages"] == 0 and stats["unchanged_pages"] == 5
+    assert harness.stub.body_requests == []
+
+
+def test_resync_reindexes_changed_pages_and_removes_deleted(harness):
+    harness.sync()
+    harness.stub.set_page("102", 2, 20)
+    harness.stub.set_page("106", 1, 6)
+    del harness.stub.pages["105"]
+
+    stats = harness.sync()
+
+    assert stats["changed_pages"] == 2 and stats["deleted_pages"] == 1
+    assert sorted(harness.stub.body_requests) == ["102", "106"]
+    assert harness.page_documents("105") == []
+    documents = harness.page_documents("102")
+    assert any("page 20 section" in doc for doc in documents)
+    assert not any("page 2 section" in doc for doc in documents)
+
+
+def test_failed_page_keeps_chunks_and_is_retried(harness):
+    harness.sync()
+    harness.stub.set_page("103", 2, 30)
+    harness.stub.fail_pages.add("103")
+
+    stats = harness.sync()
+
+    assert stats["failed_pages"] == 1
+    assert any("page 3 section" in doc for doc in harness.page_documents("103"))
+
+    harness.stub.fail_pages.clear()
+    stats = harness.sync()
+
+    assert harness.stub.body_requests == ["103"] and stats["changed_pages"] == 1
+
+
+def test_full_sync_reindexes_and_removes_deleted_pages(harness):
+    harness.sync()
+    del harness.stub.pages["101"]
+
+    stats = harness.sync(full=True)
+
+    assert stats["changed_pages"] == 4 and stats["deleted_pages"] == 1
+    assert harness.page_documents("101") == []
+
+
+def test_listing_failure_keeps_state(harness):
+    harness.sync()
+    with open(harness.service.state_path, encoding="utf-8") as f:
+        saved_state = f.read()
+    harness.stub.fail_listing = True
+
+    with pytest.raises(Exception):
+        harness.sync()
+
+    with open(harness.service.state_path, encoding="utf-8") as f:
+        assert f.read() == saved_state
+
+    harness.stub.fail_listing = False
+    stats = harness.sync()
+
+    assert stats["changed_pages"] == 0 and stats["deleted_pages"] == 0
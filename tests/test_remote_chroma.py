@@ -0,0 +1,146 @@
+"""원격 ChromaDB(HTTP 모드) 테스트
+
+1. 재시도 정책: 항상 503을 반환하는 스텁 서버로 멱등 요청(GET, Chroma get/query/upsert 등 POST)만
+   재시도하고 add 같은 비멱등 POST는 한 번만 보내는지 확인합니다.
+2. 왕복 동작: `chroma run`으로 임시 서버를 띄워 upsert → 검색 → 파일 단위 삭제 → 개수 조회를 수행합니다.
+   (chroma CLI가 없으면 건너뜀)
+
+임베딩 모델은 로드하지 않고 임의 벡터를 사용합니다.
+"""
+
+import shutil
+import socket
+import subprocess
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("requests")
+
+
+def free_port() -> int:
+    """사용 가능한 로컬 포트"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def unavailable_server():
+    """모든 요청에 503을 반환하고 경로별 요청 횟수를 기록하는 스텁 서버"""
+    hits = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            self.rfile.read(length)
+            with lock:
+                key = f"{self.command} {self.path}"
+                hits[key] = hits.get(key, 0) + 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        do_GET = do_POST = _reply
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", hits
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("method, path, retried", [
+    ("GET", "/api/v1/collections/c1/count", True),
+    ("POST", "/api/v1/collections/c1/query", True),
+    ("POST", "/api/v1/collections/c1/upsert", True),
+    ("POST", "/api/v1/collections/c1/add", False),
+])
+def test_retries_only_idempotent_requests(unavailable_server, method, path, retried):
+    from app.core.http_pool import CHROMA_IDEMPOTENT_POST_PATHS, configure_pooled_session
+
+    base_url, hits = unavailable_server
+    max_retries = 2
+    session = configure_pooled_session(
+        max_retries=max_retries, backoff_factor=0, timeout_seconds=5,
+        retry_post_paths=CHROMA_IDEMPOTENT_POST_PATHS
+    )
+
+    response = session.request(method, base_url + path, data=b"{}")
+
+    assert response.status_code == 503
+    assert hits[f"{method} {path}"] == (max_retries + 1 if retried else 1)
+
+
+@pytest.fixture
+def chroma_server(tmp_path):
+    """chroma run으로 임시 로컬 서버 시작 후 heartbeat 응답까지 대기"""
+    if shutil.which("chroma") is None:
+        pytest.skip("chroma CLI가 없습니다.")
+
+    port = free_port()
+    process = subprocess.Popen(
+        ["chroma", "run", "--path", str(tmp_path / "chroma_server"), "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        cwd=tmp_path  # chroma run은 실행 디렉토리에 chroma.log를 남김
+    )
+    try:
+        deadline = time.time() + 60
+        while True:
+            if process.poll() is not None:
+                pytest.skip("chroma run이 종료되었습니다. (chromadb 서버 의존성 확인)")
+            try:
+                urllib.request.urlopen(f"http://localhost:{port}/api/v1/heartbeat", timeout=1)
+                break
+            except OSError:
+                if time.time() > deadline:
+                    pytest.fail("로컬 Chroma 서버가 시작되지 않았습니다.")
+                time.sleep(0.5)
+        yield "localhost", port
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def test_round_trip_over_http(chroma_server, monkeypatch):
+    pytest.importorskip("chromadb")
+    from app.core.config import settings
+    from app.core.database import VectorDatabase
+
+    host, port = chroma_server
+    # 전역 DB는 로컬 모드로 만들어졌으므로 이 테스트의 VectorDatabase만 HTTP 클라이언트를 생성
+    monkeypatch.setattr(settings, "chroma_mode", "http")
+    monkeypatch.setattr(settings, "chroma_http_host", host)
+    monkeypatch.setattr(settings, "chroma_http_port", port)
+    db = VectorDatabase("remote_round_trip")
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((6, 16)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    documents = [f"remote check chunk {i}" for i in range(6)]
+    metadatas = [
+        {"file_path": f"check/{'a' if i < 4 else 'b'}.md", "source_file": f"{'a' if i < 4 else 'b'}.md", "chunk_index": i}
+        for i in range(6)
+    ]
+
+    db.add_documents(documents, embeddings, metadatas)
+    # 같은 청크를 다시 저장해도 upsert이므로 개수가 늘지 않아야 함
+    db.add_documents(documents, embeddings, metadatas)
+    assert db.collection.count() == 6
+
+    results = db.search(embeddings[2], n_results=3)
+    assert results["documents"][0][0] == documents[2]
+
+    filtered = db.search(embeddings[0], n_results=3, where={"source_file": "b.md"})
+    assert [meta["source_file"] for meta in filtered["metadatas"][0]] == ["b.md", "b.md"]
+
+    assert db.delete_by_file("check/a.md") == 4
+    assert db.collection.count() == 2
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+질의 로그 분석 및 캐시 예열 대상 생성 스크립트
+
+질의 로그에서 가장 자주 나온 질문을 뽑아 예열 대상 파일(CACHE_WARM_FILE)로 저장합니다.
+서버는 시작 시와 재색인 후 이 파일을 읽어 임베딩/검색/답변 캐시를 미리 채웁니다.
+
+사용법:
+    python warm_cache.py --top 100
+    python warm_cache.py --top 20 --dry-run   # 저장하지 않고 결과만 출력
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.services.query_log import query_log_service
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="질의 로그 분석 및 캐시 예열 대상 생성")
+    parser.add_argument("--top", type=int, default=settings.cache_warm_limit, help="예열할 질문 수")
+    parser.add_argument("--log", default=settings.query_log_path, help="질의 로그 경로")
+    parser.add_argument("--output", default=settings.cache_warm_file, help="예열 대상 파일 경로")
+    parser.add_argument("--dry-run", action="store_true", help="파일을 저장하지 않고 결과만 출력")
+    args = parser.parse_args()
+
+    queries = query_log_service.mine_frequent_queries(args.top, path=args.log)
+    if not queries:
+        print(f"⚠️ 분석할 질의 로그가 없습니다: {args.log}")
+        sys.exit(1)
+
+    print(f"📊 자주 묻는 질문 상위 {len(queries)}개")
+    for rank, query in enumerate(queries, 1):
+        print(f"   {rank:>3}. ({query['count']}회) {query['question']}")
+
+    if args.dry_run:
+        return
+
+    # 서버 모듈(임베딩 모델 등)을 로드하지 않도록 직접 저장
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(queries, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n✅ 예열 대상 저장 완료: {output}")
+
+
+if __name__ == "__main__":
+    main()